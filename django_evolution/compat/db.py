@@ -8,8 +8,10 @@ Django that are supported.
 from __future__ import unicode_literals
 
 from contextlib import contextmanager
+from functools import wraps
 
 import django
+from django.conf import settings
 from django.core.management import color, sql
 from django.db import connections, router, transaction
 from django.db.utils import DEFAULT_DB_ALIAS
@@ -38,10 +40,21 @@ except ImportError:
         # Django < 1.7
         BaseDatabaseSchemaEditor = None
 
+from django_evolution.compat.datastructures import OrderedDict
 from django_evolution.compat.models import get_models, get_remote_field
 from django_evolution.support import supports_index_together
 
 
+#: Generated index and constraint names, in least-recently-used order.
+_name_cache = OrderedDict()
+
+#: Statistics on lookups in the name cache.
+_name_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+}
+
+
 @contextmanager
 def atomic(using=None):
     """Perform database operations atomically within a transaction.
@@ -477,6 +490,98 @@ def sql_add_constraints(connection, model, refs):
             model, color.no_style(), refs)
 
 
+def _make_name_cache_key(value):
+    """Return a hashable version of a value for a name cache key.
+
+    Lists and tuples are converted to tuples, retaining their type, since
+    some versions of Django digest the string form of the value.
+
+    Args:
+        value (object):
+            The value to convert.
+
+    Returns:
+        object:
+        The hashable value.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_make_name_cache_key(item)
+                                   for item in value))
+
+    return value
+
+
+def _cache_name(func):
+    """Cache the names returned by an index or constraint name generator.
+
+    Names are stored in a bounded least-recently-used cache, keyed by the
+    generator, the database vendor, the maximum name length, and the
+    arguments. The size of the cache can be set with
+    ``settings.DJANGO_EVOLUTION_NAME_CACHE_SIZE``, and ``0`` turns the cache
+    off.
+
+    Args:
+        func (callable):
+            The name generator to wrap. This must take a database connection
+            as its first argument.
+
+    Returns:
+        callable:
+        The wrapping function.
+    """
+    @wraps(func)
+    def _wrapper(connection, *args, **kwargs):
+        max_size = getattr(settings, 'DJANGO_EVOLUTION_NAME_CACHE_SIZE',
+                           4096)
+
+        if not max_size:
+            return func(connection, *args, **kwargs)
+
+        key = (
+            func.__name__,
+            connection.vendor,
+            connection.ops.max_name_length(),
+            _make_name_cache_key(args),
+            _make_name_cache_key(sorted(six.iteritems(kwargs))),
+        )
+
+        try:
+            name = _name_cache.pop(key)
+        except KeyError:
+            _name_cache_stats['misses'] += 1
+            name = func(connection, *args, **kwargs)
+
+            while len(_name_cache) >= max_size:
+                _name_cache.popitem(last=False)
+        else:
+            _name_cache_stats['hits'] += 1
+
+        _name_cache[key] = name
+
+        return name
+
+    return _wrapper
+
+
+def get_name_cache_stats():
+    """Return statistics on the index and constraint name cache.
+
+    Returns:
+        dict:
+        A dictionary containing the number of cache ``hits`` and ``misses``
+        for name lookups, and the current ``size`` of the cache.
+    """
+    return dict(_name_cache_stats,
+                size=len(_name_cache))
+
+
+def clear_name_cache():
+    """Clear the index and constraint name cache and its statistics."""
+    _name_cache.clear()
+    _name_cache_stats.update(hits=0, misses=0)
+
+
+@_cache_name
 def create_index_name(connection, table_name, field_names=[], col_names=[],
                       unique=False, suffix=''):
     """Return the name for an index for a field.
@@ -560,6 +665,7 @@ def create_index_name(connection, table_name, field_names=[], col_names=[],
                              connection.ops.max_name_length())
 
 
+@_cache_name
 def create_index_together_name(connection, table_name, field_names):
     """Return the name of an index for an index_together.
 
@@ -599,6 +705,7 @@ def create_index_together_name(connection, table_name, field_names):
         return truncate_name(index_name, connection.ops.max_name_length())
 
 
+@_cache_name
 def create_constraint_name(connection, r_col, col, r_table, table):
     """Return the name of a constraint.
 
@@ -692,12 +799,14 @@ def db_router_allows_migrate(database, app_label, model_cls):
 
 __all__ = [
     'atomic',
+    'clear_name_cache',
     'create_constraint_name',
     'create_index_name',
     'create_index_together_name',
     'digest',
     'db_router_allows_syncdb',
     'db_router_allows_migrate',
+    'get_name_cache_stats',
     'sql_add_constraints',
     'sql_delete_constraints',
     'sql_create',
@@ -3,6 +3,84 @@ from __future__ import unicode_literals
 from django.conf import settings
 
 
+_evolution_ops_classes = {}
+
+
+def get_evolution_operations_class(db_name):
+    """Return the evolution operations class for a database.
+
+    The backend module is looked up from the database's ``ENGINE`` setting
+    and imported the first time this is called for a database. The resulting
+    class is cached for the alias and engine, so later calls don't need to
+    resolve settings or imports again.
+
+    Args:
+        db_name (unicode):
+            The name of the database.
+
+    Returns:
+        type:
+        The :py:class:`~django_evolution.db.common.BaseEvolutionOperations`
+        subclass for the database.
+
+    Raises:
+        ImportError:
+            The database's backend is not supported.
+    """
+    engine = settings.DATABASES[db_name]['ENGINE']
+    key = (db_name, engine)
+
+    try:
+        return _evolution_ops_classes[key]
+    except KeyError:
+        pass
+
+    try:
+        module_name = ['django_evolution.db', engine.split('.')[-1]]
+        module = __import__('.'.join(module_name), {}, {}, [''])
+    except ImportError:
+        if hasattr(settings, 'DATABASE_ENGINE'):
+            module_name = ['django_evolution.db', settings.DATABASE_ENGINE]
+            module = __import__('.'.join(module_name), {}, {}, [''])
+        else:
+            raise
+
+    cls = module.EvolutionOperations
+    _evolution_ops_classes[key] = cls
+
+    return cls
+
+
+def get_evolution_operations(db_name, database_state=None):
+    """Return evolution operations for a database.
+
+    This is a lightweight alternative to :py:class:`EvolutionOperationsMulti`
+    for code that creates operations objects frequently, such as once per
+    model or mutation.
+
+    Args:
+        db_name (unicode):
+            The name of the database.
+
+        database_state (django_evolution.db.state.DatabaseState, optional):
+            The database state to track information through. If not
+            provided, an empty, unscanned state will be used.
+
+    Returns:
+        django_evolution.db.common.BaseEvolutionOperations:
+        The evolution operations for the database.
+    """
+    from django.db import connections
+
+    if database_state is None:
+        from django_evolution.db.state import DatabaseState
+        database_state = DatabaseState(db_name, scan=False)
+
+    cls = get_evolution_operations_class(db_name)
+
+    return cls(database_state, connections[db_name])
+
+
 class EvolutionOperationsMulti(object):
     def __init__(self, db_name, database_state=None):
         """Initialize the instance.
@@ -14,25 +92,7 @@ class EvolutionOperationsMulti(object):
             database_state (django_evolution.db.state.DatabaseState):
                 The database state to track information through.
         """
-        if database_state is None:
-            from django_evolution.db.state import DatabaseState
-            database_state = DatabaseState(db_name, scan=False)
-
-        try:
-            from django.db import connections
-            engine = settings.DATABASES[db_name]['ENGINE'].split('.')[-1]
-            connection = connections[db_name]
-            module_name = ['django_evolution.db', engine]
-            module = __import__('.'.join(module_name), {}, {}, [''])
-            self.evolver = module.EvolutionOperations(database_state,
-                                                      connection)
-        except ImportError:
-            if hasattr(settings, 'DATABASE_ENGINE'):
-                module_name = ['django_evolution.db', settings.DATABASE_ENGINE]
-                module = __import__('.'.join(module_name), {}, {}, [''])
-                self.evolver = module.EvolutionOperations(database_state)
-            else:
-                raise
+        self.evolver = get_evolution_operations(db_name, database_state)
 
     def get_evolver(self):
         return self.evolver
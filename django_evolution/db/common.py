@@ -2,12 +2,18 @@ from __future__ import unicode_literals
 
 import copy
 import logging
+import re
+import weakref
+from contextlib import contextmanager
 
 import django
+from django.conf import settings
 from django.db import connection as default_connection, models
+from django.db.models.fields import FieldDoesNotExist
 from django.utils import six
 
 from django_evolution import support
+from django_evolution.compat.datastructures import OrderedDict
 from django_evolution.compat.db import (create_index_name,
                                         create_index_together_name,
                                         sql_add_constraints,
@@ -18,8 +24,171 @@ from django_evolution.compat.db import (create_index_name,
                                         truncate_name)
 from django_evolution.compat.models import (get_remote_field,
                                             get_remote_field_model)
+from django_evolution.db.estimate import StatementCost
 from django_evolution.db.sql_result import AlterTableSQLResult, SQLResult
 from django_evolution.errors import EvolutionNotImplementedError
+from django_evolution.signals import backfilling_rows
+
+
+#: Cached column information for each database connection.
+#:
+#: This maps connections to dictionaries of cached values, which are keyed
+#: by a tuple starting with the kind of value (such as ``'db_type'``).
+_column_caches = weakref.WeakKeyDictionary()
+
+
+class BatchedUpdateSQL(object):
+    """A statement filling in a column's values in batches.
+
+    Rather than updating every row with one ``UPDATE``, this updates rows in
+    batches of primary key values, emitting
+    :py:data:`~django_evolution.signals.backfilling_rows` after each batch.
+    Each statement only locks and logs a bounded number of rows.
+
+    If this is executed outside of a transaction, each batch will be
+    committed as it's run.
+
+    When written out as SQL (such as for :command:`evolve --sql`), this is
+    represented by the equivalent single ``UPDATE``.
+    """
+
+    def __init__(self, evolver, table_name, pk_column, column, value_sql,
+                 params, null_only, batch_size, transactional=True):
+        """Initialize the statement.
+
+        Args:
+            evolver (BaseEvolutionOperations):
+                The evolution operations generating the SQL.
+
+            table_name (unicode):
+                The name of the table to update.
+
+            pk_column (unicode):
+                The name of the table's primary key column.
+
+            column (unicode):
+                The name of the column to fill in.
+
+            value_sql (unicode):
+                The SQL for the value to set.
+
+            params (tuple):
+                Parameters for any placeholders in ``value_sql``.
+
+            null_only (bool):
+                Whether only rows where the column is ``NULL`` are updated.
+
+            batch_size (int):
+                The number of primary key values to update per statement.
+
+            transactional (bool, optional):
+                Whether the statement must run in the evolution's
+                transaction.
+        """
+        qn = evolver.connection.ops.quote_name
+
+        self.evolver = evolver
+        self.table_name = table_name
+        self.pk_column = pk_column
+        self.column = column
+        self.params = params
+        self.batch_size = batch_size
+        self.transactional = transactional
+        self.sql = 'UPDATE %s SET %s = %s' % (qn(table_name), qn(column),
+                                              value_sql)
+
+        if null_only:
+            self.where = '%s IS NULL' % qn(column)
+        else:
+            self.where = None
+
+    def to_sql(self):
+        """Return the equivalent SQL for updating all rows at once.
+
+        Returns:
+            object:
+            The SQL statement, or a tuple of ``(statement, params)``.
+        """
+        if self.where:
+            sql = '%s WHERE %s;' % (self.sql, self.where)
+        else:
+            sql = '%s;' % self.sql
+
+        if self.params:
+            return sql, self.params
+        else:
+            return sql
+
+    def execute(self, cursor):
+        """Update the rows in batches.
+
+        Each batch covers the next :py:attr:`batch_size` primary keys of
+        rows to update, found by seeking past the last primary key of the
+        previous batch. Gaps in the primary keys don't result in empty
+        batches.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        qn = self.evolver.connection.ops.quote_name
+
+        cursor.execute('SELECT MIN(%s), MAX(%s) FROM %s;'
+                       % (qn(self.pk_column), qn(self.pk_column),
+                          qn(self.table_name)))
+        min_pk, max_pk = cursor.fetchone()
+
+        if min_pk is None:
+            return
+
+        # The remaining statements are all run with parameters, so any
+        # literal "%" characters need to be escaped.
+        if self.params:
+            sql = self.sql
+        else:
+            sql = self.sql.replace('%', '%%')
+
+        pk_column = qn(self.pk_column).replace('%', '%%')
+        table_name = qn(self.table_name).replace('%', '%%')
+
+        if self.where:
+            where = [self.where.replace('%', '%%')]
+        else:
+            where = []
+
+        rows_updated = 0
+        start = min_pk
+        start_op = '>='
+
+        while True:
+            conditions = ['%s %s %%s' % (pk_column, start_op)] + where
+
+            cursor.execute(
+                'SELECT MAX(%s) FROM (SELECT %s FROM %s WHERE %s'
+                ' ORDER BY %s LIMIT %d) batch;'
+                % (pk_column, pk_column, table_name, ' AND '.join(conditions),
+                   pk_column, self.batch_size),
+                (start,))
+            end = cursor.fetchone()[0]
+
+            if end is None:
+                break
+
+            cursor.execute(
+                '%s WHERE %s;'
+                % (sql, ' AND '.join(conditions +
+                                     ['%s <= %%s' % pk_column])),
+                tuple(self.params) + (start, end))
+            rows_updated += max(cursor.rowcount, 0)
+            start = end
+            start_op = '>'
+
+            backfilling_rows.send(sender=self.evolver,
+                                  table_name=self.table_name,
+                                  column_name=self.column,
+                                  rows_updated=rows_updated,
+                                  last_pk=end,
+                                  max_pk=max_pk)
 
 
 class BaseEvolutionOperations(object):
@@ -37,10 +206,65 @@ class BaseEvolutionOperations(object):
 
     supports_constraints = True
 
+    # Whether tables can be introspected over several connections at once.
+    supports_parallel_introspection = True
+
+    # Whether several statements without parameters can be executed at once
+    # by joining them into one script.
+    supports_statement_scripts = False
+
     mergeable_ops = (
         'add_column', 'change_column', 'delete_column', 'change_meta'
     )
 
+    # Aliases for column types, used to compare the types of columns in the
+    # database to the types of fields. Keys and values are normalized by
+    # normalize_column_type().
+    column_type_aliases = {}
+
+    # Pattern for the parts of a column type that are ignored when comparing
+    # types, such as lengths, precision, and trailing column options.
+    column_type_ignored_re = re.compile(
+        r'\s*\([^)]*\)|\s+(?:unsigned|auto_increment|check)\b.*$',
+        re.I | re.S)
+
+    # Patterns for classifying the cost of generated statements. Table
+    # names may be quoted using any backend's quoting style.
+    cost_create_index_re = re.compile(
+        r'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?'
+        r'\S+\s+ON\s+(?P<table>"[^"]+"|`[^`]+`|[\w.]+)',
+        re.I)
+    cost_insert_select_re = re.compile(
+        r'^\s*INSERT\s+INTO\s+(?P<dest>"[^"]+"|`[^`]+`|[\w.]+)'
+        r'.*?\bSELECT\b.*?\bFROM\s+(?P<source>"[^"]+"|`[^`]+`|[\w.]+)',
+        re.I | re.S)
+    cost_update_re = re.compile(
+        r'^\s*(?:UPDATE|DELETE\s+FROM)\s+(?P<table>"[^"]+"|`[^`]+`|[\w.]+)',
+        re.I)
+    cost_alter_table_re = re.compile(
+        r'^\s*ALTER\s+TABLE\s+(?:ONLY\s+)?'
+        r'(?P<table>"[^"]+"|`[^`]+`|[\w.]+)\s+(?P<changes>.*)$',
+        re.I | re.S)
+
+    # Patterns for ALTER TABLE changes, checked from the most expensive
+    # kind of work to the least.
+    cost_alter_table_change_res = [
+        (StatementCost.TABLE_REWRITE, re.compile(
+            r'(?:^|,)\s*(?:ALTER\s+COLUMN\s+\S+\s+(?:SET\s+DATA\s+)?TYPE|'
+            r'MODIFY|CHANGE)\b',
+            re.I)),
+        (StatementCost.INDEX_BUILD, re.compile(
+            r'(?:^|,)\s*ADD\s+(?:CONSTRAINT\s+\S+\s+)?'
+            r'(?:UNIQUE|PRIMARY\s+KEY|INDEX|KEY)\b',
+            re.I)),
+        (StatementCost.TABLE_SCAN, re.compile(
+            r'(?:^|,)\s*(?:ADD\s+(?:CONSTRAINT\s+\S+\s+)?'
+            r'(?:FOREIGN\s+KEY|CHECK)\b(?!.*\bNOT\s+VALID\b)|'
+            r'VALIDATE\s+CONSTRAINT\b|'
+            r'ALTER\s+COLUMN\s+\S+\s+SET\s+NOT\s+NULL\b)',
+            re.I | re.S)),
+    ]
+
     def __init__(self, database_state, connection=default_connection):
         """Initialize the evolution operations.
 
@@ -54,6 +278,131 @@ class BaseEvolutionOperations(object):
         self.database_state = database_state
         self.connection = connection
 
+    def get_column_cache(self):
+        """Return the cache of column information for the connection.
+
+        Backends can use this to store their own column definitions. Keys
+        should start with a backend-specific name, to avoid clashing with
+        other kinds of values.
+
+        Returns:
+            dict:
+            The cache for the connection.
+        """
+        try:
+            return _column_caches[self.connection]
+        except KeyError:
+            cache = {}
+            _column_caches[self.connection] = cache
+
+            return cache
+
+    def normalize_column_type(self, data_type):
+        """Return a column type normalized for comparison.
+
+        Lengths, precision, and trailing column options (such as
+        ``AUTO_INCREMENT`` or a ``CHECK`` constraint) are removed, the type
+        is lowercased, and any alias in :py:attr:`column_type_aliases` is
+        resolved. This allows the type of a column in the database to be
+        compared to the type of a field.
+
+        Args:
+            data_type (unicode):
+                The column type.
+
+        Returns:
+            unicode:
+            The normalized column type.
+        """
+        data_type = ' '.join(
+            self.column_type_ignored_re.sub('', data_type).lower().split())
+
+        return self.column_type_aliases.get(data_type, data_type)
+
+    def get_field_db_type(self, field):
+        """Return the database type for a field's column.
+
+        This is equivalent to calling the field's
+        :py:meth:`~django.db.models.Field.db_type`, but the result is cached
+        for the connection, keyed by the parts of the field's signature that
+        the type is computed from. Fields that can't be keyed reliably (such
+        as custom field types) are not cached.
+
+        Args:
+            field (django.db.models.Field):
+                The field.
+
+        Returns:
+            unicode:
+            The database type for the column, or ``None`` if the field has
+            no column (such as a
+            :py:class:`~django.db.models.ManyToManyField`).
+        """
+        key = self.get_field_db_type_key(field)
+
+        if key is None:
+            return field.db_type(connection=self.connection)
+
+        cache = self.get_column_cache()
+        key = ('db_type',) + key
+
+        try:
+            return cache[key]
+        except KeyError:
+            db_type = field.db_type(connection=self.connection)
+            cache[key] = db_type
+
+            return db_type
+
+    def get_field_db_type_key(self, field):
+        """Return a key for caching the database type of a field.
+
+        Only fields provided by Django are keyed. Their types are computed
+        from the field class and a handful of attributes, or from the field
+        they reference, in the case of foreign keys.
+
+        Args:
+            field (django.db.models.Field):
+                The field.
+
+        Returns:
+            tuple:
+            The key for the field's database type, or ``None`` if the type
+            can't be cached.
+        """
+        field_cls = type(field)
+
+        if not field_cls.__module__.startswith('django.db.models.'):
+            return None
+
+        if isinstance(field, models.ForeignKey):
+            remote_field = get_remote_field(field)
+
+            try:
+                target_field = (
+                    get_remote_field_model(remote_field)._meta
+                    .get_field(remote_field.field_name)
+                )
+            except (AttributeError, FieldDoesNotExist):
+                return None
+
+            target_key = self.get_field_db_type_key(target_field)
+
+            if target_key is None:
+                return None
+
+            return (field_cls, target_key)
+
+        # Older versions of Django include the column name in some types
+        # (such as in CHECK constraints), so it's part of the key.
+        return (
+            field_cls,
+            field.column,
+            getattr(field, 'max_length', None),
+            getattr(field, 'max_digits', None),
+            getattr(field, 'decimal_places', None),
+        )
+
     def generate_table_ops_sql(self, mutator, ops):
         """Generates SQL for a sequence of mutation operations.
 
@@ -77,10 +426,86 @@ class BaseEvolutionOperations(object):
         sql = []
 
         for sql_result in sql_results:
-            sql.extend(sql_result.to_sql())
+            sql.extend(sql_result.iter_sql())
 
         return sql
 
+    def schedule_table_ops(self, mutator, ops):
+        """Reorder a sequence of mutation operations for a table.
+
+        Operations that can be merged into the same ALTER TABLE statement
+        may be separated by operations that can't (such as column renames
+        or custom SQL), resulting in the table being altered several times.
+        This moves each mergeable operation ahead of any such operations
+        that don't involve the same fields, so that it can be merged with
+        the prior mergeable operations.
+
+        Mergeable operations are never reordered relative to each other, and
+        nothing is ever moved past an operation for custom SQL.
+
+        This can be turned off by setting
+        ``DJANGO_EVOLUTION_CONSOLIDATE_TABLE_OPS`` to ``False``.
+
+        Args:
+            mutator (django_evolution.mutators.ModelMutator):
+                The mutator for the model.
+
+            ops (list of dict):
+                The operations to schedule.
+
+        Returns:
+            tuple:
+            A tuple of the reordered list of operations and the number of
+            times the table would no longer need to be altered.
+        """
+        if not getattr(settings, 'DJANGO_EVOLUTION_CONSOLIDATE_TABLE_OPS',
+                       True):
+            return ops, 0
+
+        model = mutator.create_model()
+        scheduled_ops = []
+
+        for op in ops:
+            index = len(scheduled_ops)
+
+            if self.is_table_op_mergeable(model, op):
+                i = index
+
+                while i > 0:
+                    prev_op = scheduled_ops[i - 1]
+
+                    if self.is_table_op_mergeable(model, prev_op):
+                        index = i
+                        break
+                    elif not self._can_reorder_table_ops(prev_op, op):
+                        break
+
+                    i -= 1
+
+            scheduled_ops.insert(index, op)
+
+        num_saved = (self._get_table_op_batch_count(model, ops) -
+                     self._get_table_op_batch_count(model, scheduled_ops))
+
+        return scheduled_ops, num_saved
+
+    def is_table_op_mergeable(self, model, op):
+        """Return whether an operation can be merged with its neighbors.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+
+            op (dict):
+                The operation.
+
+        Returns:
+            bool:
+            ``True`` if the operation can be merged with adjacent mergeable
+            operations into a single change to the table.
+        """
+        return op['type'] in self.mergeable_ops
+
     def generate_table_op_sql(self, mutator, op, prev_sql_result, prev_op):
         """Generates SQL for a single mutation operation.
 
@@ -103,12 +528,18 @@ class BaseEvolutionOperations(object):
 
         if op_type == 'add_column':
             field = op['field']
-            sql_result.add(self.add_column(model, field, op['initial']))
+            sql_result.add(self.add_column(
+                model, field, op['initial'],
+                allow_non_atomic_backfill=op.get(
+                    'allow_non_atomic_backfill', False)))
             sql_result.add(self.create_index(model, field))
         elif op_type == 'change_column':
             sql_result.add(self.change_column_attrs(model, mutation,
                                                     op['field'].name,
                                                     op['new_attrs']))
+        elif op_type == 'rename_column':
+            sql_result.add(self.rename_column(model, op['old_field'],
+                                              op['new_field']))
         elif op_type == 'delete_column':
             sql_result.add(self.delete_column(model, op['field']))
         elif op_type == 'change_meta':
@@ -241,7 +672,29 @@ class BaseEvolutionOperations(object):
         """
         return sql_create_for_many_to_many_field(self.connection, model, field)
 
-    def add_column(self, model, f, initial):
+    def add_column(self, model, f, initial, allow_non_atomic_backfill=False):
+        """Returns the SQL for adding a column.
+
+        Args:
+            model (django.db.models.Model):
+                The model owning the column.
+
+            f (django.db.models.Field):
+                The field for the new column.
+
+            initial (object):
+                The initial value for the column, or a callable returning
+                the SQL for it.
+
+            allow_non_atomic_backfill (bool, optional):
+                Whether the initial value may be filled in after the
+                evolution's transaction has been committed. This is only
+                set if nothing later in the evolution involves the column.
+
+        Returns:
+            django_evolution.db.sql_result.AlterTableSQLResult:
+            The SQL for adding the column.
+        """
         qn = self.connection.ops.quote_name
         sql_result = AlterTableSQLResult(self, model)
         table_name = model._meta.db_table
@@ -268,7 +721,7 @@ class BaseEvolutionOperations(object):
                 {
                     'op': 'ADD COLUMN',
                     'column': f.column,
-                    'db_type': f.db_type(connection=self.connection),
+                    'db_type': self.get_field_db_type(f),
                     'params': constraints + [
                         'REFERENCES',
                         qn(related_table),
@@ -290,32 +743,58 @@ class BaseEvolutionOperations(object):
             # AddFieldInitialCallback which will shortly raise an exception.
             if initial is not None:
                 if callable(initial):
-                    sql_result.add_alter_table([
-                        {
-                            'op': 'ADD COLUMN',
-                            'column': f.column,
-                            'db_type': f.db_type(connection=self.connection),
-                            'params': [unique_constraints],
-                        }
-                    ])
-
-                    sql_result.add_sql([
-                        'UPDATE %s SET %s = %s WHERE %s IS NULL;'
-                        % (qn(table_name), qn(f.column),
-                           initial(), qn(f.column))
-                    ])
-
-                    if not f.null:
-                        # Only put this sql statement if the column cannot
-                        # be null.
-                        sql_result.add_sql(
-                            self.set_field_null(model, f, f.null))
+                    initial_sql = initial()
+
+                    if self.can_add_column_with_default_sql(model, f,
+                                                            initial_sql):
+                        # The initial value can be set through a default,
+                        # which will be dropped after, as below.
+                        sql_result.add_alter_table([
+                            {
+                                'op': 'ADD COLUMN',
+                                'column': f.column,
+                                'db_type': self.get_field_db_type(f),
+                                'params': [
+                                    null_constraints,
+                                    unique_constraints,
+                                    'DEFAULT',
+                                    initial_sql,
+                                ],
+                            }
+                        ])
+
+                        sql_result.add_post_sql([
+                            'ALTER TABLE %s ALTER COLUMN %s DROP DEFAULT;'
+                            % (qn(table_name), qn(f.column))
+                        ])
+                    else:
+                        sql_result.add_alter_table([
+                            {
+                                'op': 'ADD COLUMN',
+                                'column': f.column,
+                                'db_type': self.get_field_db_type(f),
+                                'params': [unique_constraints],
+                            }
+                        ])
+
+                        # If the column allows NULL values, the rows can be
+                        # filled in after the column has been added.
+                        sql_result.add_sql(self.get_backfill_sql(
+                            model, f, initial_sql,
+                            allow_non_atomic=(f.null and
+                                              allow_non_atomic_backfill)))
+
+                        if not f.null:
+                            # Only put this sql statement if the column
+                            # cannot be null.
+                            sql_result.add_sql(
+                                self.set_field_null(model, f, f.null))
                 else:
                     sql_result.add_alter_table([
                         {
                             'op': 'ADD COLUMN',
                             'column': f.column,
-                            'db_type': f.db_type(connection=self.connection),
+                            'db_type': self.get_field_db_type(f),
                             'params': [
                                 null_constraints,
                                 unique_constraints,
@@ -338,7 +817,7 @@ class BaseEvolutionOperations(object):
                     {
                         'op': 'ADD COLUMN',
                         'column': f.column,
-                        'db_type': f.db_type(connection=self.connection),
+                        'db_type': self.get_field_db_type(f),
                         'params': [null_constraints, unique_constraints],
                     }
                 ])
@@ -352,6 +831,191 @@ class BaseEvolutionOperations(object):
 
         return sql_result
 
+    def can_add_column_with_default_sql(self, model, field, initial_sql):
+        """Return whether a column can be filled in using a DEFAULT.
+
+        When adding a column with a callable initial value, the column is
+        normally added, filled in with an ``UPDATE`` of every row, and then
+        made ``NOT NULL`` if needed, since the SQL for the initial value
+        could reference other columns.
+
+        If this returns ``True``, the column will instead be added with the
+        initial value's SQL as its ``DEFAULT``, which is dropped afterward.
+        Backends that can do this without rewriting the table should
+        override this and return ``True`` for suitable SQL.
+
+        Args:
+            model (django.db.models.Model):
+                The model the column is being added to.
+
+            field (django.db.models.Field):
+                The field for the column.
+
+            initial_sql (unicode):
+                The SQL for the initial value.
+
+        Returns:
+            bool:
+            ``True`` if the column can be added with a ``DEFAULT``.
+        """
+        return False
+
+    def get_alter_table_statement(self, model, changes, params,
+                                  alter_table_items):
+        """Return an ALTER TABLE statement for a batch of changes.
+
+        Any options from :py:meth:`get_alter_table_options` will be appended
+        to the changes. Backends can override this to return a statement
+        object that controls how the statement is executed.
+
+        Args:
+            model (django.db.models.Model):
+                The model being altered.
+
+            changes (list of unicode):
+                The changes made by the statement.
+
+            params (list):
+                The parameters for the statement.
+
+            alter_table_items (list of dict):
+                The Alter Table operations making up the statement.
+
+        Returns:
+            object:
+            The SQL statement, or a tuple of ``(statement, params)``.
+        """
+        return self._make_alter_table_statement(
+            model,
+            changes + self.get_alter_table_options(model, alter_table_items),
+            params)
+
+    def _make_alter_table_statement(self, model, changes, params):
+        """Return the SQL for an ALTER TABLE statement.
+
+        Args:
+            model (django.db.models.Model):
+                The model being altered.
+
+            changes (list of unicode):
+                The changes and options for the statement.
+
+            params (list):
+                The parameters for the statement.
+
+        Returns:
+            object:
+            The SQL statement, or a tuple of ``(statement, params)``.
+        """
+        sql = ('ALTER TABLE %s %s;'
+               % (self.connection.ops.quote_name(model._meta.db_table),
+                  ', '.join(changes)))
+
+        if params:
+            return sql, params
+        else:
+            return sql
+
+    def get_alter_table_options(self, model, alter_table_items):
+        """Return extra options to append to an ALTER TABLE statement.
+
+        This is called for each batch of operations collapsed into a single
+        ALTER TABLE statement. Backends can override this to return clauses
+        (such as hints on how the table should be altered) based on the
+        operations in the batch.
+
+        Args:
+            model (django.db.models.Model):
+                The model being altered.
+
+            alter_table_items (list of dict):
+                The Alter Table operations making up the statement.
+
+        Returns:
+            list of unicode:
+            The options to append to the statement. By default, this is
+            empty.
+        """
+        return []
+
+    def get_backfill_sql(self, model, field, value_sql, params=(),
+                         null_only=True, allow_non_atomic=False):
+        """Return SQL for filling in a column's values.
+
+        By default, this is a single ``UPDATE`` of the table. If
+        ``settings.DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE`` is set, the rows
+        will instead be updated in batches of that many primary key values,
+        using :py:class:`BatchedUpdateSQL`.
+
+        If ``settings.DJANGO_EVOLUTION_BACKFILL_NON_ATOMIC`` is also
+        ``True`` and ``allow_non_atomic`` is set, the batches will be run
+        after the evolution's transaction has been committed, with each
+        batch committed separately. Only rows where the column is ``NULL``
+        are then updated, regardless of ``null_only``, so that values
+        written by the application after the commit aren't overwritten.
+
+        Args:
+            model (django.db.models.Model):
+                The model owning the column.
+
+            field (django.db.models.Field):
+                The field for the column.
+
+            value_sql (unicode):
+                The SQL for the value to set.
+
+            params (tuple, optional):
+                Parameters for any placeholders in ``value_sql``.
+
+            null_only (bool, optional):
+                Whether only rows where the column is ``NULL`` are updated.
+
+            allow_non_atomic (bool, optional):
+                Whether the rows may be filled in outside of the evolution's
+                transaction. This should only be set if the column will
+                allow ``NULL`` values once the evolution is applied.
+
+        Returns:
+            list:
+            The list of SQL statements.
+        """
+        batch_size = getattr(settings,
+                             'DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE',
+                             None)
+
+        if batch_size:
+            non_atomic = (
+                allow_non_atomic and
+                getattr(settings, 'DJANGO_EVOLUTION_BACKFILL_NON_ATOMIC',
+                        False))
+
+            return [
+                BatchedUpdateSQL(evolver=self,
+                                 table_name=model._meta.db_table,
+                                 pk_column=model._meta.pk.column,
+                                 column=field.column,
+                                 value_sql=value_sql,
+                                 params=params,
+                                 null_only=null_only or non_atomic,
+                                 batch_size=batch_size,
+                                 transactional=not non_atomic),
+            ]
+
+        qn = self.connection.ops.quote_name
+        sql = 'UPDATE %s SET %s = %s' % (qn(model._meta.db_table),
+                                         qn(field.column),
+                                         value_sql)
+
+        if null_only:
+            sql = '%s WHERE %s IS NULL;' % (sql, qn(field.column))
+        else:
+            sql = '%s;' % sql
+
+        if params:
+            return [(sql, params)]
+        else:
+            return [sql]
+
     def set_field_null(self, model, field, null):
         if null:
             attr = 'DROP NOT NULL'
@@ -610,27 +1274,15 @@ class BaseEvolutionOperations(object):
     def change_column_attr_null(self, model, mutation, field, old_value,
                                 new_value):
         """Returns the SQL for changing a column's NULL/NOT NULL attribute."""
-        qn = self.connection.ops.quote_name
         initial = mutation.initial
-        opts = model._meta
         pre_sql = []
 
         if not new_value and initial is not None:
-            sql_prefix = (
-                'UPDATE %(table_name)s SET %(column_name)s = %%s'
-                ' WHERE %(column_name)s IS NULL;'
-                % {
-                    'table_name': qn(opts.db_table),
-                    'column_name': qn(field.column),
-                }
-            )
-
             if callable(initial):
-                update_sql = sql_prefix % initial()
+                pre_sql += self.get_backfill_sql(model, field, initial())
             else:
-                update_sql = (sql_prefix, (initial,))
-
-            pre_sql.append(update_sql)
+                pre_sql += self.get_backfill_sql(model, field, '%s',
+                                                 params=(initial,))
 
         sql_result = self.set_field_null(model, field, new_value)
         sql_result.add_pre_sql(pre_sql)
@@ -644,7 +1296,7 @@ class BaseEvolutionOperations(object):
 
         qn = self.connection.ops.quote_name
         column = field.column
-        db_type = field.db_type(connection=self.connection)
+        db_type = self.get_field_db_type(field)
 
         return AlterTableSQLResult(
             self,
@@ -1034,7 +1686,202 @@ class BaseEvolutionOperations(object):
     def get_column_names_for_fields(self, fields):
         return [field.column for field in fields]
 
-    def get_indexes_for_table(self, table_name):
+    @contextmanager
+    def bulk_evolution(self):
+        """Prepare the database connection for applying evolutions.
+
+        This is used around the transaction applying all evolutions,
+        allowing backends to tune the connection for bulk schema and data
+        changes, and to restore their settings afterward.
+
+        By default, this does nothing.
+
+        Context:
+            The connection will be prepared for the evolution.
+        """
+        yield
+
+    @contextmanager
+    def lock_timeout(self):
+        """Limit how long statements wait on locks during the evolution.
+
+        This is used around all SQL executed for an evolution. Backends can
+        set a lock timeout on the connection, so that schema changes fail
+        quickly when blocked by other clients instead of queueing behind
+        them (and blocking everything queued after them), and restore the
+        previous timeout afterward.
+
+        By default, this does nothing.
+
+        Context:
+            The lock timeout will be set on the connection.
+        """
+        yield
+
+    def is_lock_timeout_error(self, e):
+        """Return whether an exception was caused by a lock timeout.
+
+        Statements failing for this reason may be retried by
+        :py:func:`~django_evolution.utils.execute_sql`.
+
+        By default, this always returns ``False``.
+
+        Args:
+            e (Exception):
+                The exception raised when executing a statement.
+
+        Returns:
+            bool:
+            ``True`` if the statement failed due to a lock timeout.
+        """
+        return False
+
+    def get_statement_cost(self, sql):
+        """Return the kind of work a SQL statement performs.
+
+        This classifies the statement as a metadata-only change, a table
+        scan, an index build, or a table rewrite, based on the statement's
+        SQL. Index builds and table rewrites are recognized from ``CREATE
+        INDEX``, ``INSERT ... SELECT``, ``UPDATE``, ``DELETE``, and
+        ``ALTER TABLE`` statements. Anything else is assumed to only change
+        metadata.
+
+        Backends can override :py:meth:`get_alter_table_cost_kind` to
+        classify ``ALTER TABLE`` statements based on what the database
+        actually does for them.
+
+        Args:
+            sql (unicode):
+                The SQL statement.
+
+        Returns:
+            django_evolution.db.estimate.StatementCost:
+            The cost of the statement, without a row count.
+        """
+        m = self.cost_create_index_re.match(sql)
+
+        if m:
+            return StatementCost(sql, StatementCost.INDEX_BUILD,
+                                 [self._unquote_name(m.group('table'))])
+
+        m = self.cost_insert_select_re.match(sql)
+
+        if m:
+            # Rows are copied from the source table, but if it doesn't exist
+            # yet (such as a temporary table created by the evolution), the
+            # destination's current size is the best estimate.
+            return StatementCost(sql, StatementCost.TABLE_REWRITE, [
+                self._unquote_name(m.group('source')),
+                self._unquote_name(m.group('dest')),
+            ])
+
+        m = self.cost_update_re.match(sql)
+
+        if m:
+            return StatementCost(sql, StatementCost.TABLE_REWRITE,
+                                 [self._unquote_name(m.group('table'))])
+
+        m = self.cost_alter_table_re.match(sql)
+
+        if m:
+            kind = self.get_alter_table_cost_kind(m.group('changes'))
+
+            if kind != StatementCost.METADATA:
+                return StatementCost(sql, kind,
+                                     [self._unquote_name(m.group('table'))])
+
+        return StatementCost(sql, StatementCost.METADATA)
+
+    def get_alter_table_cost_kind(self, changes):
+        """Return the kind of work performed by an ALTER TABLE statement.
+
+        Args:
+            changes (unicode):
+                The changes made by the statement, following the table name.
+
+        Returns:
+            unicode:
+            The kind of work, as one of the
+            :py:class:`~django_evolution.db.estimate.StatementCost` kinds.
+        """
+        for kind, regex in self.cost_alter_table_change_res:
+            if regex.search(changes):
+                return kind
+
+        return StatementCost.METADATA
+
+    def get_table_row_count(self, table_name, cursor=None):
+        """Return the estimated number of rows in a table.
+
+        By default, this counts the rows in the table, which is exact but
+        requires scanning the table. Backends should use catalog statistics
+        where possible.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor used for the lookup.
+
+        Returns:
+            int:
+            The estimated number of rows, or ``None`` if unknown.
+        """
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s;'
+                           % self.connection.ops.quote_name(table_name))
+
+            return cursor.fetchone()[0]
+
+    def _unquote_name(self, name):
+        """Return a table name with any quoting removed.
+
+        Args:
+            name (unicode):
+                The possibly-quoted name.
+
+        Returns:
+            unicode:
+            The unquoted name.
+        """
+        if len(name) > 1 and name[0] == name[-1] and name[0] in '"`':
+            return name[1:-1]
+
+        return name
+
+    @contextmanager
+    def introspection_session(self, cursor=None):
+        """Provide a cursor for a series of introspection queries.
+
+        This provides a single cursor that can be passed to the
+        ``get_*_for_table(s)`` methods, so that scanning many tables doesn't
+        open a new cursor for each one. The cursor is closed when the
+        session ends.
+
+        If an existing cursor is passed, it will be used as-is and left open,
+        allowing the introspection methods to take an optional cursor from
+        the caller.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                An existing cursor to use for the session.
+
+        Yields:
+            django.db.backends.util.CursorWrapper:
+            The cursor to use.
+        """
+        if cursor is not None:
+            yield cursor
+        else:
+            cursor = self.connection.cursor()
+
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def get_indexes_for_table(self, table_name, cursor=None):
         """Returns a dictionary of indexes from the database.
 
         This introspects the database to return a mapping of index names
@@ -1044,9 +1891,149 @@ class BaseEvolutionOperations(object):
             * unique -> whether it's a unique index
 
         This function must be implemented by subclasses.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
         """
         raise NotImplementedError
 
+    def get_columns_for_tables(self, table_names, cursor=None):
+        """Return the columns for a list of tables from the database.
+
+        This introspects the database to return a mapping of table names to
+        ordered dictionaries of column names and column information, with
+        the following keys:
+
+            * type -> the column's data type, as reported by the database
+            * null -> whether the column allows ``NULL`` values
+            * max_length -> the maximum length of values, or ``None``
+
+        This can be overridden by subclasses to fetch the information for
+        all tables at once. The default implementation uses Django's
+        introspection support one table at a time.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to column information.
+        """
+        introspection = self.connection.introspection
+        result = {}
+
+        with self.introspection_session(cursor) as cursor:
+            for table_name in table_names:
+                columns = OrderedDict()
+
+                for column_info in introspection.get_table_description(
+                        cursor, table_name):
+                    columns[column_info[0]] = {
+                        'type': six.text_type(column_info[1]),
+                        'null': bool(column_info[6]),
+                        'max_length': column_info[3],
+                    }
+
+                result[table_name] = columns
+
+        return result
+
+    def get_foreign_keys_for_tables(self, table_names, cursor=None):
+        """Return the foreign key constraints for a list of tables.
+
+        This introspects the database to return a mapping of table names to
+        dictionaries of constraint names and constraint information, with
+        the following keys:
+
+            * column -> the name of the constrained column
+            * to_table -> the name of the referenced table
+            * to_column -> the name of the referenced column
+            * validated -> whether existing rows have been validated against
+              the constraint (optional, defaulting to ``True``)
+
+        This can be overridden by subclasses to fetch the information for
+        all tables at once, and to report the real constraint names. The
+        default implementation uses Django's introspection support one
+        table at a time, naming each constraint after its column.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to foreign key information.
+        """
+        introspection = self.connection.introspection
+        result = {}
+
+        with self.introspection_session(cursor) as cursor:
+            for table_name in table_names:
+                try:
+                    key_columns = introspection.get_key_columns(cursor,
+                                                                table_name)
+                except NotImplementedError:
+                    key_columns = []
+
+                result[table_name] = dict(
+                    (column, {
+                        'column': column,
+                        'to_table': to_table,
+                        'to_column': to_column,
+                    })
+                    for column, to_table, to_column in key_columns
+                )
+
+        return result
+
+    def get_schema_fingerprint(self):
+        """Return a fingerprint representing the current database schema.
+
+        The fingerprint is used to validate cached database state. It must
+        change whenever tables, columns, indexes, or constraints are added,
+        removed, or altered, and must be cheap to compute compared to a full
+        introspection.
+
+        This can be overridden by subclasses. The default implementation
+        returns ``None``, which disables state caching for the database.
+
+        Returns:
+            unicode:
+            The schema fingerprint, or ``None`` if not supported.
+        """
+        return None
+
+    def get_server_version(self):
+        """Return the version of the database server.
+
+        The version is used to validate cached evolution SQL, since the SQL
+        generated for an evolution may depend on the features supported by
+        the server.
+
+        This can be overridden by subclasses. The default implementation
+        returns ``None``.
+
+        Returns:
+            object:
+            The server version, or ``None`` if unknown. This must have a
+            stable string representation.
+        """
+        return None
+
     def remove_field_constraints(self, field, opts, models, refs):
         """Return SQL for removing constraints on a field.
 
@@ -1142,3 +2129,149 @@ class BaseEvolutionOperations(object):
         """
         return (op1['type'] in self.mergeable_ops and
                 op2['type'] in self.mergeable_ops)
+
+    def _get_table_op_batch_count(self, model, ops):
+        """Return the number of times a table will be altered for operations.
+
+        Each run of adjacent mergeable operations counts once, and every
+        other operation counts on its own.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+
+            ops (list of dict):
+                The operations.
+
+        Returns:
+            int:
+            The number of times the table will be altered.
+        """
+        count = 0
+        prev_mergeable = False
+
+        for op in ops:
+            mergeable = self.is_table_op_mergeable(model, op)
+
+            if not (mergeable and prev_mergeable):
+                count += 1
+
+            prev_mergeable = mergeable
+
+        return count
+
+    def _can_reorder_table_ops(self, op1, op2):
+        """Return whether an operation can be moved ahead of another.
+
+        This is only possible if neither operation is for custom SQL, and
+        the operations don't involve any of the same fields.
+
+        Args:
+            op1 (dict):
+                The earlier operation.
+
+            op2 (dict):
+                The later operation, which would be moved ahead of ``op1``.
+
+        Returns:
+            bool:
+            ``True`` if ``op2`` can be performed before ``op1``.
+        """
+        names1 = self._get_table_op_field_names(op1)
+        names2 = self._get_table_op_field_names(op2)
+
+        return (names1 is not None and
+                names2 is not None and
+                not names1.intersection(names2))
+
+    def mark_deferrable_backfills(self, ops, later_ops=None):
+        """Mark which new columns may be filled in after the transaction.
+
+        A column's initial value can only be filled in after the
+        evolution's transaction has been committed if nothing later in the
+        evolution depends on the column's values (such as a change making
+        the column ``NOT NULL``). Each ``add_column`` operation is given an
+        ``allow_non_atomic_backfill`` key, which is ``True`` only if no
+        later operation involves the field.
+
+        Args:
+            ops (list of dict):
+                The operations for the model, in the order they'll be run.
+
+            later_ops (list of dict, optional):
+                Operations for the same model that will be run after
+                ``ops``. If ``None``, they can't be determined, and no
+                columns will be filled in after the transaction.
+        """
+        if later_ops is None:
+            later_names = None
+        else:
+            later_names = set()
+
+            for op in later_ops:
+                names = self._get_table_op_field_names(op)
+
+                if names is None:
+                    later_names = None
+                    break
+
+                later_names.update(names)
+
+        for op in reversed(ops):
+            names = self._get_table_op_field_names(op)
+
+            if op['type'] == 'add_column':
+                op['allow_non_atomic_backfill'] = (
+                    later_names is not None and
+                    later_names.isdisjoint(names))
+
+            if later_names is not None:
+                if names is None:
+                    later_names = None
+                else:
+                    later_names.update(names)
+
+    def _get_table_op_field_names(self, op):
+        """Return the names of the fields involved in an operation.
+
+        Args:
+            op (dict):
+                The operation.
+
+        Returns:
+            set of unicode:
+            The names and columns of the fields, or ``None`` if they can't
+            be determined for the operation.
+        """
+        op_type = op['type']
+
+        if op_type in ('add_column', 'change_column', 'delete_column'):
+            fields = [op['field']]
+        elif op_type == 'rename_column':
+            fields = [op['old_field'], op['new_field']]
+        elif op_type == 'change_meta':
+            names = set()
+
+            for value in (op['old_value'], op['new_value']):
+                for item in value or []:
+                    if isinstance(item, dict):
+                        item = item.get('fields', [])
+
+                    names.update(
+                        field_name.lstrip('-')
+                        for field_name in item
+                    )
+
+            return names
+        else:
+            return None
+
+        names = set()
+
+        for field in fields:
+            names.add(field.name)
+
+            if field.column:
+                names.add(field.column)
+
+        return names
@@ -0,0 +1,220 @@
+"""Estimation of the cost of evolution SQL statements."""
+
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext as _
+
+
+class StatementCost(object):
+    """The estimated cost of a SQL statement.
+
+    Statements are classified by the kind of work the database must do to
+    run them. Metadata-only changes are fast regardless of the size of the
+    table. Table scans, index builds, and table rewrites take time
+    proportional to the number of rows in the table.
+
+    Attributes:
+        kind (unicode):
+            The kind of work performed. This is one of :py:attr:`METADATA`,
+            :py:attr:`TABLE_SCAN`, :py:attr:`INDEX_BUILD`, or
+            :py:attr:`TABLE_REWRITE`.
+
+        row_count (int):
+            The estimated number of rows in the table, or ``None`` if
+            unknown (for instance, if the table will be created by the
+            evolution).
+
+        sql (unicode):
+            The SQL statement.
+
+        table_name (unicode):
+            The name of the table whose rows the statement works with, or
+            ``None`` if it doesn't work with any rows.
+
+        table_names (list of unicode):
+            The names of the tables the statement may work with, in order
+            of preference. The first that exists in the database will be
+            used for :py:attr:`table_name`.
+    """
+
+    #: The statement only changes the table's metadata.
+    METADATA = 'metadata'
+
+    #: The statement reads every row in the table, such as to validate a
+    #: constraint.
+    TABLE_SCAN = 'scan'
+
+    #: The statement builds an index over every row in the table.
+    INDEX_BUILD = 'index'
+
+    #: The statement writes every row in the table.
+    TABLE_REWRITE = 'rewrite'
+
+    #: The kinds of work, ordered from cheapest to most expensive.
+    KINDS = [METADATA, TABLE_SCAN, INDEX_BUILD, TABLE_REWRITE]
+
+    def __init__(self, sql, kind, table_names=None):
+        """Initialize the cost.
+
+        Args:
+            sql (unicode):
+                The SQL statement.
+
+            kind (unicode):
+                The kind of work performed.
+
+            table_names (list of unicode, optional):
+                The names of the tables the statement may work with, in
+                order of preference.
+        """
+        self.sql = sql
+        self.kind = kind
+        self.table_names = table_names or []
+        self.table_name = None
+        self.row_count = None
+
+    def __str__(self):
+        """Return a description of the cost.
+
+        Returns:
+            unicode:
+            The description.
+        """
+        if self.kind == self.METADATA:
+            return _('metadata only')
+
+        if self.kind == self.TABLE_SCAN:
+            description = _('table scan')
+        elif self.kind == self.INDEX_BUILD:
+            description = _('index build')
+        else:
+            description = _('table rewrite')
+
+        table_name = self.table_name or self.table_names[0]
+
+        if self.row_count is None:
+            return _('%(description)s of %(table)s (unknown rows)') % {
+                'description': description,
+                'table': table_name,
+            }
+        else:
+            return _('%(description)s of %(table)s (~%(rows)s rows)') % {
+                'description': description,
+                'table': table_name,
+                'rows': '{0:,}'.format(self.row_count),
+            }
+
+    def __repr__(self):
+        return '<StatementCost(kind=%r, table_name=%r, row_count=%r)>' % (
+            self.kind, self.table_name, self.row_count)
+
+
+class CostEstimator(object):
+    """Estimates the cost of SQL statements for a database.
+
+    Statements are classified by the database's evolution operations, and
+    annotated with the number of rows in the tables they work with, based
+    on the database's catalog statistics where available. Row counts are
+    looked up once per table.
+    """
+
+    def __init__(self, evolver):
+        """Initialize the estimator.
+
+        Args:
+            evolver (django_evolution.db.common.BaseEvolutionOperations):
+                The evolution operations for the database.
+        """
+        self.evolver = evolver
+        self._row_counts = {}
+        self._table_names = None
+
+    def estimate(self, sql):
+        """Estimate the cost of a list of SQL statements.
+
+        Args:
+            sql (list):
+                The list of SQL statements. Each entry can be a string, a
+                tuple of ``(statement, params)``, or a statement object.
+
+        Returns:
+            list of StatementCost:
+            The estimated cost of each statement.
+        """
+        evolver = self.evolver
+        costs = []
+
+        with evolver.introspection_session() as cursor:
+            if self._table_names is None:
+                self._table_names = set(
+                    evolver.connection.introspection.table_names())
+
+            for statement in sql:
+                if hasattr(statement, 'execute'):
+                    statement = statement.to_sql()
+
+                if isinstance(statement, tuple):
+                    statement = statement[0]
+
+                cost = evolver.get_statement_cost(statement)
+
+                for table_name in cost.table_names:
+                    if table_name in self._table_names:
+                        cost.table_name = table_name
+                        cost.row_count = self._get_row_count(table_name,
+                                                             cursor)
+                        break
+
+                costs.append(cost)
+
+        return costs
+
+    def _get_row_count(self, table_name, cursor):
+        """Return the estimated number of rows in a table.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper):
+                The cursor used for the lookup.
+
+        Returns:
+            int:
+            The estimated number of rows, or ``None`` if unknown.
+        """
+        try:
+            return self._row_counts[table_name]
+        except KeyError:
+            row_count = self.evolver.get_table_row_count(table_name,
+                                                         cursor=cursor)
+            self._row_counts[table_name] = row_count
+
+            return row_count
+
+
+def summarize_costs(costs):
+    """Return totals for a list of statement costs.
+
+    Args:
+        costs (list of StatementCost):
+            The statement costs to summarize.
+
+    Returns:
+        dict:
+        A dictionary mapping each kind of work to a tuple of the number of
+        statements and the total estimated number of rows. Rows for tables
+        with unknown sizes aren't counted.
+    """
+    totals = dict(
+        (kind, (0, 0))
+        for kind in StatementCost.KINDS
+    )
+
+    for cost in costs:
+        num_statements, num_rows = totals[cost.kind]
+        totals[cost.kind] = (num_statements + 1,
+                             num_rows + (cost.row_count or 0))
+
+    return totals
+
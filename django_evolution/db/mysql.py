@@ -1,16 +1,350 @@
 from __future__ import unicode_literals
 
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.core.management import color
 
+from django_evolution.compat.datastructures import OrderedDict
 from django_evolution.compat.db import sql_delete_constraints
 from django_evolution.compat.models import (get_rel_target_field,
                                             get_remote_field,
                                             get_remote_field_model)
 from django_evolution.db.common import BaseEvolutionOperations
+from django_evolution.db.estimate import StatementCost
 from django_evolution.db.sql_result import AlterTableSQLResult, SQLResult
+from django_evolution.errors import EvolutionNotImplementedError
+
+
+class InstantAlterTableSQL(object):
+    """An ALTER TABLE statement requesting ``ALGORITHM=INSTANT``.
+
+    Some tables can't be altered instantly, even when the operations
+    support it. This includes tables using ``ROW_FORMAT=COMPRESSED``, tables
+    with a ``FULLTEXT`` index, and tables that have reached the limit on row
+    versions. MySQL rejects the statement rather than falling back.
+
+    If this happens, the statement will be run again with
+    ``ALGORITHM=INPLACE, LOCK=NONE``.
+
+    When written out as SQL (such as for :command:`evolve --sql`), this is
+    represented by the ``ALGORITHM=INSTANT`` statement. As the statement
+    can't be represented as plain SQL, evolutions containing it won't be
+    stored in the SQL cache.
+    """
+
+    def __init__(self, evolver, sql, fallback_sql, params):
+        """Initialize the statement.
+
+        Args:
+            evolver (EvolutionOperations):
+                The evolution operations generating the SQL.
+
+            sql (unicode):
+                The ``ALGORITHM=INSTANT`` statement.
+
+            fallback_sql (unicode):
+                The ``ALGORITHM=INPLACE`` statement to run if the table
+                can't be altered instantly.
+
+            params (list):
+                The parameters for the statement.
+        """
+        self.evolver = evolver
+        self.sql = sql
+        self.fallback_sql = fallback_sql
+        self.params = params
+
+    def to_sql(self):
+        """Return the SQL for the instant statement.
+
+        Returns:
+            object:
+            The SQL statement, or a tuple of ``(statement, params)``.
+        """
+        if self.params:
+            return self.sql, self.params
+        else:
+            return self.sql
+
+    def execute(self, cursor):
+        """Alter the table.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        evolver = self.evolver
+        params = tuple(
+            evolver.normalize_value(param)
+            for param in self.params or []
+        )
+
+        try:
+            cursor.execute(self.sql, params)
+        except Exception as e:
+            if not evolver.is_alter_algorithm_error(e):
+                raise
+
+            cursor.execute(self.fallback_sql, params)
 
 
 class EvolutionOperations(BaseEvolutionOperations):
+    #: The ALTER TABLE algorithms, ordered from weakest to strongest.
+    alter_table_algorithms = ['COPY', 'INPLACE', 'INSTANT']
+
+    column_type_aliases = {
+        'bool': 'tinyint',
+        'boolean': 'tinyint',
+        'double precision': 'double',
+        'integer': 'int',
+        'numeric': 'decimal',
+    }
+
+    @property
+    def use_online_ddl(self):
+        """Whether ALTER TABLE statements should specify an algorithm.
+
+        This is controlled by the ``DJANGO_EVOLUTION_MYSQL_ONLINE_DDL``
+        setting. When enabled, each ALTER TABLE statement will request the
+        strongest algorithm (``INSTANT``, or ``INPLACE`` with ``LOCK=NONE``)
+        supported by all operations in the statement, so that MySQL fails
+        rather than silently locking or copying the table.
+        """
+        return getattr(settings, 'DJANGO_EVOLUTION_MYSQL_ONLINE_DDL', False)
+
+    @property
+    def use_strict_online_ddl(self):
+        """Whether ALTER TABLE statements must be performed online.
+
+        This is controlled by the ``DJANGO_EVOLUTION_MYSQL_ONLINE_DDL_STRICT``
+        setting. When enabled, generating SQL for an ALTER TABLE statement
+        that can't be performed without copying the table will fail.
+        """
+        return getattr(settings, 'DJANGO_EVOLUTION_MYSQL_ONLINE_DDL_STRICT',
+                       False)
+
+    @contextmanager
+    def lock_timeout(self):
+        """Limit how long statements wait on locks during the evolution.
+
+        If ``settings.DJANGO_EVOLUTION_MYSQL_LOCK_WAIT_TIMEOUT`` is set, the
+        session's ``lock_wait_timeout`` (used for metadata locks taken by
+        schema changes) and ``innodb_lock_wait_timeout`` (used for row
+        locks) will be set to this number of seconds for the evolution, and
+        restored afterward.
+
+        Context:
+            The lock wait timeouts will be set on the connection.
+        """
+        timeout = getattr(settings,
+                          'DJANGO_EVOLUTION_MYSQL_LOCK_WAIT_TIMEOUT', None)
+
+        if timeout is None:
+            yield
+            return
+
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute('SELECT @@SESSION.lock_wait_timeout,'
+                           '       @@SESSION.innodb_lock_wait_timeout;')
+            old_timeouts = list(cursor.fetchone())
+            cursor.execute('SET SESSION lock_wait_timeout = %s,'
+                           '            innodb_lock_wait_timeout = %s;',
+                           [int(timeout), int(timeout)])
+
+            try:
+                yield
+            finally:
+                cursor.execute('SET SESSION lock_wait_timeout = %s,'
+                               '            innodb_lock_wait_timeout = %s;',
+                               old_timeouts)
+        finally:
+            cursor.close()
+
+    def is_lock_timeout_error(self, e):
+        """Return whether an exception was caused by a lock timeout.
+
+        MySQL reports both metadata and row lock wait timeouts as error
+        1205 (``ER_LOCK_WAIT_TIMEOUT``). The failed statement is rolled
+        back, but the transaction is left intact.
+
+        Args:
+            e (Exception):
+                The exception raised when executing a statement.
+
+        Returns:
+            bool:
+            ``True`` if the statement failed with a lock wait timeout.
+        """
+        for error in (e, getattr(e, '__cause__', None)):
+            args = getattr(error, 'args', None)
+
+            if args and args[0] == 1205:
+                return True
+
+        return False
+
+    def is_alter_algorithm_error(self, e):
+        """Return whether an exception was caused by an unsupported algorithm.
+
+        MySQL reports an ``ALGORITHM`` that can't be used for a table as
+        error 1845 (``ER_ALTER_OPERATION_NOT_SUPPORTED``) or 1846
+        (``ER_ALTER_OPERATION_NOT_SUPPORTED_REASON``). The table is left
+        unchanged.
+
+        Args:
+            e (Exception):
+                The exception raised when executing a statement.
+
+        Returns:
+            bool:
+            ``True`` if the statement failed due to the requested algorithm.
+        """
+        for error in (e, getattr(e, '__cause__', None)):
+            args = getattr(error, 'args', None)
+
+            if args and args[0] in (1845, 1846):
+                return True
+
+        return False
+
+    def get_alter_table_statement(self, model, changes, params,
+                                  alter_table_items):
+        """Return an ALTER TABLE statement for a batch of changes.
+
+        If the statement requests ``ALGORITHM=INSTANT``, this will return a
+        :py:class:`InstantAlterTableSQL`, which falls back to
+        ``ALGORITHM=INPLACE, LOCK=NONE`` if the table can't be altered
+        instantly.
+
+        Args:
+            model (django.db.models.Model):
+                The model being altered.
+
+            changes (list of unicode):
+                The changes made by the statement.
+
+            params (list):
+                The parameters for the statement.
+
+            alter_table_items (list of dict):
+                The Alter Table operations making up the statement.
+
+        Returns:
+            object:
+            The SQL statement, a tuple of ``(statement, params)``, or a
+            statement object.
+        """
+        options = self.get_alter_table_options(model, alter_table_items)
+
+        if options != ['ALGORITHM=INSTANT']:
+            return self._make_alter_table_statement(model, changes + options,
+                                                    params)
+
+        sql = self._make_alter_table_statement(model, changes + options, [])
+        fallback_sql = self._make_alter_table_statement(
+            model,
+            changes + ['ALGORITHM=INPLACE', 'LOCK=NONE'],
+            [])
+
+        return InstantAlterTableSQL(self, sql, fallback_sql, params)
+
+    def get_alter_table_options(self, model, alter_table_items):
+        """Return the algorithm options for an ALTER TABLE statement.
+
+        If online DDL is enabled, this will return ``ALGORITHM=INSTANT`` if
+        all operations in the statement support it, or
+        ``ALGORITHM=INPLACE, LOCK=NONE`` if they can all be performed
+        in-place. Otherwise, no options will be returned, leaving it up to
+        MySQL, unless strict online DDL is enabled.
+
+        Args:
+            model (django.db.models.Model):
+                The model being altered.
+
+            alter_table_items (list of dict):
+                The Alter Table operations making up the statement.
+
+        Returns:
+            list of unicode:
+            The options to append to the statement.
+
+        Raises:
+            django_evolution.errors.EvolutionNotImplementedError:
+                Strict online DDL is enabled, and the statement would need
+                to copy the table.
+        """
+        if not (self.use_online_ddl or self.use_strict_online_ddl):
+            return []
+
+        algorithms = self.alter_table_algorithms
+        algorithm = algorithms[-1]
+
+        for item in alter_table_items:
+            item_algorithm = self.get_alter_table_item_algorithm(item)
+
+            if item_algorithm is None:
+                algorithm = None
+                break
+            elif (algorithms.index(item_algorithm) <
+                  algorithms.index(algorithm)):
+                algorithm = item_algorithm
+
+        if algorithm == 'INSTANT':
+            return ['ALGORITHM=INSTANT']
+        elif algorithm == 'INPLACE':
+            return ['ALGORITHM=INPLACE', 'LOCK=NONE']
+        elif self.use_strict_online_ddl:
+            raise EvolutionNotImplementedError(
+                'Altering table "%s" may require copying the table, which '
+                'is not allowed when DJANGO_EVOLUTION_MYSQL_ONLINE_DDL_STRICT '
+                'is set.'
+                % model._meta.db_table)
+        else:
+            return []
+
+    def get_alter_table_item_algorithm(self, item):
+        """Return the strongest algorithm supported for an operation.
+
+        Args:
+            item (dict):
+                The Alter Table operation.
+
+        Returns:
+            unicode:
+            The algorithm (``INSTANT``, ``INPLACE``, or ``COPY``), or
+            ``None`` if it isn't known.
+        """
+        if 'algorithm' in item:
+            return item['algorithm']
+
+        op = item.get('op', 'sql')
+        version = self.connection.mysql_version
+        is_mariadb = version >= (10,)
+
+        if op == 'ADD COLUMN':
+            params = item.get('params', [])
+
+            if 'UNIQUE' in params or 'PRIMARY KEY' in params:
+                # These also add an index, which must be built in-place.
+                return 'INPLACE'
+            elif ((is_mariadb and version >= (10, 3, 2)) or
+                  (not is_mariadb and version >= (8, 0, 12))):
+                return 'INSTANT'
+            else:
+                return 'INPLACE'
+        elif op == 'DROP COLUMN':
+            if ((is_mariadb and version >= (10, 4)) or
+                (not is_mariadb and version >= (8, 0, 29))):
+                return 'INSTANT'
+            else:
+                return 'INPLACE'
+
+        return None
+
     def delete_column(self, model, f):
         sql_result = AlterTableSQLResult(self, model)
 
@@ -34,7 +368,7 @@ class EvolutionOperations(BaseEvolutionOperations):
             # No Operation
             return []
 
-        col_type = new_field.db_type(connection=self.connection)
+        col_type = self.get_field_db_type(new_field)
 
         if col_type is None:
             # Skip ManyToManyFields, because they're not represented as
@@ -62,7 +396,7 @@ class EvolutionOperations(BaseEvolutionOperations):
     def _get_rename_column_sql(self, opts, old_field, new_field):
         qn = self.connection.ops.quote_name
         style = color.no_style()
-        col_type = new_field.db_type(connection=self.connection)
+        col_type = self.get_field_db_type(new_field)
         tablespace = new_field.db_tablespace or opts.db_tablespace
         alter_table_item = ''
 
@@ -109,7 +443,13 @@ class EvolutionOperations(BaseEvolutionOperations):
         alter_table_item += ('CHANGE COLUMN %s %s'
                              % (qn(old_field.column), ' '.join(field_output)))
 
-        return [{'sql': alter_table_item}]
+        alter_table_item = {'sql': alter_table_item}
+
+        if not old_field.primary_key:
+            # A rename that keeps the column definition can be done in-place.
+            alter_table_item['algorithm'] = 'INPLACE'
+
+        return [alter_table_item]
 
     def set_field_null(self, model, field, null):
         if null:
@@ -124,8 +464,9 @@ class EvolutionOperations(BaseEvolutionOperations):
                 {
                     'op': 'MODIFY COLUMN',
                     'column': field.column,
-                    'db_type': field.db_type(connection=self.connection),
+                    'db_type': self.get_field_db_type(field),
                     'params': [null_attr],
+                    'algorithm': 'INPLACE',
                 }
             ]
         )
@@ -136,7 +477,7 @@ class EvolutionOperations(BaseEvolutionOperations):
 
         field.max_length = new_value
 
-        db_type = field.db_type(connection=self.connection)
+        db_type = self.get_field_db_type(field)
         params = {
             'table': qn(model._meta.db_table),
             'column': qn(field.column),
@@ -156,6 +497,7 @@ class EvolutionOperations(BaseEvolutionOperations):
                     'op': 'MODIFY COLUMN',
                     'column': field.column,
                     'db_type': db_type,
+                    'algorithm': 'COPY',
                 },
             ]
         )
@@ -193,6 +535,74 @@ class EvolutionOperations(BaseEvolutionOperations):
             % (qn(old_db_tablename), qn(db_tablename))
         ])
 
+    def get_alter_table_cost_kind(self, changes):
+        """Return the kind of work performed by an ALTER TABLE statement.
+
+        Unless performed with ``ALGORITHM=INSTANT``, adding, dropping, or
+        changing columns and primary keys rebuilds the table, even when
+        performed in-place. Foreign keys are added without checking
+        existing rows, since constraint checks are disabled during the
+        evolution.
+
+        Args:
+            changes (unicode):
+                The changes made by the statement, following the table name.
+
+        Returns:
+            unicode:
+            The kind of work, as one of the
+            :py:class:`~django_evolution.db.estimate.StatementCost` kinds.
+        """
+        if re.search(r'\bALGORITHM\s*=\s*INSTANT\b', changes, re.I):
+            return StatementCost.METADATA
+
+        if re.search(r'(?:^|,)\s*(?:MODIFY|CHANGE|'
+                     r'(?:ADD|DROP)\s+(?:COLUMN\b|PRIMARY\s+KEY\b))',
+                     changes, re.I):
+            return StatementCost.TABLE_REWRITE
+
+        if re.search(r'(?:^|,)\s*ADD\s+(?:CONSTRAINT\s+\S+\s+)?'
+                     r'(?:UNIQUE|INDEX|KEY)\b',
+                     changes, re.I):
+            return StatementCost.INDEX_BUILD
+
+        return StatementCost.METADATA
+
+    def get_table_row_count(self, table_name, cursor=None):
+        """Return the estimated number of rows in a table.
+
+        This uses the row count in ``information_schema.TABLES``. For InnoDB
+        tables, this is an estimate based on sampled statistics. If the
+        count isn't available, the rows will be counted.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor used for the lookup.
+
+        Returns:
+            int:
+            The estimated number of rows, or ``None`` if unknown.
+        """
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS'
+                '  FROM information_schema.TABLES'
+                ' WHERE TABLE_SCHEMA = DATABASE() AND'
+                '       TABLE_NAME = %s;',
+                [table_name])
+            row = cursor.fetchone()
+
+            if row is None:
+                return None
+            elif row[0] is not None:
+                return int(row[0])
+
+            return super(EvolutionOperations, self).get_table_row_count(
+                table_name, cursor=cursor)
+
     def get_default_index_name(self, table_name, field):
         """Return a default index name for the database.
 
@@ -228,26 +638,184 @@ class EvolutionOperations(BaseEvolutionOperations):
         return super(EvolutionOperations, self).get_default_index_name(
             table_name, field)
 
-    def get_indexes_for_table(self, table_name):
-        cursor = self.connection.cursor()
-        qn = self.connection.ops.quote_name
+    def get_indexes_for_table(self, table_name, cursor=None):
         indexes = {}
 
-        try:
-            cursor.execute('SHOW INDEX FROM %s;' % qn(table_name))
-        except Exception:
-            return {}
-
-        for row in cursor.fetchall():
-            index_name = row[2]
-            col_name = row[4]
-
-            if index_name not in indexes:
-                indexes[index_name] = {
-                    'unique': not bool(row[1]),
-                    'columns': [],
+        with self.introspection_session(cursor) as cursor:
+            # This is used instead of SHOW INDEX so that the table name can
+            # be passed as a parameter, letting the statement be reused for
+            # every table in a scan.
+            cursor.execute(
+                "SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE"
+                "  FROM information_schema.STATISTICS"
+                " WHERE TABLE_SCHEMA = DATABASE() AND"
+                "       TABLE_NAME = %s"
+                " ORDER BY INDEX_NAME, SEQ_IN_INDEX;",
+                [table_name])
+
+            for row in cursor.fetchall():
+                index_name = row[0]
+                col_name = row[1]
+
+                if index_name not in indexes:
+                    indexes[index_name] = {
+                        'unique': not bool(row[2]),
+                        'columns': [],
+                    }
+
+                indexes[index_name]['columns'].append(col_name)
+
+        return indexes
+
+    def get_columns_for_tables(self, table_names, cursor=None):
+        """Return the columns for a list of tables from the database.
+
+        This fetches the columns for all tables in a single query against
+        ``information_schema``.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to column information.
+        """
+        result = dict(
+            (table_name, OrderedDict())
+            for table_name in table_names
+        )
+
+        if not table_names:
+            return result
+
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE,"
+                "       CHARACTER_MAXIMUM_LENGTH"
+                "  FROM information_schema.COLUMNS"
+                " WHERE TABLE_SCHEMA = DATABASE() AND"
+                "       TABLE_NAME IN %s"
+                " ORDER BY TABLE_NAME, ORDINAL_POSITION;",
+                [tuple(table_names)])
+
+            for row in cursor.fetchall():
+                result.setdefault(row[0], OrderedDict())[row[1]] = {
+                    'type': row[2],
+                    'null': row[3] == 'YES',
+                    'max_length': row[4],
                 }
 
-            indexes[index_name]['columns'].append(col_name)
+        return result
 
-        return indexes
+    def get_foreign_keys_for_tables(self, table_names, cursor=None):
+        """Return the foreign key constraints for a list of tables.
+
+        This fetches the constraints for all tables in a single query
+        against ``information_schema``.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to foreign key information.
+        """
+        result = dict(
+            (table_name, {})
+            for table_name in table_names
+        )
+
+        if not table_names:
+            return result
+
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,"
+                "       REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME"
+                "  FROM information_schema.KEY_COLUMN_USAGE"
+                " WHERE TABLE_SCHEMA = DATABASE() AND"
+                "       REFERENCED_TABLE_NAME IS NOT NULL AND"
+                "       TABLE_NAME IN %s;",
+                [tuple(table_names)])
+
+            for row in cursor.fetchall():
+                result.setdefault(row[0], {})[row[1]] = {
+                    'column': row[2],
+                    'to_table': row[3],
+                    'to_column': row[4],
+                }
+
+        return result
+
+    def get_schema_fingerprint(self):
+        """Return a fingerprint representing the current database schema.
+
+        This computes order-independent checksums over the tables, columns,
+        index columns, and foreign keys in the current database, as reported
+        by ``information_schema``. A table's creation time changes whenever
+        MySQL rebuilds it for an ``ALTER TABLE``.
+
+        Returns:
+            unicode:
+            The schema fingerprint.
+        """
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT COUNT(*),"
+                "       SUM(CRC32(CONCAT_WS(':', TABLE_NAME, CREATE_TIME)))"
+                "  FROM information_schema.TABLES"
+                " WHERE TABLE_SCHEMA = DATABASE();")
+            tables_row = cursor.fetchone()
+
+            cursor.execute(
+                "SELECT COUNT(*),"
+                "       SUM(CRC32(CONCAT_WS(':', TABLE_NAME, INDEX_NAME,"
+                "                           SEQ_IN_INDEX, COLUMN_NAME,"
+                "                           NON_UNIQUE)))"
+                "  FROM information_schema.STATISTICS"
+                " WHERE TABLE_SCHEMA = DATABASE();")
+            indexes_row = cursor.fetchone()
+
+            cursor.execute(
+                "SELECT COUNT(*),"
+                "       SUM(CRC32(CONCAT_WS(':', TABLE_NAME, COLUMN_NAME,"
+                "                           COLUMN_TYPE, IS_NULLABLE)))"
+                "  FROM information_schema.COLUMNS"
+                " WHERE TABLE_SCHEMA = DATABASE();")
+            columns_row = cursor.fetchone()
+
+            cursor.execute(
+                "SELECT COUNT(*),"
+                "       SUM(CRC32(CONCAT_WS(':', TABLE_NAME,"
+                "                           CONSTRAINT_NAME, COLUMN_NAME,"
+                "                           REFERENCED_TABLE_NAME,"
+                "                           REFERENCED_COLUMN_NAME)))"
+                "  FROM information_schema.KEY_COLUMN_USAGE"
+                " WHERE TABLE_SCHEMA = DATABASE();")
+            constraints_row = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        return '%s:%s/%s:%s/%s:%s/%s:%s' % (tables_row + indexes_row +
+                                            columns_row + constraints_row)
+
+    def get_server_version(self):
+        """Return the version of the MySQL or MariaDB server.
+
+        Returns:
+            tuple:
+            The server version.
+        """
+        return self.connection.mysql_version
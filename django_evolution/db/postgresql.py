@@ -1,13 +1,592 @@
 from __future__ import unicode_literals
 
+import re
+from contextlib import contextmanager
+
 import django
+from django.conf import settings
+from django.utils import six
 
-from django_evolution.compat.db import truncate_name
+from django_evolution.compat.datastructures import OrderedDict
+from django_evolution.compat.db import sql_add_constraints, truncate_name
+from django_evolution.compat.models import (get_remote_field,
+                                            get_remote_field_model)
 from django_evolution.db.common import BaseEvolutionOperations
-from django_evolution.db.sql_result import AlterTableSQLResult
+from django_evolution.db.estimate import StatementCost
+from django_evolution.db.sql_result import AlterTableSQLResult, SQLResult
+
+
+class ConcurrentIndexSQL(object):
+    """A statement creating or dropping an index concurrently.
+
+    ``CREATE INDEX CONCURRENTLY`` and ``DROP INDEX CONCURRENTLY`` don't block
+    writes to the table while they run, but can't be run inside a
+    transaction. These statements are marked as non-transactional, and are
+    executed by the evolver once the evolution's transaction has been
+    committed.
+
+    If a concurrent index build fails, PostgreSQL leaves behind an invalid
+    index. This will be dropped before the error is raised, and any invalid
+    index left by a previous failed build will be dropped before building.
+
+    If the statement is executed inside a transaction anyway, the
+    equivalent non-concurrent statement will be used. This is also the case
+    if a later statement in the evolution references the table or index,
+    in which case the statement must be run in the transaction.
+    """
+
+    #: Whether the statement can be run inside a transaction.
+    transactional = False
+
+    def __init__(self, evolver, sql, concurrent_sql, index_name, create,
+                 table_name=None):
+        """Initialize the statement.
+
+        Args:
+            evolver (EvolutionOperations):
+                The evolution operations generating the SQL.
+
+            sql (unicode):
+                The non-concurrent ``CREATE INDEX`` or ``DROP INDEX``
+                statement.
+
+            concurrent_sql (unicode):
+                The concurrent form of the statement.
+
+            index_name (unicode):
+                The name of the index being created or dropped.
+
+            create (bool):
+                Whether the index is being created, rather than dropped.
+
+            table_name (unicode, optional):
+                The name of the table the index is on, if known.
+        """
+        self.evolver = evolver
+        self.sql = sql
+        self.concurrent_sql = concurrent_sql
+        self.index_name = index_name
+        self.create = create
+        self.table_name = table_name
+        self.object_names = [
+            name
+            for name in (table_name, index_name)
+            if name
+        ]
+
+    def to_sql(self):
+        """Return the SQL for the concurrent statement.
+
+        Returns:
+            unicode:
+            The SQL statement.
+        """
+        return self.concurrent_sql
+
+    def execute(self, cursor):
+        """Create or drop the index.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        evolver = self.evolver
+
+        if evolver.connection.in_atomic_block:
+            cursor.execute(self.sql)
+        elif self.create:
+            evolver.drop_invalid_index(cursor, self.index_name)
+
+            try:
+                cursor.execute(self.concurrent_sql)
+            except Exception:
+                evolver.drop_invalid_index(cursor, self.index_name)
+                raise
+        else:
+            cursor.execute(self.concurrent_sql)
+
+
+class ValidateConstraintSQL(object):
+    """A statement validating a constraint added as ``NOT VALID``.
+
+    ``ALTER TABLE ... VALIDATE CONSTRAINT`` scans the table to check the
+    existing rows, but only takes a ``SHARE UPDATE EXCLUSIVE`` lock, which
+    doesn't block reads or writes. These statements are marked as
+    non-transactional, so that they're executed by the evolver once the
+    evolution's transaction (and the locks it holds) has been committed.
+
+    If a later statement in the evolution references the constraint, the
+    statement will be run in the transaction instead.
+    """
+
+    #: Whether the statement can be run inside a transaction.
+    transactional = False
+
+    def __init__(self, sql, table_name, constraint_name):
+        """Initialize the statement.
+
+        Args:
+            sql (unicode):
+                The ``VALIDATE CONSTRAINT`` statement.
+
+            table_name (unicode):
+                The name of the table the constraint is on.
+
+            constraint_name (unicode):
+                The name of the constraint being validated.
+        """
+        self.sql = sql
+        self.table_name = table_name
+        self.constraint_name = constraint_name
+        self.object_names = [constraint_name]
+
+    def to_sql(self):
+        """Return the SQL for the statement.
+
+        Returns:
+            unicode:
+            The SQL statement.
+        """
+        return self.sql
+
+    def execute(self, cursor):
+        """Validate the constraint.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        cursor.execute(self.sql)
 
 
 class EvolutionOperations(BaseEvolutionOperations):
+    supports_statement_scripts = True
+
+    column_type_aliases = {
+        'bigserial': 'bigint',
+        'character': 'char',
+        'character varying': 'varchar',
+        'serial': 'integer',
+        'smallserial': 'smallint',
+        'time': 'time without time zone',
+        'timestamp': 'timestamp without time zone',
+    }
+
+    # Patterns for index statements that can be run concurrently.
+    create_index_re = re.compile(
+        r'^(?P<prefix>\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+)'
+        r'(?P<name>"[^"]+"|\S+)\s+ON\s+(?:ONLY\s+)?'
+        r'(?P<table>"[^"]+"|[^\s(]+)',
+        re.I)
+    drop_index_re = re.compile(
+        r'^\s*DROP\s+INDEX\s+(?:IF\s+EXISTS\s+)?'
+        r'(?P<name>"[^"]+"|[^\s;]+)\s*;?\s*$',
+        re.I)
+
+    # Pattern for constraint statements that can be added as NOT VALID.
+    add_constraint_re = re.compile(
+        r'^\s*ALTER\s+TABLE\s+(?P<table>"[^"]+"|\S+)\s+'
+        r'ADD\s+CONSTRAINT\s+(?P<name>"[^"]+"|\S+)\s+'
+        r'(?:FOREIGN\s+KEY|CHECK)\b(?P<definition>.*?)\s*;?\s*$',
+        re.I | re.S)
+
+    # Literal values that can be used as a column's DEFAULT without
+    # evaluating anything per-row.
+    constant_sql_re = re.compile(
+        r"^\s*(?:[-+]?\d+(?:\.\d+)?|'(?:[^']|'')*'|TRUE|FALSE)\s*$",
+        re.I)
+
+    @property
+    def supports_fast_column_defaults(self):
+        """Whether columns with constant defaults can be added quickly.
+
+        PostgreSQL 11 and higher store a constant default for a new column
+        in the catalog when the column is added, rather than rewriting every
+        row in the table.
+        """
+        return self.connection.pg_version >= 110000
+
+    @property
+    def use_concurrent_indexes(self):
+        """Whether indexes are created and dropped concurrently.
+
+        Building an index normally blocks writes to the table until the
+        build finishes. If
+        ``settings.DJANGO_EVOLUTION_POSTGRES_CONCURRENT_INDEXES`` is
+        ``True``, indexes will instead be created and dropped using
+        ``CONCURRENTLY``, in a separate phase after the evolution's
+        transaction has been committed.
+        """
+        return getattr(settings,
+                       'DJANGO_EVOLUTION_POSTGRES_CONCURRENT_INDEXES',
+                       False)
+
+    @property
+    def use_not_valid_constraints(self):
+        """Whether constraints are added without validating existing rows.
+
+        Adding a foreign key or check constraint normally scans the table
+        while holding a lock that blocks writes. If
+        ``settings.DJANGO_EVOLUTION_POSTGRES_NOT_VALID_CONSTRAINTS`` is
+        ``True``, these constraints will instead be added as ``NOT VALID``
+        (which only applies to new rows), and then validated in a separate
+        phase after the evolution's transaction has been committed.
+        """
+        return getattr(settings,
+                       'DJANGO_EVOLUTION_POSTGRES_NOT_VALID_CONSTRAINTS',
+                       False)
+
+    @contextmanager
+    def lock_timeout(self):
+        """Limit how long statements wait on locks during the evolution.
+
+        Schema changes need an exclusive lock on the table. While waiting
+        for it, they block every other query on the table queued after them.
+        If ``settings.DJANGO_EVOLUTION_POSTGRES_LOCK_TIMEOUT`` is set, the
+        connection's ``lock_timeout`` will be set to this value (a number of
+        milliseconds, or a string with units, such as ``'5s'``), so that
+        these statements fail rather than wait indefinitely.
+
+        If already in a transaction, the timeout will only apply to that
+        transaction. Otherwise, the previous timeout will be restored
+        afterward.
+
+        Context:
+            The lock timeout will be set on the connection.
+        """
+        timeout = getattr(settings, 'DJANGO_EVOLUTION_POSTGRES_LOCK_TIMEOUT',
+                          None)
+
+        if timeout is None:
+            yield
+            return
+
+        in_transaction = self.connection.in_atomic_block
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute('SHOW lock_timeout;')
+            old_timeout = cursor.fetchone()[0]
+            cursor.execute("SELECT set_config('lock_timeout', %s, %s);",
+                           [six.text_type(timeout), in_transaction])
+
+            try:
+                yield
+            finally:
+                if not in_transaction:
+                    cursor.execute(
+                        "SELECT set_config('lock_timeout', %s, false);",
+                        [old_timeout])
+        finally:
+            cursor.close()
+
+    def is_lock_timeout_error(self, e):
+        """Return whether an exception was caused by a lock timeout.
+
+        Args:
+            e (Exception):
+                The exception raised when executing a statement.
+
+        Returns:
+            bool:
+            ``True`` if the statement failed with ``lock_not_available``.
+        """
+        for error in (e, getattr(e, '__cause__', None)):
+            if getattr(error, 'pgcode', None) == '55P03':
+                return True
+
+        return False
+
+    def can_add_column_with_default_sql(self, model, field, initial_sql):
+        """Return whether a column can be filled in using a DEFAULT.
+
+        On PostgreSQL 11 and higher, a column with a constant ``DEFAULT``
+        (and optionally ``NOT NULL``) can be added without rewriting the
+        table. If the initial value's SQL is a literal value, it will be
+        used as the default instead of updating every row.
+
+        Args:
+            model (django.db.models.Model):
+                The model the column is being added to.
+
+            field (django.db.models.Field):
+                The field for the column.
+
+            initial_sql (unicode):
+                The SQL for the initial value.
+
+        Returns:
+            bool:
+            ``True`` if the column can be added with a ``DEFAULT``.
+        """
+        return (self.supports_fast_column_defaults and
+                self.constant_sql_re.match(six.text_type(initial_sql))
+                is not None)
+
+    def add_column(self, model, f, initial, allow_non_atomic_backfill=False):
+        """Returns the SQL for adding a column.
+
+        If :py:attr:`use_not_valid_constraints` is set, a foreign key for
+        the column will be added as a separate ``NOT VALID`` constraint,
+        rather than as part of the column definition.
+        """
+        sql_result = super(EvolutionOperations, self).add_column(
+            model, f, initial,
+            allow_non_atomic_backfill=allow_non_atomic_backfill)
+        remote_field = get_remote_field(f)
+
+        if not (self.use_not_valid_constraints and remote_field):
+            return sql_result
+
+        for item in sql_result.alter_table:
+            params = item.get('params', [])
+
+            if (item.get('op') == 'ADD COLUMN' and
+                item.get('column') == f.column and
+                'REFERENCES' in params):
+                item['params'] = params[:params.index('REFERENCES')]
+
+                related_model = get_remote_field_model(remote_field)
+                sql_result.add_post_sql(self._make_not_valid_constraint_sql(
+                    sql_add_constraints(self.connection, related_model,
+                                        {related_model: [(model, f)]})))
+
+        return sql_result
+
+    def rename_table(self, model, old_db_tablename, db_tablename):
+        """Returns the SQL for renaming a table.
+
+        Foreign keys referencing the table will be re-added as ``NOT VALID``
+        if :py:attr:`use_not_valid_constraints` is set.
+        """
+        return self._make_not_valid_constraint_sql(
+            super(EvolutionOperations, self).rename_table(
+                model, old_db_tablename, db_tablename))
+
+    def add_primary_key_field_constraints(self, old_field, new_field, models,
+                                          refs):
+        """Returns the SQL for re-adding foreign keys to a primary key.
+
+        The foreign keys will be added as ``NOT VALID`` if
+        :py:attr:`use_not_valid_constraints` is set.
+        """
+        return self._make_not_valid_constraint_sql(
+            super(EvolutionOperations, self).add_primary_key_field_constraints(
+                old_field, new_field, models, refs))
+
+    def create_index(self, model, field):
+        """Returns the SQL for creating an index for a single field.
+
+        The index will be created concurrently if
+        :py:attr:`use_concurrent_indexes` is set.
+        """
+        return self._make_concurrent_index_sql(
+            super(EvolutionOperations, self).create_index(model, field))
+
+    def create_unique_index(self, model, index_name, fields):
+        """Returns the SQL for creating a unique index.
+
+        The index will be created concurrently if
+        :py:attr:`use_concurrent_indexes` is set.
+        """
+        return self._make_concurrent_index_sql(
+            super(EvolutionOperations, self).create_unique_index(
+                model, index_name, fields))
+
+    def get_drop_index_sql(self, model, index_name):
+        """Returns the SQL to drop an index.
+
+        The index will be dropped concurrently if
+        :py:attr:`use_concurrent_indexes` is set.
+        """
+        return self._make_concurrent_index_sql(
+            super(EvolutionOperations, self).get_drop_index_sql(
+                model, index_name))
+
+    def change_meta_index_together(self, model, old_index_together,
+                                   new_index_together):
+        """Change the index_together indexes of a table.
+
+        The indexes will be created and dropped concurrently if
+        :py:attr:`use_concurrent_indexes` is set.
+        """
+        return self._make_concurrent_index_sql(
+            super(EvolutionOperations, self).change_meta_index_together(
+                model, old_index_together, new_index_together))
+
+    def change_meta_indexes(self, model, old_indexes, new_indexes):
+        """Change the indexes of a table defined in a model's indexes list.
+
+        The indexes will be created and dropped concurrently if
+        :py:attr:`use_concurrent_indexes` is set.
+        """
+        return self._make_concurrent_index_sql(
+            super(EvolutionOperations, self).change_meta_indexes(
+                model, old_indexes, new_indexes))
+
+    def drop_invalid_index(self, cursor, index_name):
+        """Drop an index left invalid by a failed concurrent build.
+
+        Nothing will be dropped if there's no index with the given name, or
+        if the index is valid.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+
+            index_name (unicode):
+                The name of the index.
+        """
+        cursor.execute(
+            "SELECT 1"
+            "  FROM pg_catalog.pg_index ix"
+            "  JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid"
+            " WHERE NOT ix.indisvalid AND"
+            "       pg_catalog.pg_table_is_visible(i.oid) AND"
+            "       i.relname = %s;",
+            [index_name])
+
+        if cursor.fetchone():
+            cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS %s;'
+                           % self.connection.ops.quote_name(index_name))
+
+    def _make_concurrent_index_sql(self, sql_result):
+        """Convert index statements to run concurrently, if enabled.
+
+        Args:
+            sql_result (object):
+                The :py:class:`~django_evolution.db.sql_result.SQLResult`
+                or list of SQL statements to convert.
+
+        Returns:
+            object:
+            The converted SQL result or list of statements.
+        """
+        if not self.use_concurrent_indexes:
+            return sql_result
+
+        convert = self._make_concurrent_index_statement
+
+        if isinstance(sql_result, SQLResult):
+            sql_result.pre_sql = [convert(sql) for sql in sql_result.pre_sql]
+            sql_result.sql = [convert(sql) for sql in sql_result.sql]
+            sql_result.post_sql = [convert(sql)
+                                   for sql in sql_result.post_sql]
+        elif isinstance(sql_result, list):
+            sql_result = [convert(sql) for sql in sql_result]
+
+        return sql_result
+
+    def _make_concurrent_index_statement(self, sql):
+        """Return a concurrent form of a CREATE INDEX/DROP INDEX statement.
+
+        Args:
+            sql (object):
+                The SQL statement.
+
+        Returns:
+            object:
+            A :py:class:`ConcurrentIndexSQL` for the statement, or the
+            original statement if it isn't a plain index statement.
+        """
+        if not isinstance(sql, six.string_types):
+            return sql
+
+        m = self.create_index_re.match(sql)
+
+        if m:
+            prefix_end = m.end('prefix')
+
+            return ConcurrentIndexSQL(
+                self,
+                sql=sql,
+                concurrent_sql='%sCONCURRENTLY %s' % (sql[:prefix_end],
+                                                      sql[prefix_end:]),
+                index_name=m.group('name').strip('"'),
+                create=True,
+                table_name=m.group('table').strip('"'))
+
+        m = self.drop_index_re.match(sql)
+
+        if m:
+            return ConcurrentIndexSQL(
+                self,
+                sql=sql,
+                concurrent_sql=('DROP INDEX CONCURRENTLY IF EXISTS %s;'
+                                % m.group('name')),
+                index_name=m.group('name').strip('"'),
+                create=False)
+
+        return sql
+
+    def _make_not_valid_constraint_sql(self, sql_result):
+        """Convert constraint statements to skip validation, if enabled.
+
+        Each ``ADD CONSTRAINT`` statement for a foreign key or check
+        constraint will be given ``NOT VALID``, and followed by a
+        :py:class:`ValidateConstraintSQL` for the constraint.
+
+        Args:
+            sql_result (object):
+                The :py:class:`~django_evolution.db.sql_result.SQLResult`
+                or list of SQL statements to convert.
+
+        Returns:
+            object:
+            The converted SQL result or list of statements.
+        """
+        if not self.use_not_valid_constraints:
+            return sql_result
+
+        def _convert(statements):
+            new_statements = []
+
+            for sql in statements:
+                new_statements += self._make_not_valid_constraint_statements(
+                    sql)
+
+            return new_statements
+
+        if isinstance(sql_result, SQLResult):
+            sql_result.pre_sql = _convert(sql_result.pre_sql)
+            sql_result.sql = _convert(sql_result.sql)
+            sql_result.post_sql = _convert(sql_result.post_sql)
+        elif isinstance(sql_result, list):
+            sql_result = _convert(sql_result)
+
+        return sql_result
+
+    def _make_not_valid_constraint_statements(self, sql):
+        """Return statements adding a constraint as NOT VALID.
+
+        Args:
+            sql (object):
+                The SQL statement.
+
+        Returns:
+            list:
+            The ``NOT VALID`` form of the statement followed by a
+            :py:class:`ValidateConstraintSQL`, or a list containing only the
+            original statement if it doesn't add a suitable constraint.
+        """
+        if not isinstance(sql, six.string_types):
+            return [sql]
+
+        m = self.add_constraint_re.match(sql)
+
+        if not m or re.search(r'\bNOT\s+VALID\b', m.group('definition'),
+                              re.I):
+            return [sql]
+
+        return [
+            '%s NOT VALID;' % sql[:m.end('definition')],
+            ValidateConstraintSQL(
+                'ALTER TABLE %s VALIDATE CONSTRAINT %s;'
+                % (m.group('table'), m.group('name')),
+                table_name=m.group('table').strip('"'),
+                constraint_name=m.group('name').strip('"')),
+        ]
+
     def rename_column(self, model, old_field, new_field):
         if old_field.column == new_field.column:
             # No Operation
@@ -47,6 +626,73 @@ class EvolutionOperations(BaseEvolutionOperations):
             [{'sql': 'DROP CONSTRAINT %s' % qn(index_name)}]
         )
 
+    def get_alter_table_cost_kind(self, changes):
+        """Return the kind of work performed by an ALTER TABLE statement.
+
+        Prior to PostgreSQL 11, adding a column with a default value
+        rewrites the table to store the default in every row.
+
+        Args:
+            changes (unicode):
+                The changes made by the statement, following the table name.
+
+        Returns:
+            unicode:
+            The kind of work, as one of the
+            :py:class:`~django_evolution.db.estimate.StatementCost` kinds.
+        """
+        if (not self.supports_fast_column_defaults and
+            re.search(r'(?:^|,)\s*ADD\s+COLUMN\b.*?\bDEFAULT\b', changes,
+                      re.I | re.S)):
+            return StatementCost.TABLE_REWRITE
+
+        return super(EvolutionOperations, self).get_alter_table_cost_kind(
+            changes)
+
+    def get_table_row_count(self, table_name, cursor=None):
+        """Return the estimated number of rows in a table.
+
+        This uses the row and page counts recorded in ``pg_class`` by the
+        last ``VACUUM`` or ``ANALYZE``, scaled to the table's current size
+        on disk, in the same way as the query planner. If the table has
+        never been analyzed, the rows will be counted.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor used for the lookup.
+
+        Returns:
+            int:
+            The estimated number of rows, or ``None`` if unknown.
+        """
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT c.reltuples, c.relpages,"
+                "       pg_catalog.pg_relation_size(c.oid) /"
+                "       pg_catalog.current_setting('block_size')::integer"
+                "  FROM pg_catalog.pg_class c"
+                " WHERE c.relkind = 'r' AND"
+                "       pg_catalog.pg_table_is_visible(c.oid) AND"
+                "       c.relname = %s;",
+                [table_name])
+            row = cursor.fetchone()
+
+            if row is None:
+                return None
+
+            reltuples, relpages, cur_pages = row
+
+            if cur_pages == 0:
+                return 0
+            elif relpages > 0 and reltuples >= 0:
+                return int(round(reltuples / relpages * cur_pages))
+
+            return super(EvolutionOperations, self).get_table_row_count(
+                table_name, cursor=cursor)
+
     def get_default_index_name(self, table_name, field):
         """Return a default index name for the database.
 
@@ -84,38 +730,199 @@ class EvolutionOperations(BaseEvolutionOperations):
             return truncate_name(index_name,
                                  self.connection.ops.max_name_length())
 
-    def get_indexes_for_table(self, table_name):
-        cursor = self.connection.cursor()
+    def get_indexes_for_table(self, table_name, cursor=None):
         indexes = {}
 
-        cursor.execute(
-            "SELECT i.relname as index_name, a.attname as column_name,"
-            "       ix.indisunique"
-            "  FROM pg_catalog.pg_class t, pg_catalog.pg_class i,"
-            "       pg_catalog.pg_index ix, pg_catalog.pg_attribute a"
-            " WHERE t.oid = ix.indrelid AND"
-            "       i.oid = ix.indexrelid AND"
-            "       a.attrelid = t.oid AND"
-            "       a.attnum = ANY(ix.indkey) AND"
-            "       t.relkind = 'r' AND"
-            "       t.relname = %s"
-            " ORDER BY i.relname, a.attnum;",
-            [table_name])
-
-        for row in cursor.fetchall():
-            index_name = row[0]
-            col_name = row[1]
-
-            if index_name not in indexes:
-                indexes[index_name] = {
-                    'unique': row[2],
-                    'columns': []
-                }
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT i.relname as index_name, a.attname as column_name,"
+                "       ix.indisunique"
+                "  FROM pg_catalog.pg_class t, pg_catalog.pg_class i,"
+                "       pg_catalog.pg_index ix, pg_catalog.pg_attribute a"
+                " WHERE t.oid = ix.indrelid AND"
+                "       i.oid = ix.indexrelid AND"
+                "       a.attrelid = t.oid AND"
+                "       a.attnum = ANY(ix.indkey) AND"
+                "       t.relkind = 'r' AND"
+                "       t.relname = %s"
+                " ORDER BY i.relname, a.attnum;",
+                [table_name])
 
-            indexes[index_name]['columns'].append(col_name)
+            for row in cursor.fetchall():
+                index_name = row[0]
+                col_name = row[1]
+
+                if index_name not in indexes:
+                    indexes[index_name] = {
+                        'unique': row[2],
+                        'columns': []
+                    }
+
+                indexes[index_name]['columns'].append(col_name)
 
         return indexes
 
+    def get_columns_for_tables(self, table_names, cursor=None):
+        """Return the columns for a list of tables from the database.
+
+        This fetches the columns for all tables in a single query against
+        ``information_schema``.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to column information.
+        """
+        result = dict(
+            (table_name, OrderedDict())
+            for table_name in table_names
+        )
+
+        if not table_names:
+            return result
+
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT table_name, column_name, data_type, is_nullable,"
+                "       character_maximum_length"
+                "  FROM information_schema.columns"
+                " WHERE table_schema = ANY(current_schemas(false)) AND"
+                "       table_name = ANY(%s)"
+                " ORDER BY table_name, ordinal_position;",
+                [list(table_names)])
+
+            for row in cursor.fetchall():
+                result[row[0]][row[1]] = {
+                    'type': row[2],
+                    'null': row[3] == 'YES',
+                    'max_length': row[4],
+                }
+
+        return result
+
+    def get_foreign_keys_for_tables(self, table_names, cursor=None):
+        """Return the foreign key constraints for a list of tables.
+
+        This fetches the constraints for all tables in a single query
+        against ``pg_constraint``.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to foreign key information.
+        """
+        result = dict(
+            (table_name, {})
+            for table_name in table_names
+        )
+
+        if not table_names:
+            return result
+
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT t.relname, c.conname, a.attname, ft.relname,"
+                "       fa.attname, c.convalidated"
+                "  FROM pg_catalog.pg_constraint c"
+                "  JOIN pg_catalog.pg_class t ON t.oid = c.conrelid"
+                "  JOIN pg_catalog.pg_attribute a"
+                "    ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]"
+                "  JOIN pg_catalog.pg_class ft ON ft.oid = c.confrelid"
+                "  JOIN pg_catalog.pg_attribute fa"
+                "    ON fa.attrelid = c.confrelid AND"
+                "       fa.attnum = c.confkey[1]"
+                " WHERE c.contype = 'f' AND"
+                "       pg_catalog.pg_table_is_visible(t.oid) AND"
+                "       t.relname = ANY(%s);",
+                [list(table_names)])
+
+            for row in cursor.fetchall():
+                result[row[0]][row[1]] = {
+                    'column': row[2],
+                    'to_table': row[3],
+                    'to_column': row[4],
+                    'validated': row[5],
+                }
+
+        return result
+
+    def get_schema_fingerprint(self):
+        """Return a fingerprint representing the current database schema.
+
+        This hashes the OIDs and ``xmin`` transaction IDs of the catalog rows
+        for tables, indexes, columns, and constraints in the schemas on the
+        search path.
+        Any DDL touching those rows will assign a new ``xmin``.
+
+        Returns:
+            unicode:
+            The schema fingerprint.
+        """
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT md5(string_agg(f.entry, ',' ORDER BY f.entry))"
+                "  FROM ("
+                "    SELECT 'c' || c.oid::text || ':' || c.xmin::text"
+                "           AS entry"
+                "      FROM pg_catalog.pg_class c"
+                "      JOIN pg_catalog.pg_namespace n"
+                "        ON n.oid = c.relnamespace"
+                "     WHERE n.nspname = ANY(current_schemas(false))"
+                "    UNION ALL"
+                "    SELECT 'i' || ix.indexrelid::text || ':' ||"
+                "           ix.xmin::text"
+                "      FROM pg_catalog.pg_index ix"
+                "      JOIN pg_catalog.pg_class c ON c.oid = ix.indrelid"
+                "      JOIN pg_catalog.pg_namespace n"
+                "        ON n.oid = c.relnamespace"
+                "     WHERE n.nspname = ANY(current_schemas(false))"
+                "    UNION ALL"
+                "    SELECT 'a' || a.attrelid::text || '.' ||"
+                "           a.attnum::text || ':' || a.xmin::text"
+                "      FROM pg_catalog.pg_attribute a"
+                "      JOIN pg_catalog.pg_class c ON c.oid = a.attrelid"
+                "      JOIN pg_catalog.pg_namespace n"
+                "        ON n.oid = c.relnamespace"
+                "     WHERE n.nspname = ANY(current_schemas(false)) AND"
+                "           a.attnum > 0"
+                "    UNION ALL"
+                "    SELECT 'k' || co.oid::text || ':' || co.xmin::text"
+                "      FROM pg_catalog.pg_constraint co"
+                "      JOIN pg_catalog.pg_namespace n"
+                "        ON n.oid = co.connamespace"
+                "     WHERE n.nspname = ANY(current_schemas(false))"
+                "  ) AS f;")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        return row[0] or ''
+
+    def get_server_version(self):
+        """Return the version of the PostgreSQL server.
+
+        Returns:
+            int:
+            The server version, in PostgreSQL's numeric form.
+        """
+        return self.connection.pg_version
+
     def normalize_bool(self, value):
         if value:
             return True
@@ -0,0 +1,586 @@
+"""Caching of the SQL compiled for evolutions."""
+
+from __future__ import unicode_literals
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+from importlib import import_module
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils import six
+
+from django_evolution import VERSION
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.state import DatabaseState
+from django_evolution.mutations import SQLMutation
+from django_evolution.signature import (DEFAULT_SIGNATURE_VERSION,
+                                        AppSignature)
+from django_evolution.utils import EvolutionFileSQL
+
+
+def _json_default(value):
+    """Return a JSON-compatible representation of a class.
+
+    Signatures reference field classes, which are stored by import path.
+
+    Args:
+        value (object):
+            The value that couldn't otherwise be serialized.
+
+    Returns:
+        dict:
+        The serialized class.
+
+    Raises:
+        TypeError:
+            The value is not a class.
+    """
+    if isinstance(value, type):
+        return {
+            '__type__': '%s:%s' % (value.__module__,
+                                   getattr(value, '__qualname__',
+                                           value.__name__)),
+        }
+
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+def _json_object_hook(data):
+    """Load a class serialized by :py:func:`_json_default`.
+
+    Args:
+        data (dict):
+            The deserialized dictionary.
+
+    Returns:
+        object:
+        The class, if the dictionary represents one, or the dictionary.
+
+    Raises:
+        ValueError:
+            The class could not be found.
+    """
+    if len(data) == 1 and '__type__' in data:
+        module_name, class_path = data['__type__'].split(':', 1)
+
+        try:
+            value = import_module(module_name)
+
+            for name in class_path.split('.'):
+                value = getattr(value, name)
+        except (AttributeError, ImportError) as e:
+            raise ValueError('Unable to load class "%s": %s'
+                             % (data['__type__'], e))
+
+        return value
+
+    return data
+
+
+class CompiledSQL(object):
+    """SQL and signature changes compiled for an app's mutations.
+
+    Attributes:
+        app_sigs (list of django_evolution.signature.AppSignature):
+            The application signatures changed by simulating the mutations.
+
+        can_simulate (bool):
+            Whether the mutations could be simulated.
+
+        database_state_changes (dict):
+            The changes to tables in the database state made while
+            generating the SQL, from
+            :py:meth:`DatabaseState.get_table_changes()
+            <django_evolution.db.state.DatabaseState.get_table_changes>`.
+
+        deleted_app_ids (list of unicode):
+            The IDs of application signatures removed by simulating the
+            mutations.
+
+        sql (list):
+            The SQL statements for the mutations.
+
+        table_rewrites_saved (int):
+            The number of table rewrites saved by reordering operations.
+    """
+
+    def __init__(self, sql, can_simulate, table_rewrites_saved, app_sigs,
+                 deleted_app_ids, database_state_changes):
+        """Initialize the compiled SQL.
+
+        Args:
+            sql (list):
+                The SQL statements for the mutations.
+
+            can_simulate (bool):
+                Whether the mutations could be simulated.
+
+            table_rewrites_saved (int):
+                The number of table rewrites saved by reordering operations.
+
+            app_sigs (list of django_evolution.signature.AppSignature):
+                The application signatures changed by simulating the
+                mutations.
+
+            deleted_app_ids (list of unicode):
+                The IDs of application signatures removed by simulating the
+                mutations.
+
+            database_state_changes (dict):
+                The changes to tables in the database state made while
+                generating the SQL.
+        """
+        self.sql = sql
+        self.can_simulate = can_simulate
+        self.table_rewrites_saved = table_rewrites_saved
+        self.app_sigs = app_sigs
+        self.deleted_app_ids = deleted_app_ids
+        self.database_state_changes = database_state_changes
+
+    def apply_to_project_sig(self, project_sig):
+        """Apply the recorded signature changes to a project signature.
+
+        This brings the project signature to the state it would be in after
+        simulating the mutations.
+
+        Args:
+            project_sig (django_evolution.signature.ProjectSignature):
+                The project signature to modify.
+        """
+        for app_id in self.deleted_app_ids:
+            project_sig.remove_app_sig(app_id)
+
+        for app_sig in self.app_sigs:
+            project_sig.add_app_sig(app_sig)
+
+    def apply_to_database_state(self, database_state):
+        """Apply the recorded table changes to a database state.
+
+        This brings the database state to the state it would be in after
+        generating the SQL.
+
+        Args:
+            database_state (django_evolution.db.state.DatabaseState):
+                The database state to modify.
+        """
+        database_state.apply_table_changes(self.database_state_changes)
+
+
+class CompiledSQLCache(object):
+    """A cache of the SQL compiled for evolving apps.
+
+    If the ``DJANGO_EVOLUTION_SQL_CACHE_DIR`` setting points to a directory,
+    the SQL generated for an app's pending mutations, along with the
+    resulting signature and database state changes, will be stored there.
+    Later runs (such as ``evolve --sql`` followed by ``evolve --execute``)
+    can then reuse the SQL instead of generating it again.
+
+    Entries are keyed by a hash of the app's starting signature, the
+    mutations (including the contents of any SQL files), the database's
+    schema fingerprint, the database server version, and the Django
+    Evolution settings. A change to any of these results in a new key, so
+    entries never need to be invalidated. Stale entries can be removed by
+    clearing the directory.
+
+    Only SQL consisting of plain statements, parameterized statements, and
+    SQL evolution files is cached. Mutations producing other statement
+    objects are always compiled. Caching is also disabled for backends that
+    can't compute a schema fingerprint.
+    """
+
+    #: The version of the format used for cache entries.
+    CACHE_FORMAT_VERSION = 2
+
+    def __init__(self, database_name):
+        """Initialize the cache.
+
+        This will compute the parts of the cache key shared by all entries,
+        including the schema fingerprint of the database.
+
+        Args:
+            database_name (unicode):
+                The name of the database being evolved.
+        """
+        self.database_name = database_name
+        self.cache_dir = getattr(settings, 'DJANGO_EVOLUTION_SQL_CACHE_DIR',
+                                 None)
+        self._base_key = None
+
+        if self.cache_dir:
+            self._base_key = self._get_base_key()
+
+    def get_key(self, app_label, project_sig, mutations):
+        """Return the cache key for an app's mutations.
+
+        Args:
+            app_label (unicode):
+                The label of the app being evolved.
+
+            project_sig (django_evolution.signature.ProjectSignature):
+                The project signature before the mutations are applied.
+
+            mutations (list of django_evolution.mutations.BaseMutation):
+                The mutations to apply.
+
+        Returns:
+            unicode:
+            The cache key, or ``None`` if the SQL for these mutations can't
+            be cached.
+        """
+        if self._base_key is None:
+            return None
+
+        mutation_keys = []
+
+        for mutation in mutations:
+            mutation_key = self._get_mutation_key(mutation)
+
+            if mutation_key is None:
+                return None
+
+            mutation_keys.append(mutation_key)
+
+        try:
+            key = json.dumps([self._base_key, app_label,
+                              project_sig.serialize(), mutation_keys],
+                             sort_keys=True,
+                             default=_json_default)
+        except (TypeError, ValueError):
+            return None
+
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """Load compiled SQL from the cache.
+
+        Args:
+            key (unicode):
+                The cache key.
+
+        Returns:
+            CompiledSQL:
+            The compiled SQL, or ``None`` if there's no valid entry for the
+            key.
+        """
+        cache_path = self._get_cache_path(key)
+
+        try:
+            with open(cache_path, 'r') as fp:
+                data = json.load(fp, object_hook=_json_object_hook)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if (not isinstance(data, dict) or
+            data.get('version') != self.CACHE_FORMAT_VERSION or
+            data.get('key') != key):
+            return None
+
+        try:
+            sig_version = data['sig_version']
+            database_state_changes = data['database_state_changes']
+
+            # Make sure the table changes can be applied later.
+            DatabaseState(db_name=self.database_name, scan=False) \
+                .apply_table_changes(database_state_changes)
+
+            return CompiledSQL(
+                sql=[
+                    self._deserialize_statement(statement)
+                    for statement in data['sql']
+                ],
+                can_simulate=data['can_simulate'],
+                table_rewrites_saved=data['table_rewrites_saved'],
+                app_sigs=[
+                    AppSignature.deserialize(app_id=app_id,
+                                             app_sig_dict=app_sig_dict,
+                                             sig_version=sig_version)
+                    for app_id, app_sig_dict in data['app_sigs']
+                ],
+                deleted_app_ids=data['deleted_app_ids'],
+                database_state_changes=database_state_changes)
+        except (AssertionError, KeyError, TypeError, ValueError) as e:
+            logging.warning('Ignoring invalid SQL cache entry "%s": %s',
+                            cache_path, e)
+            return None
+
+    def save(self, key, sql, can_simulate, table_rewrites_saved,
+             old_project_sig, new_project_sig, old_database_state,
+             new_database_state):
+        """Save compiled SQL to the cache.
+
+        If any of the SQL or signature changes can't be stored, nothing will
+        be saved.
+
+        The entry is written to a temporary location and then moved into
+        place, so that concurrent readers never see a partial file.
+
+        Args:
+            key (unicode):
+                The cache key.
+
+            sql (list):
+                The SQL statements for the mutations.
+
+            can_simulate (bool):
+                Whether the mutations could be simulated.
+
+            table_rewrites_saved (int):
+                The number of table rewrites saved by reordering operations.
+
+            old_project_sig (django_evolution.signature.ProjectSignature):
+                The project signature before the mutations were simulated.
+
+            new_project_sig (django_evolution.signature.ProjectSignature):
+                The project signature after the mutations were simulated.
+
+            old_database_state (django_evolution.db.state.DatabaseState):
+                The database state before the SQL was generated.
+
+            new_database_state (django_evolution.db.state.DatabaseState):
+                The database state after the SQL was generated.
+        """
+        serialized_sql = []
+
+        for statement in sql:
+            serialized_statement = self._serialize_statement(statement)
+
+            if serialized_statement is None:
+                return
+
+            serialized_sql.append(serialized_statement)
+
+        sig_version = DEFAULT_SIGNATURE_VERSION
+        app_sigs = []
+
+        for app_sig in new_project_sig.app_sigs:
+            app_id = app_sig.app_id
+            old_app_sig = old_project_sig.get_app_sig(app_id)
+
+            if old_app_sig is None or old_app_sig != app_sig:
+                try:
+                    app_sig_dict = json.loads(
+                        json.dumps(app_sig.serialize(sig_version),
+                                   default=_json_default),
+                        object_hook=_json_object_hook)
+                except (TypeError, ValueError):
+                    return
+
+                # Only store signatures that will load back unchanged.
+                loaded_app_sig = AppSignature.deserialize(
+                    app_id=app_id,
+                    app_sig_dict=app_sig_dict,
+                    sig_version=sig_version)
+
+                if loaded_app_sig != app_sig:
+                    return
+
+                app_sigs.append([app_id, app_sig_dict])
+
+        data = {
+            'version': self.CACHE_FORMAT_VERSION,
+            'key': key,
+            'sql': serialized_sql,
+            'can_simulate': can_simulate,
+            'table_rewrites_saved': table_rewrites_saved,
+            'sig_version': sig_version,
+            'app_sigs': app_sigs,
+            'deleted_app_ids': [
+                app_sig.app_id
+                for app_sig in old_project_sig.app_sigs
+                if new_project_sig.get_app_sig(app_sig.app_id) is None
+            ],
+            'database_state_changes':
+                new_database_state.get_table_changes(old_database_state),
+        }
+
+        cache_path = self._get_cache_path(key)
+
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+
+            fd, temp_path = tempfile.mkstemp(prefix='.sql-',
+                                             dir=self.cache_dir)
+
+            try:
+                with os.fdopen(fd, 'w') as fp:
+                    json.dump(data, fp, default=_json_default)
+
+                if os.name == 'nt' and os.path.exists(cache_path):
+                    os.unlink(cache_path)
+
+                os.rename(temp_path, cache_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except (IOError, OSError) as e:
+            logging.warning('Unable to write SQL cache entry "%s": %s',
+                            cache_path, e)
+
+    def _get_base_key(self):
+        """Return the parts of the cache key shared by all entries.
+
+        Returns:
+            list:
+            The shared parts of the key, or ``None`` if caching isn't
+            supported for the database.
+        """
+        evolver = get_evolution_operations(self.database_name)
+        fingerprint = evolver.get_schema_fingerprint()
+
+        if fingerprint is None:
+            return None
+
+        settings_dict = connections[self.database_name].settings_dict
+
+        return [
+            self.CACHE_FORMAT_VERSION,
+            repr(VERSION),
+            django.get_version(),
+            self.database_name,
+            settings_dict.get('ENGINE'),
+            settings_dict.get('NAME'),
+            settings_dict.get('HOST'),
+            settings_dict.get('PORT'),
+            repr(evolver.get_server_version()),
+            fingerprint,
+            [
+                [name, repr(getattr(settings, name))]
+                for name in sorted(dir(settings))
+                if name.startswith('DJANGO_EVOLUTION_')
+            ],
+        ]
+
+    def _get_mutation_key(self, mutation):
+        """Return the part of the cache key for a mutation.
+
+        Args:
+            mutation (django_evolution.mutations.BaseMutation):
+                The mutation.
+
+        Returns:
+            list:
+            The key for the mutation, or ``None`` if it can't be cached.
+        """
+        mutation_cls = type(mutation)
+        key = [
+            '%s.%s' % (mutation_cls.__module__, mutation_cls.__name__),
+            mutation.generate_hint(),
+        ]
+
+        field_type = getattr(mutation, 'field_type', None)
+
+        if field_type is not None:
+            key.append('%s.%s' % (field_type.__module__, field_type.__name__))
+
+        if isinstance(mutation, SQLMutation):
+            sql = mutation.sql
+
+            if isinstance(sql, six.string_types):
+                sql = [sql]
+
+            for statement in sql:
+                if isinstance(statement, EvolutionFileSQL):
+                    try:
+                        with open(statement.filename, 'rb') as fp:
+                            file_hash = hashlib.sha1(fp.read()).hexdigest()
+                    except (IOError, OSError):
+                        return None
+
+                    key.append([statement.filename, file_hash])
+                else:
+                    statement = self._serialize_statement(statement)
+
+                    if statement is None:
+                        return None
+
+                    key.append(statement)
+
+            update_func = mutation.update_func
+
+            if callable(update_func):
+                try:
+                    source = inspect.getsource(update_func)
+                except (IOError, OSError, TypeError):
+                    return None
+
+                key.append(hashlib.sha1(source.encode('utf-8')).hexdigest())
+
+        return key
+
+    def _serialize_statement(self, statement):
+        """Serialize a SQL statement for storage.
+
+        Args:
+            statement (object):
+                The SQL statement.
+
+        Returns:
+            object:
+            The serialized statement, or ``None`` if it can't be stored.
+        """
+        if isinstance(statement, six.string_types):
+            return statement
+        elif isinstance(statement, EvolutionFileSQL):
+            return {
+                'file': statement.filename,
+            }
+        elif (isinstance(statement, tuple) and
+              len(statement) == 2 and
+              isinstance(statement[0], six.string_types) and
+              isinstance(statement[1], (list, tuple))):
+            params = list(statement[1])
+
+            for param in params:
+                if (param is not None and
+                    not isinstance(param, (six.string_types,
+                                           six.integer_types,
+                                           float))):
+                    return None
+
+            return [statement[0], params]
+
+        return None
+
+    def _deserialize_statement(self, data):
+        """Deserialize a stored SQL statement.
+
+        Args:
+            data (object):
+                The serialized statement.
+
+        Returns:
+            object:
+            The SQL statement.
+
+        Raises:
+            ValueError:
+                The serialized statement was invalid.
+        """
+        if isinstance(data, six.string_types):
+            return data
+        elif isinstance(data, dict):
+            return EvolutionFileSQL(data['file'])
+        elif isinstance(data, list) and len(data) == 2:
+            return (data[0], data[1])
+
+        raise ValueError('Unknown SQL statement %r' % (data,))
+
+    def _get_cache_path(self, key):
+        """Return the path to the cache file for a key.
+
+        Args:
+            key (unicode):
+                The cache key.
+
+        Returns:
+            unicode:
+            The path to the cache file.
+        """
+        return os.path.join(self.cache_dir, 'sql-%s.json' % key)
@@ -75,9 +75,23 @@ class SQLResult(object):
         else:
             return sql_or_result or []
 
+    def iter_sql(self):
+        """Generate the SQL statements in the SQLResult.
+
+        This yields each of the ``pre_sql``, ``sql``, and ``post_sql``
+        statements in turn, without building a new list.
+
+        Yields:
+            object:
+            Each SQL statement.
+        """
+        for statements in (self.pre_sql, self.sql, self.post_sql):
+            for statement in statements:
+                yield statement
+
     def to_sql(self):
         """Flattens the SQLResult into a list of SQL statements."""
-        return self.pre_sql + self.sql + self.post_sql
+        return list(self.iter_sql())
 
     def __repr__(self):
         return ('<SQLResult: pre_sql=%r, sql=%r, post_sql=%r>'
@@ -121,35 +135,41 @@ class AlterTableSQLResult(SQLResult):
         """Adds a list of Alter Table rules to ``alter_table``."""
         self.alter_table += alter_table
 
-    def to_sql(self):
-        """Flattens the AlterTableSQLResult into a list of SQL statements.
+    def iter_sql(self):
+        """Generate the SQL statements in the AlterTableSQLResult.
 
         Any ``alter_table`` entries will be collapsed together into
-        ALTER TABLE statements.
+        ALTER TABLE statements, which are generated between the ``pre_sql``
+        and ``sql`` statements.
+
+        Yields:
+            object:
+            Each SQL statement.
         """
-        sql = []
-        sql += self.pre_sql
+        for statement in self.pre_sql:
+            yield statement
 
         if self.alter_table:
-            qn = self.evolver.connection.ops.quote_name
-            quoted_table_name = qn(self.model._meta.db_table)
             alter_table_batches = self._preprocess_alter_table_ops()
 
-            for statements, sql_params in alter_table_batches:
-                alter_table_sql = (
-                    'ALTER TABLE %s %s;'
-                    % (quoted_table_name, ', '.join(statements))
-                )
+            for statements, sql_params, items in alter_table_batches:
+                yield self.evolver.get_alter_table_statement(
+                    model=self.model,
+                    changes=statements,
+                    params=sql_params,
+                    alter_table_items=items)
 
-                if sql_params:
-                    sql.append((alter_table_sql, sql_params))
-                else:
-                    sql.append(alter_table_sql)
+        for statements in (self.sql, self.post_sql):
+            for statement in statements:
+                yield statement
 
-        sql += self.sql
-        sql += self.post_sql
+    def to_sql(self):
+        """Flattens the AlterTableSQLResult into a list of SQL statements.
 
-        return sql
+        Any ``alter_table`` entries will be collapsed together into
+        ALTER TABLE statements.
+        """
+        return list(self.iter_sql())
 
     def _preprocess_alter_table_ops(self):
         """Pre-processes Alter Table operations.
@@ -159,6 +179,12 @@ class AlterTableSQLResult(SQLResult):
 
         It will also split the Alter Table operations into batches,
         separated by operations setting independent=True.
+
+        Returns:
+            list of tuple:
+            A list of batches. Each batch is a tuple containing the list of
+            statements, the list of SQL parameters, and the list of
+            Alter Table items that make up the batch.
         """
         qn = self.evolver.connection.ops.quote_name
         new_alter_table_items = []
@@ -187,6 +213,11 @@ class AlterTableSQLResult(SQLResult):
                         prev_item.setdefault('sql_params', []).extend(
                             item['sql_params'])
 
+                    if prev_item.get('algorithm') != item.get('algorithm'):
+                        # The combined operation can no longer be assumed
+                        # to support the algorithm hinted by either one.
+                        prev_item.pop('algorithm', None)
+
                     # Skip adding this or setting the prev_op/prev_item.
                     continue
 
@@ -196,8 +227,10 @@ class AlterTableSQLResult(SQLResult):
 
         alter_table_statements = []
         alter_table_sql_params = []
+        alter_table_items = []
         alter_table_batches = [(alter_table_statements,
-                                alter_table_sql_params)]
+                                alter_table_sql_params,
+                                alter_table_items)]
 
         for item in new_alter_table_items:
             alter_table_attrs = []
@@ -209,8 +242,10 @@ class AlterTableSQLResult(SQLResult):
                 # alone, so break it up into its own batch.
                 alter_table_statements = []
                 alter_table_sql_params = []
+                alter_table_items = []
                 alter_table_batches.append((alter_table_statements,
-                                            alter_table_sql_params))
+                                            alter_table_sql_params,
+                                            alter_table_items))
 
             if op == 'sql':
                 alter_table_attrs.append(item['sql'])
@@ -231,6 +266,7 @@ class AlterTableSQLResult(SQLResult):
                     ])
 
             alter_table_statements.append(' '.join(alter_table_attrs))
+            alter_table_items.append(item)
 
             if 'sql_params' in item:
                 alter_table_sql_params.extend(item['sql_params'])
@@ -240,8 +276,10 @@ class AlterTableSQLResult(SQLResult):
                 # start a new batch for the next.
                 alter_table_statements = []
                 alter_table_sql_params = []
+                alter_table_items = []
                 alter_table_batches.append((alter_table_statements,
-                                            alter_table_sql_params))
+                                            alter_table_sql_params,
+                                            alter_table_items))
 
         # Filter out any batches that we are empty, and return the result.
         return [
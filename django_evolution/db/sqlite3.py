@@ -1,43 +1,859 @@
 from __future__ import unicode_literals
 
+import hashlib
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.db import models
+from django.utils import six
 
+from django_evolution.compat.datastructures import OrderedDict
 from django_evolution.compat.db import sql_indexes_for_model
 from django_evolution.compat.models import (get_remote_field,
                                             get_remote_field_model)
 from django_evolution.db.common import BaseEvolutionOperations, SQLResult
+from django_evolution.db.estimate import StatementCost
+from django_evolution.signals import copying_rows
 
 
 TEMP_TABLE_NAME = 'TEMP_TABLE'
 
+_MAX_LENGTH_RE = re.compile(r'\((\d+)\)')
+
+
+class ChunkedCopySQL(object):
+    """A statement copying rows between tables in chunks.
+
+    Rather than copying all rows with one ``INSERT ... SELECT``, this copies
+    rows in chunks ordered by ``rowid``, emitting
+    :py:data:`~django_evolution.signals.copying_rows` after each chunk.
+    Each statement only works with a bounded number of rows at a time,
+    keeping the memory and statement journal needed for each one small.
+
+    When written out as SQL (such as for :command:`evolve --sql`), this is
+    represented by the equivalent single ``INSERT ... SELECT``.
+    """
+
+    def __init__(self, evolver, dest_table_name, source_table_name,
+                 columns, values, params, chunk_size):
+        """Initialize the statement.
+
+        Args:
+            evolver (EvolutionOperations):
+                The evolution operations generating the SQL.
+
+            dest_table_name (unicode):
+                The name of the table to copy rows into.
+
+            source_table_name (unicode):
+                The name of the table to copy rows from.
+
+            columns (unicode):
+                The quoted, comma-separated column names to copy into.
+
+            values (unicode):
+                The comma-separated values to select for each column.
+
+            params (tuple):
+                Parameters for any placeholders in ``values``.
+
+            chunk_size (int):
+                The number of rows to copy per statement.
+        """
+        qn = evolver.connection.ops.quote_name
+
+        self.evolver = evolver
+        self.dest_table_name = dest_table_name
+        self.source_table_name = source_table_name
+        self.params = params
+        self.chunk_size = chunk_size
+        self.sql = ('INSERT INTO %s (%s) SELECT %s FROM %s'
+                    % (qn(dest_table_name), columns, values,
+                       qn(source_table_name)))
+
+    def to_sql(self):
+        """Return the equivalent SQL for copying all rows at once.
+
+        Returns:
+            object:
+            The SQL statement, or a tuple of ``(statement, params)``.
+        """
+        sql = '%s;' % self.sql
+
+        if self.params:
+            return sql, self.params
+        else:
+            return sql
+
+    def execute(self, cursor):
+        """Copy the rows in chunks.
+
+        Each chunk covers the next :py:attr:`chunk_size` rows, found by
+        seeking past the last ``rowid`` of the previous chunk. Gaps in the
+        ``rowid`` values don't result in empty chunks.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        qn = self.evolver.connection.ops.quote_name
+
+        cursor.execute('SELECT MIN(rowid), COUNT(*) FROM %s;'
+                       % qn(self.source_table_name))
+        min_rowid, total_rows = cursor.fetchone()
+
+        if not total_rows:
+            return
+
+        # The remaining statements are all run with parameters, so any
+        # literal "%" characters need to be escaped.
+        if self.params:
+            sql = self.sql
+        else:
+            sql = self.sql.replace('%', '%%')
+
+        source_table_name = qn(self.source_table_name).replace('%', '%%')
+        rows_copied = 0
+        start = min_rowid
+        start_op = '>='
+
+        while True:
+            condition = 'rowid %s %%s' % start_op
+
+            cursor.execute(
+                'SELECT MAX(rowid) FROM (SELECT rowid FROM %s WHERE %s'
+                ' ORDER BY rowid LIMIT %d) chunk;'
+                % (source_table_name, condition, self.chunk_size),
+                (start,))
+            end = cursor.fetchone()[0]
+
+            if end is None:
+                break
+
+            cursor.execute('%s WHERE %s AND rowid <= %%s;' % (sql, condition),
+                           tuple(self.params) + (start, end))
+            rows_copied += cursor.rowcount
+            start = end
+            start_op = '>'
+
+            copying_rows.send(sender=self.evolver,
+                              table_name=self.dest_table_name,
+                              rows_copied=rows_copied,
+                              total_rows=total_rows)
+
+
+class TableRebuild(object):
+    """A plan for rebuilding a table once for several column operations.
+
+    SQLite can't alter most aspects of a column, so each column operation
+    normally copies the whole table into a temporary table and back. When
+    several of these are made to the same table in a row, this collects them
+    instead, tracking where each column's data comes from in the original
+    table and which initial values need to be set. A single rebuild using
+    the final column layout is then generated.
+
+    Attributes:
+        sources (collections.OrderedDict):
+            A mapping of field names to the names of the columns in the
+            original table that hold their data. Newly-added fields map to
+            ``None``.
+
+        table_name (unicode):
+            The name of the table being rebuilt.
+
+        updates (list of tuple):
+            A list of ``(field_name, initial)`` for initial values to set
+            on the copied data, in order.
+    """
+
+    def __init__(self, evolver, model):
+        """Initialize the plan.
+
+        Args:
+            evolver (EvolutionOperations):
+                The evolution operations generating the SQL.
+
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+        """
+        self.evolver = evolver
+        self.table_name = model._meta.db_table
+        self.sources = OrderedDict(
+            (field.name, field.column)
+            for field in evolver.get_table_fields(model)
+        )
+        self.updates = []
+
+    def add_column(self, field, initial):
+        """Record the addition of a column.
+
+        Args:
+            field (django.db.models.Field):
+                The field being added.
+
+            initial (object):
+                The initial value for the column, or ``None``.
+        """
+        self.sources[field.name] = None
+        self.set_initial(field, initial)
+
+    def delete_column(self, field):
+        """Record the deletion of a column.
+
+        Args:
+            field (django.db.models.Field):
+                The field being deleted.
+        """
+        self.sources.pop(field.name, None)
+        self.updates = [
+            (field_name, initial)
+            for field_name, initial in self.updates
+            if field_name != field.name
+        ]
+
+    def rename_column(self, old_field, new_field):
+        """Record the renaming of a column.
+
+        Args:
+            old_field (django.db.models.Field):
+                The field being renamed.
+
+            new_field (django.db.models.Field):
+                The field with the new name.
+        """
+        old_name = old_field.name
+        new_name = new_field.name
+
+        if old_name != new_name:
+            self.sources[new_name] = self.sources.pop(old_name, None)
+            self.updates = [
+                (new_name if field_name == old_name else field_name, initial)
+                for field_name, initial in self.updates
+            ]
+
+    def set_initial(self, field, initial):
+        """Record an initial value to set for a column.
+
+        Args:
+            field (django.db.models.Field):
+                The field to set the value for.
+
+            initial (object):
+                The initial value for the column, or ``None``.
+        """
+        if initial is not None:
+            self.updates.append((field.name, initial))
+
+    def to_sql(self, model):
+        """Return SQL for rebuilding the table.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it is after all the operations.
+
+        Returns:
+            django_evolution.db.sql_result.SQLResult:
+            The SQL for the rebuild.
+        """
+        fields = self.evolver.get_table_fields(model)
+        fields_by_name = dict(
+            (field.name, field)
+            for field in fields
+        )
+
+        return self.evolver.get_rebuild_table_sql(
+            table_name=self.table_name,
+            fields=fields,
+            sources=self.sources,
+            initials=[
+                (fields_by_name[field_name], initial)
+                for field_name, initial in self.updates
+                if field_name in fields_by_name
+            ])
+
 
 class EvolutionOperations(BaseEvolutionOperations):
     supports_constraints = False
 
-    def delete_column(self, model, f):
-        field_list = [
-            field for field in model._meta.local_fields
-            # Remove the field to be deleted
-            if f.name != field.name
-            # and any Generic fields
-            and field.db_type(connection=self.connection) is not None
+    # Connections are cheap, but SQLite serializes access to the database
+    # file, and in-memory databases can't be shared between connections.
+    supports_parallel_introspection = False
+
+    # executescript() commits any open transaction before running the
+    # script, so statements can't be batched into scripts during an
+    # evolution.
+    supports_statement_scripts = False
+
+    # Column attributes whose changes require rebuilding the table.
+    rebuild_change_attrs = ('null', 'max_length', 'unique', 'db_column')
+
+    # Column attributes whose changes can be made as part of a rebuild.
+    coalescable_change_attrs = rebuild_change_attrs + ('db_index',)
+
+    # Pragmas used for bulk evolutions when
+    # settings.DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS is True.
+    default_bulk_pragmas = OrderedDict([
+        ('cache_size', -64000),
+        ('temp_store', 'MEMORY'),
+        ('synchronous', 'OFF'),
+    ])
+
+    # Pragmas that can't be changed while in a transaction.
+    transaction_bound_pragmas = ('journal_mode', 'synchronous', 'temp_store')
+
+    _table_rebuild = None
+
+    def generate_table_ops_sql(self, mutator, ops):
+        """Generates SQL for a sequence of mutation operations.
+
+        Consecutive column operations that would each rebuild the table are
+        coalesced into a single rebuild, using :py:class:`TableRebuild`.
+        All other operations are processed normally.
+        """
+        sql = []
+        pending_ops = []
+
+        model = mutator.create_model()
+
+        for ops_run, coalesce in self._iter_ops_runs(model, ops):
+            if coalesce:
+                if pending_ops:
+                    sql.extend(super(EvolutionOperations, self)
+                               .generate_table_ops_sql(mutator, pending_ops))
+                    pending_ops = []
+
+                sql.extend(self._generate_rebuild_sql(mutator, ops_run))
+            else:
+                pending_ops += ops_run
+
+        if pending_ops:
+            sql.extend(super(EvolutionOperations, self)
+                       .generate_table_ops_sql(mutator, pending_ops))
+
+        return sql
+
+    def get_table_fields(self, model):
+        """Return the fields on a model that are stored in its table.
+
+        Args:
+            model (django.db.models.Model):
+                The model.
+
+        Returns:
+            list of django.db.models.Field:
+            The fields with columns in the table.
+        """
+        return [
+            field
+            for field in model._meta.local_fields
+            if self.get_field_db_type(field) is not None
+        ]
+
+    @contextmanager
+    def bulk_evolution(self):
+        """Prepare the database connection for applying evolutions.
+
+        If ``settings.DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS`` is set, the
+        given pragmas will be set on the connection for the evolution, and
+        restored to their previous values afterward. This can be a
+        dictionary mapping pragma names to values, or ``True`` to use
+        :py:attr:`default_bulk_pragmas`.
+
+        ``journal_mode``, ``synchronous``, and ``temp_store`` can't be
+        changed in a transaction. If the evolution is already running in
+        one, these will be left alone. ``journal_mode`` is never set to
+        ``OFF``, since the evolution could then not be rolled back.
+
+        Context:
+            The pragmas will be set on the connection.
+        """
+        pragmas = getattr(settings, 'DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS',
+                          None)
+
+        if pragmas is True:
+            pragmas = self.default_bulk_pragmas
+
+        if not pragmas:
+            yield
+            return
+
+        in_transaction = self.connection.in_atomic_block
+        old_values = OrderedDict()
+        cursor = self.connection.cursor()
+
+        try:
+            for name, value in six.iteritems(pragmas):
+                if ((in_transaction and
+                     name in self.transaction_bound_pragmas) or
+                    (name == 'journal_mode' and
+                     six.text_type(value).upper() == 'OFF')):
+                    continue
+
+                cursor.execute('PRAGMA %s;' % name)
+                old_values[name] = cursor.fetchone()[0]
+                cursor.execute('PRAGMA %s = %s;' % (name, value))
+
+                if name == 'journal_mode':
+                    # This returns the new mode, which must be consumed.
+                    cursor.fetchall()
+
+            yield
+        finally:
+            for name, value in reversed(list(six.iteritems(old_values))):
+                cursor.execute('PRAGMA %s = %s;' % (name, value))
+
+                if name == 'journal_mode':
+                    cursor.fetchall()
+
+            cursor.close()
+
+    @contextmanager
+    def lock_timeout(self):
+        """Limit how long statements wait on locks during the evolution.
+
+        If ``settings.DJANGO_EVOLUTION_SQLITE_BUSY_TIMEOUT`` is set, the
+        connection's ``busy_timeout`` pragma will be set to that number of
+        milliseconds for the evolution, and restored afterward.
+
+        Context:
+            The busy timeout will be set on the connection.
+        """
+        timeout = getattr(settings, 'DJANGO_EVOLUTION_SQLITE_BUSY_TIMEOUT',
+                          None)
+
+        if timeout is None:
+            yield
+            return
+
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute('PRAGMA busy_timeout;')
+            old_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA busy_timeout = %d;' % int(timeout))
+            cursor.fetchall()
+
+            try:
+                yield
+            finally:
+                cursor.execute('PRAGMA busy_timeout = %d;' % old_timeout)
+                cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def is_lock_timeout_error(self, e):
+        """Return whether an exception was caused by a lock timeout.
+
+        Args:
+            e (Exception):
+                The exception raised when executing a statement.
+
+        Returns:
+            bool:
+            ``True`` if the database was locked by another connection.
+        """
+        return 'database is locked' in six.text_type(e)
+
+    def get_rebuild_table_sql(self, table_name, fields, sources,
+                              initials=None, create_index=True):
+        """Return SQL for rebuilding a table with a new set of columns.
+
+        By default, the table's data is copied into a temporary table, and
+        then copied back into the table once it's been recreated.
+
+        If ``settings.DJANGO_EVOLUTION_SQLITE_SINGLE_COPY_REBUILD`` is
+        ``True``, the procedure recommended by SQLite is used instead. The
+        new table is created under a scratch name and populated with a
+        single copy of the data, the old table is dropped, and the new table
+        is renamed in its place. This only copies the data once, but relies
+        on foreign key checks being disabled while the old table is dropped,
+        as :py:meth:`Evolver.evolve() <django_evolution.evolve.Evolver.
+        evolve>` does.
+
+        Args:
+            table_name (unicode):
+                The name of the table to rebuild.
+
+            fields (list of django.db.models.Field):
+                The fields for the columns in the rebuilt table.
+
+            sources (dict):
+                A mapping of field names to the columns in the existing table
+                holding their data. Fields not found in here are new, and
+                will start off empty.
+
+            initials (list of tuple, optional):
+                A list of ``(field, initial)`` for initial values to set for
+                fields' columns.
+
+            create_index (bool, optional):
+                Whether to create indexes for the rebuilt table.
+
+        Returns:
+            django_evolution.db.sql_result.SQLResult:
+            The SQL for the rebuild.
+        """
+        if initials is None:
+            initials = []
+
+        if getattr(settings, 'DJANGO_EVOLUTION_SQLITE_SINGLE_COPY_REBUILD',
+                   False):
+            return self._get_single_copy_rebuild_table_sql(
+                table_name, fields, sources, initials, create_index)
+
+        qn = self.connection.ops.quote_name
+        copied_fields = [
+            field
+            for field in fields
+            if sources.get(field.name) is not None
         ]
-        table_name = model._meta.db_table
 
         sql_result = SQLResult()
-        sql_result.add(self.create_temp_table(field_list))
-        sql_result.add(self.copy_to_temp_table(table_name, field_list))
+        sql_result.add(self.create_temp_table(fields))
+
+        if copied_fields:
+            sql_result.add(self.get_copy_rows_sql(
+                dest_table_name=TEMP_TABLE_NAME,
+                source_table_name=table_name,
+                columns=self.column_names(copied_fields),
+                values=', '.join(
+                    qn(sources[field.name])
+                    for field in copied_fields
+                )))
+
+        for field, initial in initials:
+            sql_result.add(self.insert_to_temp_table(field, initial))
+
         sql_result.add(self.delete_table(table_name))
-        sql_result.add(self.create_table(table_name, field_list))
-        sql_result.add(self.copy_from_temp_table(table_name, field_list))
+        sql_result.add(self.create_table(table_name, fields,
+                                         create_index=create_index))
+        sql_result.add(self.copy_from_temp_table(table_name, fields))
         sql_result.add(self.delete_table(TEMP_TABLE_NAME))
 
         return sql_result
 
-    def copy_to_temp_table(self, source_table_name, original_field_list,
-                           new_field_list=None):
+    def _get_single_copy_rebuild_table_sql(self, table_name, fields, sources,
+                                           initials, create_index):
+        """Return SQL for rebuilding a table using a single copy.
+
+        See :py:meth:`get_rebuild_table_sql` for details.
+
+        Unlike the temporary table rebuild, initial values only replace
+        ``NULL`` values in existing columns, matching the other database
+        backends.
+
+        Args:
+            table_name (unicode):
+                The name of the table to rebuild.
+
+            fields (list of django.db.models.Field):
+                The fields for the columns in the rebuilt table.
+
+            sources (dict):
+                A mapping of field names to the columns in the existing table
+                holding their data.
+
+            initials (list of tuple):
+                A list of ``(field, initial)`` for initial values to set for
+                fields' columns.
+
+            create_index (bool):
+                Whether to create indexes for the rebuilt table.
+
+        Returns:
+            django_evolution.db.sql_result.SQLResult:
+            The SQL for the rebuild.
+        """
+        qn = self.connection.ops.quote_name
+        new_table_name = 'new__%s' % table_name
+        initials_by_name = dict(
+            (field.name, initial)
+            for field, initial in initials
+            if initial is not None
+        )
+        columns = []
+        values = []
+        params = []
+
+        for field in fields:
+            source = sources.get(field.name)
+
+            if field.name in initials_by_name:
+                initial = initials_by_name[field.name]
+
+                if callable(initial):
+                    value = initial()
+                else:
+                    value = '%s'
+                    params.append(initial)
+
+                if source is not None:
+                    value = 'COALESCE(%s, %s)' % (qn(source), value)
+            elif source is not None:
+                value = qn(source)
+            else:
+                continue
+
+            columns.append(qn(field.column))
+            values.append(value)
+
+        sql_result = SQLResult()
+        sql_result.add(self.create_table(new_table_name, fields,
+                                         create_index=False))
+
+        if columns:
+            sql_result.add(self.get_copy_rows_sql(
+                dest_table_name=new_table_name,
+                source_table_name=table_name,
+                columns=', '.join(columns),
+                values=', '.join(values),
+                params=tuple(params)))
+
+        sql_result.add(self.delete_table(table_name))
+        sql_result.add(['ALTER TABLE %s RENAME TO %s;'
+                        % (qn(new_table_name), qn(table_name))])
+
+        if create_index:
+            sql_result.add(self.create_indexes_for_table(table_name, fields))
+
+        return sql_result
+
+    def _get_column_sources(self, fields):
+        """Return a mapping of field names to their current columns.
+
+        Args:
+            fields (list of django.db.models.Field):
+                The fields in the table.
+
+        Returns:
+            dict:
+            A mapping of field names to column names, for use with
+            :py:meth:`get_rebuild_table_sql`.
+        """
+        return OrderedDict(
+            (field.name, field.column)
+            for field in fields
+        )
+
+    def _iter_ops_runs(self, model, ops):
+        """Iterate through runs of operations that can be coalesced.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+
+            ops (list of dict):
+                The operations to process.
+
+        Yields:
+            tuple:
+            A tuple of ``(ops_run, coalesce)``. ``ops_run`` is a list of
+            adjacent operations, and ``coalesce`` is whether they should be
+            performed in a single table rebuild. This is only ``True`` if
+            the operations would otherwise rebuild the table more than once.
+        """
+        ops_run = []
+        num_rebuilds = 0
+
+        for op in ops:
+            rebuild_count = self._get_op_rebuild_count(model, op)
+
+            if rebuild_count is None:
+                if ops_run:
+                    yield ops_run, num_rebuilds > 1
+                    ops_run = []
+                    num_rebuilds = 0
+
+                yield [op], False
+            else:
+                ops_run.append(op)
+                num_rebuilds += rebuild_count
+
+        if ops_run:
+            yield ops_run, num_rebuilds > 1
+
+    def is_table_op_mergeable(self, model, op):
+        """Return whether an operation can be merged with its neighbors.
+
+        On SQLite, this is any operation that can be coalesced into a
+        single table rebuild.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+
+            op (dict):
+                The operation.
+
+        Returns:
+            bool:
+            ``True`` if the operation can be coalesced with adjacent
+            operations.
+        """
+        return self._get_op_rebuild_count(model, op) is not None
+
+    def _get_op_rebuild_count(self, model, op):
+        """Return the number of table rebuilds an operation would perform.
+
+        Args:
+            model (django.db.models.Model):
+                The model, as it was before any of the operations.
+
+            op (dict):
+                The operation.
+
+        Returns:
+            int:
+            The number of rebuilds, or ``None`` if the operation can't be
+            coalesced with others.
+        """
+        op_type = op['type']
+
+        if op_type in ('add_column', 'delete_column'):
+            field = op['field']
+
+            if isinstance(field, models.ManyToManyField):
+                return None
+
+            if op_type == 'add_column':
+                native = self.can_add_column_natively(model, field)
+            else:
+                native = self.can_delete_column_natively(model, field)
+
+            if native:
+                return 0
+
+            return 1
+        elif op_type == 'rename_column':
+            if (op['old_field'].column == op['new_field'].column or
+                self.can_rename_column_natively(model, op['old_field'],
+                                                op['new_field'])):
+                return 0
+
+            return 1
+        elif op_type == 'change_column':
+            attr_names = set(op['new_attrs'])
+
+            if (isinstance(op['field'], models.ManyToManyField) or
+                not attr_names.issubset(self.coalescable_change_attrs)):
+                return None
+
+            return len(attr_names.intersection(self.rebuild_change_attrs))
+
+        return None
+
+    def _generate_rebuild_sql(self, mutator, ops):
+        """Generate SQL for several operations using a single table rebuild.
+
+        Each operation is processed as normal, updating the database state
+        and signature, but with the table rebuild recorded in a
+        :py:class:`TableRebuild` rather than performed. Any index changes
+        are covered by the indexes created for the rebuilt table.
+
+        Args:
+            mutator (django_evolution.mutators.ModelMutator):
+                The mutator for the model.
+
+            ops (list of dict):
+                The operations to perform.
+
+        Returns:
+            list:
+            The list of SQL statements.
+        """
+        self._table_rebuild = TableRebuild(self, mutator.create_model())
+
+        try:
+            for op in ops:
+                self.generate_table_op_sql(mutator, op, None, None)
+
+            return self._table_rebuild.to_sql(mutator.create_model()).to_sql()
+        finally:
+            self._table_rebuild = None
+
+    def delete_column(self, model, f):
+        if self._table_rebuild is not None:
+            self._table_rebuild.delete_column(f)
+
+            return SQLResult()
+
+        if self.can_delete_column_natively(model, f):
+            qn = self.connection.ops.quote_name
+
+            return SQLResult([
+                'ALTER TABLE %s DROP COLUMN %s;'
+                % (qn(model._meta.db_table), qn(f.column)),
+            ])
+
+        field_list = [
+            field
+            for field in self.get_table_fields(model)
+            # Remove the field to be deleted
+            if f.name != field.name
+        ]
+
+        return self.get_rebuild_table_sql(
+            table_name=model._meta.db_table,
+            fields=field_list,
+            sources=self._get_column_sources(field_list))
+
+    def get_copy_rows_sql(self, dest_table_name, source_table_name, columns,
+                          values, params=()):
+        """Return SQL for copying rows from one table to another.
+
+        If ``settings.DJANGO_EVOLUTION_SQLITE_COPY_CHUNK_SIZE`` is set, the
+        rows will be copied in chunks of that many rows, using
+        :py:class:`ChunkedCopySQL`. Otherwise, they'll be copied with a
+        single ``INSERT ... SELECT``.
+
+        Args:
+            dest_table_name (unicode):
+                The name of the table to copy rows into.
+
+            source_table_name (unicode):
+                The name of the table to copy rows from.
+
+            columns (unicode):
+                The quoted, comma-separated column names to copy into.
+
+            values (unicode):
+                The comma-separated values to select for each column.
+
+            params (tuple, optional):
+                Parameters for any placeholders in ``values``.
+
+        Returns:
+            list:
+            The list of SQL statements.
+        """
+        chunk_size = getattr(settings,
+                             'DJANGO_EVOLUTION_SQLITE_COPY_CHUNK_SIZE',
+                             None)
+
+        if chunk_size:
+            return [
+                ChunkedCopySQL(evolver=self,
+                               dest_table_name=dest_table_name,
+                               source_table_name=source_table_name,
+                               columns=columns,
+                               values=values,
+                               params=params,
+                               chunk_size=chunk_size),
+            ]
+
         qn = self.connection.ops.quote_name
+        sql = ('INSERT INTO %s (%s) SELECT %s FROM %s;'
+               % (qn(dest_table_name), columns, values,
+                  qn(source_table_name)))
+
+        if params:
+            return [(sql, params)]
+        else:
+            return [sql]
 
+    def copy_to_temp_table(self, source_table_name, original_field_list,
+                           new_field_list=None):
         source_columns = self.column_names(original_field_list)
 
         if new_field_list:
@@ -45,24 +861,18 @@ class EvolutionOperations(BaseEvolutionOperations):
         else:
             temp_columns = source_columns
 
-        return [
-            'INSERT INTO %s (%s) SELECT %s FROM %s;' %
-            (qn(TEMP_TABLE_NAME), temp_columns, source_columns,
-             qn(source_table_name))
-        ]
+        return self.get_copy_rows_sql(dest_table_name=TEMP_TABLE_NAME,
+                                      source_table_name=source_table_name,
+                                      columns=temp_columns,
+                                      values=source_columns)
 
     def copy_from_temp_table(self, dest_table_name, field_list):
-        qn = self.connection.ops.quote_name
+        column_names = self.column_names(field_list)
 
-        return [
-            'INSERT INTO %(dest_table_name)s (%(column_names)s)'
-            ' SELECT %(column_names)s FROM %(temp_table)s;'
-            % {
-                'dest_table_name': qn(dest_table_name),
-                'temp_table': qn(TEMP_TABLE_NAME),
-                'column_names': self.column_names(field_list),
-            }
-        ]
+        return self.get_copy_rows_sql(dest_table_name=dest_table_name,
+                                      source_table_name=TEMP_TABLE_NAME,
+                                      columns=column_names,
+                                      values=column_names)
 
     def column_names(self, field_list):
         qn = self.connection.ops.quote_name
@@ -133,35 +943,7 @@ class EvolutionOperations(BaseEvolutionOperations):
 
         for field in field_list:
             if type(field) is not models.ManyToManyField:
-                column_name = qn(field.column)
-                column_type = field.db_type(connection=self.connection)
-                params = [column_name, column_type]
-
-                # Always use null if this is a temporary table. It may be
-                # used to create a new field (which will be null while data is
-                # copied across from the old table).
-                if temporary or field.null:
-                    params.append('NULL')
-                else:
-                    params.append('NOT NULL')
-
-                if field.unique:
-                    params.append('UNIQUE')
-
-                if field.primary_key:
-                    params.append('PRIMARY KEY')
-
-                if not temporary and isinstance(field, models.ForeignKey):
-                    remote_field = get_remote_field(field)
-                    remote_field_model = get_remote_field_model(remote_field)
-
-                    params.append(
-                        'REFERENCES %s (%s) DEFERRABLE INITIALLY DEFERRED'
-                        % (qn(remote_field_model._meta.db_table),
-                           qn(remote_field_model._meta.get_field(
-                               remote_field.field_name).column)))
-
-                columns.append(' '.join(params))
+                columns.append(self.get_column_definition(field, temporary))
 
         output.append(', '.join(columns))
         output.append(');')
@@ -173,6 +955,78 @@ class EvolutionOperations(BaseEvolutionOperations):
 
         return output
 
+    def get_column_definition(self, field, temporary=False):
+        """Return the SQL defining a column in a table.
+
+        Definitions are cached for the connection, since tables are often
+        rebuilt several times with mostly the same columns.
+
+        Args:
+            field (django.db.models.Field):
+                The field for the column.
+
+            temporary (bool, optional):
+                Whether the column is for a temporary table. These columns
+                always allow NULL values, and don't reference other tables.
+
+        Returns:
+            unicode:
+            The column definition.
+        """
+        db_type_key = self.get_field_db_type_key(field)
+
+        # Always use null if this is a temporary table. It may be used to
+        # create a new field (which will be null while data is copied across
+        # from the old table).
+        null = temporary or field.null
+
+        if not temporary and isinstance(field, models.ForeignKey):
+            remote_field = get_remote_field(field)
+            remote_field_model = get_remote_field_model(remote_field)
+            references = (
+                remote_field_model._meta.db_table,
+                remote_field_model._meta.get_field(
+                    remote_field.field_name).column,
+            )
+        else:
+            references = None
+
+        if db_type_key is not None:
+            cache = self.get_column_cache()
+            key = ('sqlite3_column', db_type_key, field.column, null,
+                   field.unique, field.primary_key, references)
+
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+
+        qn = self.connection.ops.quote_name
+        params = [qn(field.column), self.get_field_db_type(field)]
+
+        if null:
+            params.append('NULL')
+        else:
+            params.append('NOT NULL')
+
+        if field.unique:
+            params.append('UNIQUE')
+
+        if field.primary_key:
+            params.append('PRIMARY KEY')
+
+        if references is not None:
+            params.append(
+                'REFERENCES %s (%s) DEFERRABLE INITIALLY DEFERRED'
+                % (qn(references[0]), qn(references[1])))
+
+        column_definition = ' '.join(params)
+
+        if db_type_key is not None:
+            cache[key] = column_definition
+
+        return column_definition
+
     def rename_column(self, model, old_field, new_field):
         sql_result = SQLResult()
 
@@ -180,48 +1034,79 @@ class EvolutionOperations(BaseEvolutionOperations):
             # No Operation
             return sql_result
 
-        opts = model._meta
-        original_fields = opts.local_fields
-        new_fields = []
-        for f in original_fields:
-            # Ignore Generic Fields
-            if f.db_type(connection=self.connection) is not None:
-                if f.name == old_field.name:
-                    new_fields.append(new_field)
-                else:
-                    new_fields.append(f)
+        if self._table_rebuild is not None:
+            self._table_rebuild.rename_column(old_field, new_field)
 
-        table_name = opts.db_table
+            return sql_result
 
-        sql_result.add(self.create_temp_table(new_fields))
-        sql_result.add(self.copy_to_temp_table(table_name, original_fields,
-                                               new_fields))
-        sql_result.add(self.delete_table(table_name))
-        sql_result.add(self.create_table(table_name, new_fields))
-        sql_result.add(self.copy_from_temp_table(table_name, new_fields))
-        sql_result.add(self.delete_table(TEMP_TABLE_NAME))
+        if self.can_rename_column_natively(model, old_field, new_field):
+            qn = self.connection.ops.quote_name
+            table_name = model._meta.db_table
 
-        return sql_result
+            sql_result.add('ALTER TABLE %s RENAME COLUMN %s TO %s;'
+                           % (qn(table_name), qn(old_field.column),
+                              qn(new_field.column)))
 
-    def add_column(self, model, f, initial):
-        table_name = model._meta.db_table
-        original_fields = [
-            field
-            for field in model._meta.local_fields
-            if field.db_type(connection=self.connection) is not None
+            # The indexes are kept by the table, so they now cover the
+            # new column name.
+            for index_state in self.database_state.iter_indexes(table_name):
+                index_state.columns = [
+                    (new_field.column
+                     if column == old_field.column
+                     else column)
+                    for column in index_state.columns
+                ]
+
+            return sql_result
+
+        original_fields = self.get_table_fields(model)
+        new_fields = [
+            (new_field
+             if f.name == old_field.name
+             else f)
+            for f in original_fields
         ]
-        new_fields = list(original_fields)
-        new_fields.append(f)
 
+        sources = self._get_column_sources(original_fields)
+        sources[new_field.name] = sources.pop(old_field.name)
+
+        return self.get_rebuild_table_sql(table_name=model._meta.db_table,
+                                          fields=new_fields,
+                                          sources=sources)
+
+    def add_column(self, model, f, initial, allow_non_atomic_backfill=False):
+        table_name = model._meta.db_table
         sql_result = SQLResult()
-        sql_result.add(self.create_temp_table(new_fields))
-        sql_result.add(self.copy_to_temp_table(table_name, original_fields))
-        sql_result.add(self.insert_to_temp_table(f, initial))
-        sql_result.add(self.delete_table(table_name))
-        sql_result.add(self.create_table(table_name, new_fields,
-                                         create_index=False))
-        sql_result.add(self.copy_from_temp_table(table_name, new_fields))
-        sql_result.add(self.delete_table(TEMP_TABLE_NAME))
+
+        if self._table_rebuild is not None:
+            self._table_rebuild.add_column(f, initial)
+        elif self.can_add_column_natively(model, f):
+            qn = self.connection.ops.quote_name
+
+            sql_result.add('ALTER TABLE %s ADD COLUMN %s;'
+                           % (qn(table_name), self.get_column_definition(f)))
+
+            if initial is not None:
+                if callable(initial):
+                    sql_result.add(self.get_backfill_sql(
+                        model, f, initial(),
+                        allow_non_atomic=(f.null and
+                                          allow_non_atomic_backfill)))
+                else:
+                    sql_result.add(self.get_backfill_sql(
+                        model, f, '%s',
+                        params=(initial,),
+                        allow_non_atomic=(f.null and
+                                          allow_non_atomic_backfill)))
+        else:
+            original_fields = self.get_table_fields(model)
+
+            sql_result.add(self.get_rebuild_table_sql(
+                table_name=table_name,
+                fields=original_fields + [f],
+                sources=self._get_column_sources(original_fields),
+                initials=[(f, initial)],
+                create_index=False))
 
         if f.unique or f.primary_key:
             self.database_state.add_index(
@@ -246,66 +1131,392 @@ class EvolutionOperations(BaseEvolutionOperations):
         return self.change_attribute(model, field, '_unique', new_unique_value)
 
     def get_drop_unique_constraint_sql(self, model, index_name):
-        opts = model._meta
-        table_name = opts.db_table
-        fields = [
-            f
-            for f in opts.local_fields
-            if f.db_type(connection=self.connection) is not None
-        ]
+        if self._table_rebuild is not None:
+            return SQLResult()
 
-        sql_result = SQLResult()
-        sql_result.add(self.create_temp_table(fields))
-        sql_result.add(self.copy_to_temp_table(table_name, fields))
-        sql_result.add(self.delete_table(table_name))
-        sql_result.add(self.create_table(table_name, fields))
-        sql_result.add(self.copy_from_temp_table(table_name, fields))
-        sql_result.add(self.delete_table(TEMP_TABLE_NAME))
+        fields = self.get_table_fields(model)
 
-        return sql_result
+        return self.get_rebuild_table_sql(
+            table_name=model._meta.db_table,
+            fields=fields,
+            sources=self._get_column_sources(fields))
 
     def change_attribute(self, model, field, attr_name, new_attr_value,
                          initial=None):
         opts = model._meta
         table_name = opts.db_table
         setattr(field, attr_name, new_attr_value)
-        fields = [
-            f
-            for f in opts.local_fields
-            if f.db_type(connection=self.connection) is not None
-        ]
 
-        sql_result = SQLResult()
-        sql_result.add(self.create_temp_table(fields))
-        sql_result.add(self.copy_to_temp_table(table_name, fields))
-        sql_result.add(self.insert_to_temp_table(opts.get_field(field.name),
-                                                 initial))
-        sql_result.add(self.delete_table(table_name))
-        sql_result.add(self.create_table(table_name, fields,
-                                         create_index=False))
-        sql_result.add(self.copy_from_temp_table(table_name, fields))
-        sql_result.add(self.delete_table(TEMP_TABLE_NAME))
+        if self._table_rebuild is not None:
+            self._table_rebuild.set_initial(field, initial)
+
+            return SQLResult()
+
+        fields = self.get_table_fields(model)
+
+        return self.get_rebuild_table_sql(
+            table_name=table_name,
+            fields=fields,
+            sources=self._get_column_sources(fields),
+            initials=[(opts.get_field(field.name), initial)],
+            create_index=False)
+
+    @property
+    def supports_pragma_functions(self):
+        """Whether pragmas can be queried as table-valued functions.
+
+        SQLite 3.16 and higher allow pragmas such as ``index_list`` to be
+        used as functions in a ``SELECT`` (such as
+        ``pragma_index_list(?)``). These take the table name as a bound
+        parameter, allowing the statement to be prepared once and reused for
+        every table, and allow related pragmas to be joined in one query.
+        """
+        return self.connection.Database.sqlite_version_info >= (3, 16, 0)
+
+    @property
+    def use_native_alter_table(self):
+        """Whether native ALTER TABLE statements may be used.
+
+        Newer versions of SQLite can add, rename, and drop some columns
+        without rebuilding the table. These statements only change the
+        table's schema, rather than copying every row, and are used whenever
+        the SQLite version supports them. Setting
+        ``settings.DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE`` to ``False``
+        will always generate SQL for table rebuilds instead.
+        """
+        return getattr(settings, 'DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE',
+                       True)
+
+    def can_add_column_natively(self, model, field):
+        """Return whether a column can be added without a table rebuild.
+
+        ``ALTER TABLE ... ADD COLUMN`` can't add a column that's a primary
+        key or unique, or that doesn't allow NULL values without also
+        keeping a default in the schema, so these will still rebuild the
+        table.
+
+        Args:
+            model (django.db.models.Model):
+                The model the column is being added to.
+
+            field (django.db.models.Field):
+                The field being added.
+
+        Returns:
+            bool:
+            ``True`` if the column can be added natively.
+        """
+        return (self.use_native_alter_table and
+                field.null and
+                not field.unique and
+                not field.primary_key)
+
+    def can_rename_column_natively(self, model, old_field, new_field):
+        """Return whether a column can be renamed without a table rebuild.
+
+        ``ALTER TABLE ... RENAME COLUMN`` requires SQLite 3.25 or higher.
+
+        Args:
+            model (django.db.models.Model):
+                The model owning the column.
+
+            old_field (django.db.models.Field):
+                The field being renamed.
+
+            new_field (django.db.models.Field):
+                The field with the new column name.
+
+        Returns:
+            bool:
+            ``True`` if the column can be renamed natively.
+        """
+        return (self.use_native_alter_table and
+                self.connection.Database.sqlite_version_info >= (3, 25, 0))
+
+    def can_delete_column_natively(self, model, field):
+        """Return whether a column can be deleted without a table rebuild.
+
+        ``ALTER TABLE ... DROP COLUMN`` requires SQLite 3.35 or higher, and
+        will fail for any column that's a primary key, unique, indexed, or
+        part of a foreign key. The table's indexes must be known in the
+        database state in order to rule these out.
+
+        Args:
+            model (django.db.models.Model):
+                The model owning the column.
+
+            field (django.db.models.Field):
+                The field being deleted.
+
+        Returns:
+            bool:
+            ``True`` if the column can be deleted natively.
+        """
+        table_name = model._meta.db_table
 
-        return sql_result
+        if (not self.use_native_alter_table or
+            self.connection.Database.sqlite_version_info < (3, 35, 0) or
+            field.primary_key or
+            field.unique or
+            field.db_index or
+            get_remote_field(field) is not None or
+            not self.database_state.has_table(table_name)):
+            return False
+
+        return not any(
+            field.column in index_state.columns
+            for index_state in self.database_state.iter_indexes(table_name)
+        )
+
+    def get_alter_table_cost_kind(self, changes):
+        """Return the kind of work performed by an ALTER TABLE statement.
+
+        SQLite only changes the table's schema when adding or renaming
+        columns, but rewrites the table when dropping a column.
+
+        Args:
+            changes (unicode):
+                The changes made by the statement, following the table name.
+
+        Returns:
+            unicode:
+            The kind of work, as one of the
+            :py:class:`~django_evolution.db.estimate.StatementCost` kinds.
+        """
+        if re.match(r'\s*DROP\b', changes, re.I):
+            return StatementCost.TABLE_REWRITE
+
+        return super(EvolutionOperations, self).get_alter_table_cost_kind(
+            changes)
+
+    def get_table_row_count(self, table_name, cursor=None):
+        """Return the estimated number of rows in a table.
+
+        If the database has been analyzed (using ``ANALYZE``), the row count
+        recorded in ``sqlite_stat1`` will be used. Otherwise, the rows will
+        be counted.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor used for the lookup.
+
+        Returns:
+            int:
+            The estimated number of rows, or ``None`` if unknown.
+        """
+        with self.introspection_session(cursor) as cursor:
+            cursor.execute(
+                "SELECT 1"
+                "  FROM sqlite_master"
+                " WHERE type = 'table' AND name = 'sqlite_stat1';")
+
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s;',
+                               [table_name])
+
+                # The first value in each entry is the number of rows in the
+                # table (or index).
+                row_counts = [
+                    int(row[0].split()[0])
+                    for row in cursor.fetchall()
+                    if row[0]
+                ]
+
+                if row_counts:
+                    return max(row_counts)
+
+            return super(EvolutionOperations, self).get_table_row_count(
+                table_name, cursor=cursor)
+
+    def get_indexes_for_table(self, table_name, cursor=None):
+        indexes = {}
+
+        with self.introspection_session(cursor) as cursor:
+            if self.supports_pragma_functions:
+                cursor.execute(
+                    'SELECT il.name, il."unique", ii.name'
+                    '  FROM pragma_index_list(%s) AS il,'
+                    '       pragma_index_info(il.name) AS ii'
+                    ' ORDER BY il.seq, ii.seqno;',
+                    [table_name])
+
+                for index_name, unique, column_name in cursor.fetchall():
+                    if index_name not in indexes:
+                        indexes[index_name] = {
+                            'unique': bool(unique),
+                            'columns': [],
+                        }
+
+                    indexes[index_name]['columns'].append(column_name)
+            else:
+                qn = self.connection.ops.quote_name
+
+                cursor.execute('PRAGMA index_list(%s);' % qn(table_name))
+
+                for row in list(cursor.fetchall()):
+                    index_name = row[1]
+                    indexes[index_name] = {
+                        'unique': bool(row[2]),
+                        'columns': []
+                    }
+
+                    cursor.execute('PRAGMA index_info(%s)' % qn(index_name))
+
+                    for index_info in cursor.fetchall():
+                        # Column name
+                        indexes[index_name]['columns'].append(index_info[2])
+
+        return indexes
+
+    def get_columns_for_tables(self, table_names, cursor=None):
+        """Return the columns for a list of tables from the database.
+
+        This reads each table's ``table_info`` pragma. The maximum length is
+        parsed out of the declared type (such as ``varchar(20)``).
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
 
-    def get_indexes_for_table(self, table_name):
+        Returns:
+            dict:
+            A dictionary mapping table names to column information.
+        """
+        result = {}
+
+        with self.introspection_session(cursor) as cursor:
+            for table_name in table_names:
+                columns = OrderedDict()
+
+                for row in self._query_pragma(cursor, 'table_info',
+                                              table_name):
+                    data_type = row[2]
+                    m = _MAX_LENGTH_RE.search(data_type)
+
+                    columns[row[1]] = {
+                        'type': data_type,
+                        'null': not row[3],
+                        'max_length': m and int(m.group(1)),
+                    }
+
+                result[table_name] = columns
+
+        return result
+
+    def get_foreign_keys_for_tables(self, table_names, cursor=None):
+        """Return the foreign key constraints for a list of tables.
+
+        This reads each table's ``foreign_key_list`` pragma. SQLite doesn't
+        record names for foreign key constraints, so one is generated from
+        the columns involved.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to introspect.
+
+            cursor (django.db.backends.util.CursorWrapper, optional):
+                The cursor to use, from :py:meth:`introspection_session`.
+                If not provided, a new cursor will be used.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to foreign key information.
+        """
+        result = {}
+
+        with self.introspection_session(cursor) as cursor:
+            for table_name in table_names:
+                foreign_keys = {}
+
+                for row in self._query_pragma(cursor, 'foreign_key_list',
+                                              table_name):
+                    to_table, column, to_column = row[2:5]
+                    name = '%s_refs_%s_%s' % (column, to_table, to_column)
+
+                    foreign_keys[name] = {
+                        'column': column,
+                        'to_table': to_table,
+                        'to_column': to_column,
+                    }
+
+                result[table_name] = foreign_keys
+
+        return result
+
+    def _query_pragma(self, cursor, pragma_name, table_name):
+        """Return the rows from a pragma for a table.
+
+        This will use a parameterized table-valued function if supported,
+        and otherwise fall back on running the pragma directly.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The cursor to use.
+
+            pragma_name (unicode):
+                The name of the pragma.
+
+            table_name (unicode):
+                The name of the table to pass to the pragma.
+
+        Returns:
+            list of tuple:
+            The rows returned by the pragma.
+        """
+        if self.supports_pragma_functions:
+            cursor.execute('SELECT * FROM pragma_%s(%%s);' % pragma_name,
+                           [table_name])
+        else:
+            cursor.execute('PRAGMA %s(%s);'
+                           % (pragma_name,
+                              self.connection.ops.quote_name(table_name)))
+
+        return cursor.fetchall()
+
+    def get_schema_fingerprint(self):
+        """Return a fingerprint representing the current database schema.
+
+        This hashes the contents of ``sqlite_master``, which contains the
+        full definition of every table and index. Unlike the
+        ``schema_version`` pragma, this will never produce the same value
+        for two different schemas, even if a schema change was rolled back.
+
+        Returns:
+            unicode:
+            The schema fingerprint.
+        """
         cursor = self.connection.cursor()
-        qn = self.connection.ops.quote_name
-        indexes = {}
 
-        cursor.execute('PRAGMA index_list(%s);' % qn(table_name))
+        try:
+            cursor.execute(
+                'SELECT type, name, tbl_name, sql FROM sqlite_master'
+                ' ORDER BY type, name;')
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
 
-        for row in list(cursor.fetchall()):
-            index_name = row[1]
-            indexes[index_name] = {
-                'unique': bool(row[2]),
-                'columns': []
-            }
+        sha1 = hashlib.sha1()
 
-            cursor.execute('PRAGMA index_info(%s)' % qn(index_name))
+        for row in rows:
+            sha1.update(
+                '\0'.join(six.text_type(value) for value in row)
+                .encode('utf-8'))
+            sha1.update(b'\n')
 
-            for index_info in cursor.fetchall():
-                # Column name
-                indexes[index_name]['columns'].append(index_info[2])
+        return sha1.hexdigest()
 
-        return indexes
+    def get_server_version(self):
+        """Return the version of the SQLite library.
+
+        Returns:
+            unicode:
+            The SQLite version.
+        """
+        return self.connection.Database.sqlite_version
@@ -2,11 +2,19 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
 from copy import deepcopy
 
+from django.conf import settings
 from django.utils import six
 
-from django_evolution.db import EvolutionOperationsMulti
+from django_evolution.compat.datastructures import OrderedDict
+from django_evolution.db import get_evolution_operations
 from django_evolution.errors import DatabaseStateError
 
 
@@ -60,13 +68,149 @@ class IndexState(object):
             self.name, self.columns, self.unique)
 
 
+class ColumnState(object):
+    """A column recorded in the database state."""
+
+    def __init__(self, name, data_type, null, max_length=None):
+        """Initialize the column state.
+
+        Args:
+            name (unicode):
+                The name of the column.
+
+            data_type (unicode):
+                The data type of the column, as reported by the database.
+
+            null (bool):
+                Whether the column allows ``NULL`` values.
+
+            max_length (int, optional):
+                The maximum length of the column's values, if the type is
+                bounded.
+        """
+        assert name
+
+        self.name = name
+        self.data_type = data_type
+        self.null = null
+        self.max_length = max_length
+
+    def __eq__(self, other_state):
+        """Return whether two column states are equal.
+
+        Args:
+            other_state (ColumnState):
+                The other column state to compare to.
+
+        Returns:
+            bool:
+            ``True`` if the two column states are equal. ``False`` if they
+            are not.
+        """
+        return (self.name == other_state.name and
+                self.data_type == other_state.data_type and
+                self.null == other_state.null and
+                self.max_length == other_state.max_length)
+
+    def __repr__(self):
+        """Return a string representation of the column state.
+
+        Returns:
+            unicode:
+            A string representation of the column.
+        """
+        return ('<ColumnState(name=%r, data_type=%r, null=%r, '
+                'max_length=%r)>'
+                % (self.name, self.data_type, self.null, self.max_length))
+
+
+class ForeignKeyState(object):
+    """A foreign key constraint recorded in the database state."""
+
+    def __init__(self, name, column, to_table, to_column, validated=True):
+        """Initialize the foreign key state.
+
+        Args:
+            name (unicode):
+                The name of the constraint.
+
+            column (unicode):
+                The column the constraint applies to.
+
+            to_table (unicode):
+                The name of the referenced table.
+
+            to_column (unicode):
+                The name of the referenced column.
+
+            validated (bool, optional):
+                Whether existing rows have been validated against the
+                constraint. This is ``False`` for constraints added as
+                ``NOT VALID`` that haven't yet been validated.
+        """
+        assert name
+        assert column
+
+        self.name = name
+        self.column = column
+        self.to_table = to_table
+        self.to_column = to_column
+        self.validated = validated
+
+    def __eq__(self, other_state):
+        """Return whether two foreign key states are equal.
+
+        Args:
+            other_state (ForeignKeyState):
+                The other foreign key state to compare to.
+
+        Returns:
+            bool:
+            ``True`` if the two foreign key states are equal. ``False`` if
+            they are not.
+        """
+        return (self.name == other_state.name and
+                self.column == other_state.column and
+                self.to_table == other_state.to_table and
+                self.to_column == other_state.to_column and
+                self.validated == other_state.validated)
+
+    def __repr__(self):
+        """Return a string representation of the foreign key state.
+
+        Returns:
+            unicode:
+            A string representation of the foreign key.
+        """
+        return ('<ForeignKeyState(name=%r, column=%r, to_table=%r, '
+                'to_column=%r, validated=%r)>'
+                % (self.name, self.column, self.to_table, self.to_column,
+                   self.validated))
+
+
 class DatabaseState(object):
     """Tracks some useful state in the database.
 
     This primarily tracks indexes associated with tables, allowing them to be
     scanned from the database, explicitly added, removed, or cleared.
+
+    Columns and foreign key constraints are also recorded when scanning, for
+    use in verifying that the database matches a stored signature. Unlike
+    indexes, these are not updated as evolutions are simulated. Unique
+    constraints are tracked as unique indexes.
+
+    If the ``DJANGO_EVOLUTION_STATE_CACHE_DIR`` setting points to a
+    directory, scanned state will be stored there and reused on later scans,
+    so long as the database's schema fingerprint has not changed. This avoids
+    introspecting every table on each run of the ``evolve`` command.
+
+    The ``DJANGO_EVOLUTION_STATE_SCAN_WORKERS`` setting can be used to scan
+    tables using several database connections in parallel.
     """
 
+    #: The version of the format used for cached state files.
+    CACHE_FORMAT_VERSION = 3
+
     def __init__(self, db_name, scan=True):
         """Initialize the state.
 
@@ -91,7 +235,7 @@ class DatabaseState(object):
             DatabaseState:
             The cloned copy of the state.
         """
-        cloned_sig = DatabaseState(db_name=self.db_name)
+        cloned_sig = DatabaseState(db_name=self.db_name, scan=False)
         cloned_sig._tables = deepcopy(self._tables)
 
         return cloned_sig
@@ -106,6 +250,8 @@ class DatabaseState(object):
                 The name of the table.
         """
         self._tables[table_name] = {
+            'columns': OrderedDict(),
+            'foreign_keys': {},
             'indexes': {},
         }
 
@@ -300,32 +446,650 @@ class DatabaseState(object):
         for index_state in six.itervalues(indexes):
             yield index_state
 
-    def rescan_indexes(self):
+    def add_column(self, table_name, column_name, data_type, null,
+                   max_length=None):
+        """Add a table's column to the database state.
+
+        This requires the table to be tracked first.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            column_name (unicode):
+                The name of the column.
+
+            data_type (unicode):
+                The data type of the column, as reported by the database.
+
+            null (bool):
+                Whether the column allows ``NULL`` values.
+
+            max_length (int, optional):
+                The maximum length of the column's values, if bounded.
+
+        Raises:
+            django_evolution.errors.DatabaseStateError:
+                There was an issue adding this column. Details are in the
+                exception's message.
+        """
+        try:
+            columns = self._tables[table_name]['columns']
+        except KeyError:
+            raise DatabaseStateError(
+                'Unable to add column "%s" to table "%s". The table is not '
+                'being tracked in the database state.'
+                % (column_name, table_name))
+
+        if column_name in columns:
+            raise DatabaseStateError(
+                'Unable to add column "%s" to table "%s". This column '
+                'already exists.'
+                % (column_name, table_name))
+
+        columns[column_name] = ColumnState(name=column_name,
+                                           data_type=data_type,
+                                           null=null,
+                                           max_length=max_length)
+
+    def get_column(self, table_name, column_name):
+        """Return the column state for a given name.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            column_name (unicode):
+                The name of the column.
+
+        Returns:
+            ColumnState:
+            The state for the column, if found. ``None`` if the column could
+            not be found.
+        """
+        try:
+            return self._tables[table_name]['columns'][column_name]
+        except KeyError:
+            return None
+
+    def iter_columns(self, table_name):
+        """Iterate through all columns for a table.
+
+        Columns are returned in the order they appear in the table.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+        Yields:
+            ColumnState:
+            A column in the table.
+        """
+        try:
+            columns = self._tables[table_name]['columns']
+        except KeyError:
+            return
+
+        for column_state in six.itervalues(columns):
+            yield column_state
+
+    def add_foreign_key(self, table_name, name, column, to_table, to_column,
+                        validated=True):
+        """Add a table's foreign key constraint to the database state.
+
+        This requires the table to be tracked first.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            name (unicode):
+                The name of the constraint.
+
+            column (unicode):
+                The column the constraint applies to.
+
+            to_table (unicode):
+                The name of the referenced table.
+
+            to_column (unicode):
+                The name of the referenced column.
+
+            validated (bool, optional):
+                Whether existing rows have been validated against the
+                constraint.
+
+        Raises:
+            django_evolution.errors.DatabaseStateError:
+                There was an issue adding this foreign key. Details are in
+                the exception's message.
+        """
+        try:
+            foreign_keys = self._tables[table_name]['foreign_keys']
+        except KeyError:
+            raise DatabaseStateError(
+                'Unable to add foreign key "%s" to table "%s". The table is '
+                'not being tracked in the database state.'
+                % (name, table_name))
+
+        foreign_keys[name] = ForeignKeyState(name=name,
+                                             column=column,
+                                             to_table=to_table,
+                                             to_column=to_column,
+                                             validated=validated)
+
+    def find_foreign_key(self, table_name, column):
+        """Find and return a foreign key constraint on a column.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            column (unicode):
+                The name of the column.
+
+        Returns:
+            ForeignKeyState:
+            The state for the foreign key, if found. ``None`` if a constraint
+            on the column could not be found.
+        """
+        for foreign_key_state in self.iter_foreign_keys(table_name):
+            if foreign_key_state.column == column:
+                return foreign_key_state
+
+        return None
+
+    def iter_foreign_keys(self, table_name):
+        """Iterate through all foreign key constraints for a table.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+        Yields:
+            ForeignKeyState:
+            A foreign key constraint on the table.
+        """
+        try:
+            foreign_keys = self._tables[table_name]['foreign_keys']
+        except KeyError:
+            return
+
+        for foreign_key_state in six.itervalues(foreign_keys):
+            yield foreign_key_state
+
+    def iter_tables(self):
+        """Iterate through the names of all tracked tables.
+
+        Yields:
+            unicode:
+            The name of a tracked table.
+        """
+        for table_name in six.iterkeys(self._tables):
+            yield table_name
+
+    def get_table_changes(self, old_state):
+        """Return the tables changed since an earlier copy of the state.
+
+        This is used to record the changes made to the state while
+        generating SQL, so that they can be applied again later without
+        generating the SQL.
+
+        Args:
+            old_state (DatabaseState):
+                The earlier copy of the state, from :py:meth:`clone`.
+
+        Returns:
+            dict:
+            A JSON-compatible dictionary mapping the names of tables that
+            were added or changed to their serialized state.
+        """
+        old_tables = old_state._tables
+
+        return dict(
+            (table_name, self._serialize_table(table_info))
+            for table_name, table_info in six.iteritems(self._tables)
+            if old_tables.get(table_name) != table_info
+        )
+
+    def apply_table_changes(self, table_changes):
+        """Apply changes to tables returned by :py:meth:`get_table_changes`.
+
+        Any existing state for the changed tables is replaced.
+
+        Args:
+            table_changes (dict):
+                The serialized table changes.
+
+        Raises:
+            AssertionError:
+                The table changes contained invalid values.
+
+            KeyError:
+                The table changes were missing information.
+
+            TypeError:
+                The table changes were invalid.
+        """
+        for table_name, table_data in six.iteritems(table_changes):
+            self._tables[table_name] = self._deserialize_table(table_data)
+
+    def rescan_indexes(self, use_cache=True, workers=None):
         """Rescan the list of indexes from the database.
 
         This will look up all indexes found in the database, recording each
         one's table. If there are existing indexes being tracked for a table
         containing indexes, they will be removed.
+
+        If a state cache directory is configured and the backend can compute
+        a schema fingerprint, the state will be loaded from the cache when
+        the fingerprint matches, and written to the cache after a scan.
+
+        For very large schemas, tables can be scanned by several worker
+        threads at once, each using its own database connection. This is
+        controlled by ``workers`` or the
+        ``DJANGO_EVOLUTION_STATE_SCAN_WORKERS`` setting, and is only used
+        for backends that support it. The resulting state is the same as
+        that of a serial scan.
+
+        Args:
+            use_cache (bool, optional):
+                Whether the on-disk state cache may be used, if configured.
+
+            workers (int, optional):
+                The number of worker threads to scan tables with. This
+                defaults to the ``DJANGO_EVOLUTION_STATE_SCAN_WORKERS``
+                setting, or 1.
         """
-        evolver = EvolutionOperationsMulti(self.db_name).get_evolver()
-        connection = evolver.connection
-        introspection = connection.introspection
-        cursor = connection.cursor()
+        evolver = get_evolution_operations(self.db_name)
+        cache_path = None
+        fingerprint = None
+
+        if use_cache:
+            cache_path = self._get_cache_path(evolver.connection)
+
+            if cache_path:
+                fingerprint = evolver.get_schema_fingerprint()
+
+                if (fingerprint is not None and
+                    self._load_cache(cache_path, fingerprint)):
+                    return
+
+        if workers is None:
+            workers = getattr(settings, 'DJANGO_EVOLUTION_STATE_SCAN_WORKERS',
+                              1)
+
+        introspection = evolver.connection.introspection
+        table_names = []
 
-        for table_name in introspection.get_table_list(cursor):
-            if hasattr(table_name, 'name'):
-                # Django >= 1.7
-                table_name = table_name.name
+        with evolver.introspection_session() as cursor:
+            for table_name in introspection.get_table_list(cursor):
+                if hasattr(table_name, 'name'):
+                    # Django >= 1.7
+                    table_name = table_name.name
 
-            if self.has_table(table_name):
-                self.clear_indexes(table_name)
-            else:
-                self.add_table(table_name)
+                table_names.append(table_name)
 
-            indexes = evolver.get_indexes_for_table(table_name)
+        if (workers > 1 and
+            evolver.supports_parallel_introspection and
+            len(table_names) > 1):
+            table_infos = self._scan_tables_parallel(table_names, workers)
+        else:
+            table_infos = self._scan_tables(evolver, table_names)
 
-            for index_name, index_info in six.iteritems(indexes):
+        # Tables are always added in the order the database listed them, so
+        # the state is the same regardless of how the scan was split up.
+        for table_name in table_names:
+            table_info = table_infos[table_name]
+
+            # Any previously-tracked information for this table is replaced.
+            self.add_table(table_name)
+
+            for index_name, index_info in six.iteritems(
+                    table_info['indexes']):
                 self.add_index(table_name=table_name,
                                index_name=index_name,
                                columns=index_info['columns'],
                                unique=index_info['unique'])
+
+            for column_name, column_info in six.iteritems(
+                    table_info['columns']):
+                self.add_column(table_name=table_name,
+                                column_name=column_name,
+                                data_type=column_info['type'],
+                                null=column_info['null'],
+                                max_length=column_info['max_length'])
+
+            for name, foreign_key_info in six.iteritems(
+                    table_info['foreign_keys']):
+                self.add_foreign_key(table_name=table_name,
+                                     name=name,
+                                     column=foreign_key_info['column'],
+                                     to_table=foreign_key_info['to_table'],
+                                     to_column=foreign_key_info['to_column'],
+                                     validated=foreign_key_info.get(
+                                         'validated', True))
+
+        if cache_path and fingerprint is not None:
+            self._save_cache(cache_path, fingerprint, table_names)
+
+    def _scan_tables(self, evolver, table_names):
+        """Scan information on a list of tables from the database.
+
+        All queries are made in a single introspection session, reusing one
+        cursor.
+
+        Args:
+            evolver (django_evolution.db.common.BaseEvolutionOperations):
+                The evolution operations for the database connection to
+                scan with.
+
+            table_names (list of unicode):
+                The names of the tables to scan.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to dictionaries containing
+            ``indexes``, ``columns``, and ``foreign_keys`` keys.
+        """
+        with evolver.introspection_session() as cursor:
+            columns = evolver.get_columns_for_tables(table_names,
+                                                     cursor=cursor)
+            foreign_keys = evolver.get_foreign_keys_for_tables(table_names,
+                                                               cursor=cursor)
+
+            return dict(
+                (table_name, {
+                    'indexes': evolver.get_indexes_for_table(table_name,
+                                                             cursor=cursor),
+                    'columns': columns.get(table_name, {}),
+                    'foreign_keys': foreign_keys.get(table_name, {}),
+                })
+                for table_name in table_names
+            )
+
+    def _scan_tables_parallel(self, table_names, workers):
+        """Scan information on a list of tables using worker threads.
+
+        The tables are split into one shard per worker. Each worker scans its
+        shard over its own database connection, which is closed once the
+        worker is finished.
+
+        Args:
+            table_names (list of unicode):
+                The names of the tables to scan.
+
+            workers (int):
+                The number of worker threads to use.
+
+        Returns:
+            dict:
+            A dictionary mapping table names to dictionaries containing
+            ``indexes``, ``columns``, and ``foreign_keys`` keys.
+
+        Raises:
+            Exception:
+                An error raised by a worker while scanning. The first error
+                encountered is re-raised once all workers have finished.
+        """
+        shards = [
+            table_names[i::workers]
+            for i in range(min(workers, len(table_names)))
+        ]
+        results = [None] * len(shards)
+        errors = [None] * len(shards)
+
+        def _scan_shard(i):
+            # Django's database connections are local to each thread, so
+            # this creates a new connection for the worker.
+            try:
+                evolver = get_evolution_operations(self.db_name)
+
+                try:
+                    results[i] = self._scan_tables(evolver, shards[i])
+                finally:
+                    evolver.connection.close()
+            except Exception as e:
+                errors[i] = e
+
+        threads = [
+            threading.Thread(target=_scan_shard, args=(i,))
+            for i in range(len(shards))
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        for error in errors:
+            if error is not None:
+                raise error
+
+        table_infos = {}
+
+        for result in results:
+            table_infos.update(result)
+
+        return table_infos
+
+    def _serialize_table(self, table_info):
+        """Return a JSON-compatible representation of a table's state.
+
+        Args:
+            table_info (dict):
+                The tracked state for the table.
+
+        Returns:
+            dict:
+            The serialized table state.
+        """
+        return {
+            'columns': [
+                {
+                    'name': column_state.name,
+                    'data_type': column_state.data_type,
+                    'null': column_state.null,
+                    'max_length': column_state.max_length,
+                }
+                for column_state in six.itervalues(table_info['columns'])
+            ],
+            'foreign_keys': dict(
+                (foreign_key_state.name, {
+                    'column': foreign_key_state.column,
+                    'to_table': foreign_key_state.to_table,
+                    'to_column': foreign_key_state.to_column,
+                    'validated': foreign_key_state.validated,
+                })
+                for foreign_key_state in six.itervalues(
+                    table_info['foreign_keys'])
+            ),
+            'indexes': dict(
+                (index_state.name, {
+                    'columns': index_state.columns,
+                    'unique': index_state.unique,
+                })
+                for index_state in six.itervalues(table_info['indexes'])
+            ),
+        }
+
+    def _deserialize_table(self, table_data):
+        """Return a table's state from its serialized representation.
+
+        Args:
+            table_data (dict):
+                The serialized table state, from :py:meth:`_serialize_table`.
+
+        Returns:
+            dict:
+            The state for the table.
+
+        Raises:
+            AssertionError:
+                The serialized state contained invalid values.
+
+            KeyError:
+                The serialized state was missing information.
+
+            TypeError:
+                The serialized state was invalid.
+        """
+        columns = OrderedDict()
+
+        for column_info in table_data['columns']:
+            column_name = column_info['name']
+            columns[column_name] = ColumnState(
+                name=column_name,
+                data_type=column_info['data_type'],
+                null=column_info['null'],
+                max_length=column_info['max_length'])
+
+        return {
+            'columns': columns,
+            'foreign_keys': dict(
+                (name, ForeignKeyState(name=name, **foreign_key_info))
+                for name, foreign_key_info in six.iteritems(
+                    table_data['foreign_keys'])
+            ),
+            'indexes': dict(
+                (index_name,
+                 IndexState(name=index_name,
+                            columns=index_info['columns'],
+                            unique=index_info['unique']))
+                for index_name, index_info in six.iteritems(
+                    table_data['indexes'])
+            ),
+        }
+
+    def _get_cache_path(self, connection):
+        """Return the path to the state cache file for the database.
+
+        The filename is based on a hash of the database's connection
+        settings, so that different databases sharing a cache directory
+        won't collide.
+
+        Args:
+            connection (object):
+                The database connection.
+
+        Returns:
+            unicode:
+            The path to the cache file, or ``None`` if caching is disabled.
+        """
+        cache_dir = getattr(settings, 'DJANGO_EVOLUTION_STATE_CACHE_DIR',
+                            None)
+
+        if not cache_dir:
+            return None
+
+        settings_dict = connection.settings_dict
+        key = '\0'.join(
+            six.text_type(value)
+            for value in (self.db_name,
+                          settings_dict.get('ENGINE'),
+                          settings_dict.get('NAME'),
+                          settings_dict.get('HOST'),
+                          settings_dict.get('PORT'))
+        )
+
+        return os.path.join(
+            cache_dir,
+            'db-state-%s.json' % hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _load_cache(self, cache_path, fingerprint):
+        """Load state from the cache file, if valid.
+
+        As with a scan, the state of each cached table replaces any
+        previously-tracked information for that table. Other tracked tables
+        are left alone.
+
+        Args:
+            cache_path (unicode):
+                The path to the cache file.
+
+            fingerprint (unicode):
+                The current schema fingerprint of the database.
+
+        Returns:
+            bool:
+            ``True`` if the state was loaded from the cache. ``False`` if the
+            cache was missing, stale, or could not be read.
+        """
+        try:
+            with open(cache_path, 'r') as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return False
+
+        if (not isinstance(data, dict) or
+            data.get('version') != self.CACHE_FORMAT_VERSION or
+            data.get('fingerprint') != fingerprint):
+            return False
+
+        tables = {}
+
+        try:
+            for table_name, table_data in six.iteritems(data['tables']):
+                tables[table_name] = self._deserialize_table(table_data)
+        except (AssertionError, KeyError, TypeError) as e:
+            logging.warning('Ignoring invalid database state cache "%s": %s',
+                            cache_path, e)
+            return False
+
+        self._tables.update(tables)
+
+        return True
+
+    def _save_cache(self, cache_path, fingerprint, table_names):
+        """Save the state of scanned tables to the cache file.
+
+        Only the tables found in the database are written. Any other tables
+        being tracked (such as those added to simulate changes) are left
+        out.
+
+        The file is written to a temporary location and then moved into
+        place, so that concurrent readers never see a partial file.
+
+        Args:
+            cache_path (unicode):
+                The path to the cache file.
+
+            fingerprint (unicode):
+                The schema fingerprint the state corresponds to.
+
+            table_names (list of unicode):
+                The names of the tables that were scanned.
+        """
+        data = {
+            'version': self.CACHE_FORMAT_VERSION,
+            'fingerprint': fingerprint,
+            'tables': dict(
+                (table_name, self._serialize_table(self._tables[table_name]))
+                for table_name in table_names
+            ),
+        }
+
+        cache_dir = os.path.dirname(cache_path)
+
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+
+            fd, temp_path = tempfile.mkstemp(prefix='.db-state-',
+                                             dir=cache_dir)
+
+            try:
+                with os.fdopen(fd, 'w') as fp:
+                    json.dump(data, fp)
+
+                if os.name == 'nt' and os.path.exists(cache_path):
+                    os.unlink(cache_path)
+
+                os.rename(temp_path, cache_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except (IOError, OSError) as e:
+            logging.warning('Unable to write database state cache "%s": %s',
+                            cache_path, e)
@@ -0,0 +1,325 @@
+"""Support for detecting drift between signatures and the database."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils import six
+
+from django_evolution.compat.datastructures import OrderedDict
+from django_evolution.compat.models import get_remote_field
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.state import DatabaseState
+from django_evolution.mock_models import MockModel
+from django_evolution.signature import ProjectSignature
+
+
+class SchemaDrift(object):
+    """Detects drift between a project signature and the database.
+
+    A project signature describes what the database is expected to look
+    like. If the database was modified outside of Django Evolution (or an
+    evolution failed partway through), the actual schema may no longer
+    match. This compares the two and records any problems found, without
+    making any changes.
+
+    The results are stored in :py:attr:`problems`::
+
+        self.problems = {
+            app_label: {
+                model_name: [ list of problem descriptions ]
+            }
+        }
+
+    Only tables, columns, and indexes belonging to models in the signature
+    are checked. Tables in the database that aren't known to the signature
+    are ignored.
+    """
+
+    def __init__(self, project_sig, database_state, database_name):
+        """Initialize the object.
+
+        Args:
+            project_sig (django_evolution.signature.ProjectSignature):
+                The project signature that the database is expected to match.
+
+            database_state (django_evolution.db.state.DatabaseState):
+                The scanned state of the database.
+
+            database_name (unicode):
+                The name of the database being checked.
+        """
+        assert isinstance(project_sig, ProjectSignature), \
+               'project_sig must be a ProjectSignature instance'
+        assert isinstance(database_state, DatabaseState), \
+               'database_state must be a DatabaseState instance'
+
+        self.project_sig = project_sig
+        self.database_state = database_state
+        self.database_name = database_name
+        self.problems = OrderedDict()
+
+        evolver = get_evolution_operations(database_name, database_state)
+        self._evolver = evolver
+        self._check_foreign_keys = evolver.supports_constraints
+
+        for app_sig in project_sig.app_sigs:
+            for model_sig in app_sig.model_sigs:
+                model = MockModel(project_sig=project_sig,
+                                  app_name=app_sig.app_id,
+                                  model_name=model_sig.model_name,
+                                  model_sig=model_sig,
+                                  db_name=database_name)
+                problems = self._check_model(model, model_sig)
+
+                if problems:
+                    self.problems.setdefault(app_sig.app_id, OrderedDict())[
+                        model_sig.model_name] = problems
+
+    def is_empty(self):
+        """Return whether any drift was found.
+
+        Returns:
+            bool:
+            ``True`` if the database matches the signature. ``False`` if
+            any problems were found.
+        """
+        return not self.problems
+
+    def __str__(self):
+        """Return a string description of the drift.
+
+        This will describe the problems found, for human consumption.
+
+        Returns:
+            unicode:
+            The string representation of the drift.
+        """
+        lines = []
+
+        for app_label, app_problems in six.iteritems(self.problems):
+            for model_name, problems in six.iteritems(app_problems):
+                lines.append('In model %s.%s:' % (app_label, model_name))
+                lines += [
+                    '    %s' % problem
+                    for problem in problems
+                ]
+
+        return '\n'.join(lines)
+
+    def _check_model(self, model, model_sig):
+        """Check a model against the database state.
+
+        Args:
+            model (django_evolution.mock_models.MockModel):
+                The mock model built from the signature.
+
+            model_sig (django_evolution.signature.ModelSignature):
+                The signature for the model.
+
+        Returns:
+            list of unicode:
+            The list of problems found for the model.
+        """
+        database_state = self.database_state
+        meta = model._meta
+        table_name = meta.db_table
+
+        if not database_state.has_table(table_name):
+            return ['Table "%s" does not exist' % table_name]
+
+        problems = []
+        expected_columns = set()
+
+        for field in meta.local_fields:
+            column = field.column
+            expected_columns.add(column)
+            problems += self._check_field(table_name, field)
+
+        for column_state in database_state.iter_columns(table_name):
+            if column_state.name not in expected_columns:
+                problems.append('Column "%s" is not in the signature'
+                                % column_state.name)
+
+        for field in meta.local_many_to_many:
+            through = get_remote_field(field).through
+
+            if (through is not None and
+                through._meta.auto_created and
+                not database_state.has_table(through._meta.db_table)):
+                problems.append(
+                    'Table "%s" for field "%s" does not exist'
+                    % (through._meta.db_table, field.name))
+
+        for field_names in model_sig.unique_together:
+            columns = self._get_columns(meta, field_names)
+
+            if not self._has_index(table_name, columns, unique=True):
+                problems.append('Unique index on %s does not exist'
+                                % self._format_columns(columns))
+
+        for field_names in model_sig.index_together:
+            columns = self._get_columns(meta, field_names)
+
+            if not self._has_index(table_name, columns, ordered=True):
+                problems.append('Index on %s does not exist'
+                                % self._format_columns(columns))
+
+        for index_sig in model_sig.index_sigs:
+            columns = self._get_columns(meta, index_sig.fields)
+
+            if not ((index_sig.name and
+                     database_state.get_index(table_name=table_name,
+                                              index_name=index_sig.name)) or
+                    self._has_index(table_name, columns, ordered=True)):
+                problems.append('Index on %s does not exist'
+                                % self._format_columns(columns))
+
+        return problems
+
+    def _check_field(self, table_name, field):
+        """Check a field's column against the database state.
+
+        Args:
+            table_name (unicode):
+                The name of the field's table.
+
+            field (django.db.models.Field):
+                The field to check.
+
+        Returns:
+            list of unicode:
+            The list of problems found for the field.
+        """
+        column = field.column
+        column_state = self.database_state.get_column(table_name, column)
+
+        if column_state is None:
+            return ['Column "%s" does not exist' % column]
+
+        problems = []
+
+        if not field.primary_key and column_state.null != field.null:
+            if field.null:
+                problems.append('Column "%s" does not allow NULL values'
+                                % column)
+            else:
+                problems.append('Column "%s" allows NULL values' % column)
+
+        evolver = self._evolver
+        db_type = evolver.get_field_db_type(field)
+
+        if (db_type is not None and
+            column_state.data_type and
+            (evolver.normalize_column_type(column_state.data_type) !=
+             evolver.normalize_column_type(db_type))):
+            problems.append('Column "%s" has a type of "%s" instead of "%s"'
+                            % (column, column_state.data_type, db_type))
+
+        max_length = getattr(field, 'max_length', None)
+
+        if (max_length is not None and
+            column_state.max_length is not None and
+            column_state.max_length != max_length):
+            problems.append(
+                'Column "%s" has a max_length of %s instead of %s'
+                % (column, column_state.max_length, max_length))
+
+        if field.primary_key:
+            pass
+        elif field.unique:
+            if not self._has_index(table_name, [column], unique=True):
+                problems.append('Unique index on "%s" does not exist'
+                                % column)
+        elif field.db_index:
+            if not self._has_index(table_name, [column]):
+                problems.append('Index on "%s" does not exist' % column)
+
+        remote_field = get_remote_field(field)
+
+        if (self._check_foreign_keys and
+            remote_field is not None and
+            isinstance(field, models.ForeignKey) and
+            getattr(field, 'db_constraint', True)):
+            foreign_key_state = self.database_state.find_foreign_key(
+                table_name, column)
+            to_table = remote_field.model._meta.db_table
+
+            if foreign_key_state is None:
+                problems.append('Foreign key on "%s" does not exist'
+                                % column)
+            elif foreign_key_state.to_table != to_table:
+                problems.append(
+                    'Foreign key on "%s" references "%s" instead of "%s"'
+                    % (column, foreign_key_state.to_table, to_table))
+            elif not foreign_key_state.validated:
+                problems.append('Foreign key on "%s" has not been validated'
+                                % column)
+
+        return problems
+
+    def _get_columns(self, meta, field_names):
+        """Return the column names for a list of field names.
+
+        Args:
+            meta (django_evolution.mock_models.MockMeta):
+                The model's meta information.
+
+            field_names (list of unicode):
+                The names of the fields.
+
+        Returns:
+            list of unicode:
+            The column names.
+        """
+        return [
+            meta.get_field(field_name).column
+            for field_name in field_names
+        ]
+
+    def _format_columns(self, columns):
+        """Return a human-readable list of columns.
+
+        Args:
+            columns (list of unicode):
+                The column names.
+
+        Returns:
+            unicode:
+            The formatted list of column names.
+        """
+        return ', '.join(
+            '"%s"' % column
+            for column in columns
+        )
+
+    def _has_index(self, table_name, columns, unique=False, ordered=False):
+        """Return whether a matching index exists in the database state.
+
+        Args:
+            table_name (unicode):
+                The name of the table.
+
+            columns (list of unicode):
+                The columns the index must cover.
+
+            unique (bool, optional):
+                Whether the index must be unique.
+
+            ordered (bool, optional):
+                Whether the columns must appear in the given order.
+
+        Returns:
+            bool:
+            ``True`` if a matching index exists. ``False`` if it does not.
+        """
+        for index_state in self.database_state.iter_indexes(table_name):
+            if unique and not index_state.unique:
+                continue
+
+            if ordered:
+                if list(index_state.columns) == list(columns):
+                    return True
+            elif set(index_state.columns) == set(columns):
+                return True
+
+        return False
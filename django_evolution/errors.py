@@ -28,10 +28,14 @@ class EvolutionExecutionError(EvolutionException):
 
         last_sql_statement (unicode):
             The last SQL statement that was executed. This may be ``None``.
+
+        pending_sql (list of unicode):
+            SQL statements that were not run, but are part of the recorded
+            evolution, and must be run manually. This may be ``None``.
     """
 
     def __init__(self, msg, app_label=None, detailed_error=None,
-                 last_sql_statement=None):
+                 last_sql_statement=None, pending_sql=None):
         """Initialize the error.
 
         Args:
@@ -47,12 +51,17 @@ class EvolutionExecutionError(EvolutionException):
 
             last_sql_statement (unicode, optional):
                 The last SQL statement that was executed.
+
+            pending_sql (list of unicode, optional):
+                SQL statements that were not run, but are part of the
+                recorded evolution.
         """
         super(EvolutionExecutionError, self).__init__(msg)
 
         self.app_label = app_label
         self.detailed_error = detailed_error
         self.last_sql_statement = last_sql_statement
+        self.pending_sql = pending_sql
 
 
 class CannotSimulate(EvolutionException):
@@ -13,8 +13,11 @@ from django.utils.translation import ugettext as _
 
 from django_evolution.builtin_evolutions import BUILTIN_SEQUENCES
 from django_evolution.compat.apps import get_apps
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.sql_cache import CompiledSQLCache
 from django_evolution.db.state import DatabaseState
 from django_evolution.diff import Diff
+from django_evolution.drift import SchemaDrift
 from django_evolution.errors import (EvolutionBaselineMissingError,
                                      EvolutionException,
                                      EvolutionTaskAlreadyQueuedError,
@@ -28,7 +31,10 @@ from django_evolution.mutations import (AddField,
 from django_evolution.mutators import AppMutator
 from django_evolution.signals import applied_evolution, applying_evolution
 from django_evolution.signature import ProjectSignature
-from django_evolution.utils import execute_sql, get_app_label, get_app_name
+from django_evolution.utils import (EvolutionFileSQL, execute_sql,
+                                    get_app_label, get_app_name,
+                                    get_sql_text,
+                                    split_non_transactional_sql)
 
 
 class BaseEvolutionTask(object):
@@ -52,11 +58,22 @@ class BaseEvolutionTask(object):
         id (unicode):
             The unique ID for the task.
 
+        lock_timeout_retries (int):
+            The number of times statements for the task were retried after
+            failing due to a lock timeout.
+
+            This is set after calling :py:meth:`execute`.
+
         new_evolutions (list of django_evolution.models.Evolution):
             A list of evolution model entries this task would create.
 
             This is set after calling :py:meth:`prepare`.
 
+        non_transactional_sql (list):
+            A list of SQL statements to perform for the task that can't be
+            run inside a transaction, such as concurrent index builds. These
+            are executed after the evolution's transaction is committed.
+
         sql (list):
             A list of SQL statements to perform for the task. Each entry can
             be a string or tuple accepted by
@@ -80,6 +97,8 @@ class BaseEvolutionTask(object):
         self.evolution_required = False
         self.new_evolutions = []
         self.sql = []
+        self.non_transactional_sql = []
+        self.lock_timeout_retries = 0
 
     def is_mutation_mutable(self, mutation, **kwargs):
         """Return whether a mutation is mutable.
@@ -114,7 +133,8 @@ class BaseEvolutionTask(object):
 
         This is responsible for determining whether the task applies to the
         database. It must set :py:attr:`evolution_required`,
-        :py:attr:`new_evolutions`, and :py:attr:`sql`.
+        :py:attr:`new_evolutions`, and :py:attr:`sql`, and may set
+        :py:attr:`non_transactional_sql`.
 
         This must be called before :py:meth:`execute` or
         :py:meth:`get_evolution_content`.
@@ -144,6 +164,43 @@ class BaseEvolutionTask(object):
         """
         raise NotImplementedError
 
+    def execute_non_transactional(self, cursor):
+        """Execute the task's SQL that can't be run in a transaction.
+
+        This is called once the evolution's transaction has been committed,
+        and runs any statements in :py:attr:`non_transactional_sql`.
+
+        By this point, the new signature has been recorded. If a statement
+        fails, it and any statements after it will be listed in the error's
+        ``pending_sql``, so that they can be run manually.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute queries.
+
+        Raises:
+            django_evolution.errors.EvolutionExecutionError:
+                The SQL failed. Details are in the error.
+        """
+        database_name = self.evolver.database_name
+        sql = self.non_transactional_sql
+
+        for i, statement in enumerate(sql):
+            try:
+                self.lock_timeout_retries += execute_sql(
+                    cursor, [statement], database_name)
+            except Exception as e:
+                raise EvolutionExecutionError(
+                    _('Error running SQL outside of the transaction for '
+                      '%s: %s. All other changes have been committed, and '
+                      'the new signature has been recorded. The SQL that '
+                      'was not run must be run manually.')
+                    % (self, e),
+                    app_label=getattr(self, 'app_label', None),
+                    detailed_error=six.text_type(e),
+                    last_sql_statement=getattr(e, 'last_sql_statement'),
+                    pending_sql=get_sql_text(sql[i:], database_name))
+
     def get_evolution_content(self):
         """Return the content for an evolution file for this task.
 
@@ -205,7 +262,8 @@ class PurgeAppTask(BaseEvolutionTask):
             app_mutator.run_mutation(mutation)
 
             self.evolution_required = True
-            self.sql = app_mutator.to_sql()
+            self.sql, self.non_transactional_sql = \
+                split_non_transactional_sql(app_mutator.iter_sql())
 
         self.can_simulate = True
         self.new_evolutions = []
@@ -225,7 +283,8 @@ class PurgeAppTask(BaseEvolutionTask):
         """
         if self.evolution_required:
             try:
-                execute_sql(cursor, self.sql, self.evolver.database_name)
+                self.lock_timeout_retries += execute_sql(
+                    cursor, self.sql, self.evolver.database_name)
             except Exception as e:
                 raise EvolutionExecutionError(
                     _('Error purging app "%s": %s')
@@ -256,6 +315,12 @@ class EvolveAppTask(BaseEvolutionTask):
 
         app_label (unicode):
             The app label for the app to evolve.
+
+        table_rewrites_saved (int):
+            The number of times a table no longer needs to be altered,
+            due to operations being reordered so they could be combined.
+
+            This is set after calling :py:meth:`prepare`.
     """
 
     def __init__(self, evolver, app, evolutions=None):
@@ -282,6 +347,7 @@ class EvolveAppTask(BaseEvolutionTask):
 
         self.app_label = get_app_label(app)
         self.app = app
+        self.table_rewrites_saved = 0
         self._evolutions = evolutions
         self._mutations = None
 
@@ -291,6 +357,10 @@ class EvolveAppTask(BaseEvolutionTask):
         This will determine if there are any unapplied evolutions in the app,
         and record that state and the SQL needed to apply the evolutions.
 
+        If a SQL cache directory is configured, previously-compiled SQL for
+        the same starting signature and mutations will be reused, rather
+        than simulating the mutations and generating the SQL again.
+
         Args:
             hinted (bool):
                 Whether to prepare the task for hinted evolutions.
@@ -328,12 +398,48 @@ class EvolveAppTask(BaseEvolutionTask):
         ]
 
         if mutations:
-            app_mutator = AppMutator.from_evolver(evolver=evolver,
-                                                  app_label=self.app_label)
-            app_mutator.run_mutations(mutations)
+            sql_cache = evolver.sql_cache
+            cache_key = sql_cache.get_key(app_label=app_label,
+                                          project_sig=evolver.project_sig,
+                                          mutations=mutations)
+            compiled_sql = None
+
+            if cache_key is not None:
+                compiled_sql = sql_cache.load(cache_key)
+
+            if compiled_sql is not None:
+                compiled_sql.apply_to_project_sig(evolver.project_sig)
+                compiled_sql.apply_to_database_state(evolver.database_state)
+
+                self.can_simulate = compiled_sql.can_simulate
+                self.sql, self.non_transactional_sql = \
+                    split_non_transactional_sql(compiled_sql.sql)
+                self.table_rewrites_saved = compiled_sql.table_rewrites_saved
+            else:
+                if cache_key is not None:
+                    old_project_sig = evolver.project_sig.clone()
+                    old_database_state = evolver.database_state.clone()
+
+                app_mutator = AppMutator.from_evolver(evolver=evolver,
+                                                      app_label=app_label)
+                app_mutator.run_mutations(mutations)
+
+                self.can_simulate = app_mutator.can_simulate
+                self.sql, self.non_transactional_sql = \
+                    split_non_transactional_sql(app_mutator.iter_sql())
+                self.table_rewrites_saved = app_mutator.table_rewrites_saved
+
+                if cache_key is not None:
+                    sql_cache.save(
+                        key=cache_key,
+                        sql=self.sql + self.non_transactional_sql,
+                        can_simulate=self.can_simulate,
+                        table_rewrites_saved=self.table_rewrites_saved,
+                        old_project_sig=old_project_sig,
+                        new_project_sig=evolver.project_sig,
+                        old_database_state=old_database_state,
+                        new_database_state=evolver.database_state)
 
-            self.can_simulate = app_mutator.can_simulate
-            self.sql = app_mutator.to_sql()
             self.evolution_required = True
             self.new_evolutions = [
                 Evolution(app_label=app_label,
@@ -365,7 +471,8 @@ class EvolveAppTask(BaseEvolutionTask):
                                     task=self)
 
             try:
-                execute_sql(cursor, self.sql, self.evolver.database_name)
+                self.lock_timeout_retries += execute_sql(
+                    cursor, self.sql, self.evolver.database_name)
             except Exception as e:
                 raise EvolutionExecutionError(
                     _('Error applying evolution for %s: %s')
@@ -477,6 +584,9 @@ class Evolver(object):
             The project signature. This will start off as the previous
             signature stored in the database, but will be modified when
             mutations are simulated.
+
+        sql_cache (django_evolution.db.sql_cache.CompiledSQLCache):
+            The cache of SQL compiled for evolving apps.
     """
 
     def __init__(self, hinted=False, database_name=DEFAULT_DB_ALIAS):
@@ -499,6 +609,7 @@ class Evolver(object):
         self.evolved = False
 
         self.database_state = DatabaseState(self.database_name)
+        self.sql_cache = CompiledSQLCache(self.database_name)
         self._target_project_sig = \
             ProjectSignature.from_database(database_name)
 
@@ -582,6 +693,33 @@ class Evolver(object):
 
         return Diff(self.project_sig, self._target_project_sig)
 
+    def get_schema_drift(self):
+        """Return the drift between the stored signature and the database.
+
+        This compares the project signature stored in the database against
+        the database's actual schema, reporting anything that was changed
+        outside of Django Evolution.
+
+        If tasks have already been prepared, the database will be rescanned,
+        since preparing tasks modifies the tracked state.
+
+        Returns:
+            django_evolution.drift.SchemaDrift:
+            The drift between the stored signature and the database.
+        """
+        if self._tasks_prepared:
+            database_state = DatabaseState(self.database_name)
+            project_sig = \
+                Version.objects.current_version(
+                    using=self.database_name).signature
+        else:
+            database_state = self.database_state
+            project_sig = self.project_sig
+
+        return SchemaDrift(project_sig=project_sig,
+                           database_state=database_state,
+                           database_name=self.database_name)
+
     def iter_evolution_content(self):
         """Generate the evolution content for all queued tasks.
 
@@ -720,6 +858,9 @@ class Evolver(object):
         a database transaction, tracking each new batch of evolutions as the
         tasks finish.
 
+        Any SQL that can't be run in a transaction (such as concurrent index
+        builds) will be run once the transaction has been committed.
+
         This can only be called once per evolver instance.
 
         Raises:
@@ -739,8 +880,31 @@ class Evolver(object):
         self._prepare_tasks()
 
         connection = connections[self.database_name]
+        evolver = get_evolution_operations(self.database_name,
+                                           self.database_state)
+
+        with evolver.lock_timeout():
+            self._evolve(connection, evolver)
+
+    def _evolve(self, connection, evolver):
+        """Perform the evolution with a prepared connection.
+
+        Args:
+            connection (django.db.backends.base.base.BaseDatabaseWrapper):
+                The connection to the database being evolved.
+
+            evolver (django_evolution.db.common.BaseEvolutionOperations):
+                The evolution operations for the database.
+
+        Raises:
+            django_evolution.errors.EvolutionException:
+                Something went wrong during the evolution process.
 
-        with connection.constraint_checks_disabled():
+            django_evolution.errors.EvolutionExecutionError:
+                A specific evolution task failed. Details are in the error.
+        """
+        with connection.constraint_checks_disabled(), \
+             evolver.bulk_evolution():
             with transaction.atomic(using=self.database_name):
                 cursor = connection.cursor()
                 new_evolutions = []
@@ -771,6 +935,31 @@ class Evolver(object):
 
         self.evolved = True
 
+        tasks = [
+            task
+            for task in self.tasks
+            if task.non_transactional_sql
+        ]
+
+        if tasks:
+            cursor = connection.cursor()
+
+            try:
+                for i, task in enumerate(tasks):
+                    try:
+                        task.execute_non_transactional(cursor)
+                    except EvolutionExecutionError as e:
+                        # Later tasks' SQL won't be run either, and is part
+                        # of the recorded evolution.
+                        for later_task in tasks[i + 1:]:
+                            e.pending_sql += get_sql_text(
+                                later_task.non_transactional_sql,
+                                self.database_name)
+
+                        raise
+            finally:
+                cursor.close()
+
     def _prepare_tasks(self):
         """Prepare all queued tasks for further operations.
 
@@ -780,9 +969,25 @@ class Evolver(object):
         if not self._tasks_prepared:
             self._tasks_prepared = True
 
-            for task in self.tasks:
+            tasks = list(six.itervalues(self._tasks))
+
+            for task in tasks:
                 task.prepare(hinted=self.hinted)
 
+            # Statements run after the transaction is committed can't be
+            # depended on by SQL in the transaction for later tasks. Any
+            # that are will be run in the transaction instead.
+            later_sql = []
+
+            for task in reversed(tasks):
+                if task.non_transactional_sql and later_sql:
+                    task.sql, task.non_transactional_sql = \
+                        split_non_transactional_sql(
+                            task.sql + task.non_transactional_sql,
+                            later_sql=later_sql)
+
+                later_sql = task.sql + later_sql
+
 
 def get_evolution_sequence(app):
     """Return the list of evolution labels for a Django app.
@@ -885,11 +1090,8 @@ def get_mutations(app, evolution_labels, database=DEFAULT_DB_ALIAS):
 
         for filename in filenames:
             if os.path.exists(filename):
-                sql_file = open(filename, 'r')
-                sql = sql_file.readlines()
-                sql_file.close()
-
-                mutations.append(SQLMutation(label, sql))
+                mutations.append(SQLMutation(label,
+                                             [EvolutionFileSQL(filename)]))
 
                 found = True
                 break
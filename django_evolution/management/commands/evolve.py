@@ -12,10 +12,15 @@ from django.db.utils import DEFAULT_DB_ALIAS
 from django.dispatch import receiver
 from django.utils import six
 from django.utils.six.moves import input
-from django.utils.translation import ngettext, ugettext as _
+from django.utils.translation import (ngettext, ngettext_lazy,
+                                      ugettext as _)
 
 from django_evolution.compat.apps import get_app
 from django_evolution.compat.commands import BaseCommand
+from django_evolution.compat.db import get_name_cache_stats
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.estimate import (CostEstimator, StatementCost,
+                                          summarize_costs)
 from django_evolution.errors import EvolutionException
 from django_evolution.evolve import EvolveAppTask, Evolver, PurgeAppTask
 from django_evolution.signals import applied_evolution, applying_evolution
@@ -64,6 +69,14 @@ class Command(BaseCommand):
             dest='compile_sql',
             default=False,
             help=_('Display the evolutions as SQL.'))
+        parser.add_argument(
+            '--estimate',
+            action='store_true',
+            dest='estimate',
+            default=False,
+            help=_('When used with --sql, annotate each SQL statement with '
+                   'its estimated cost, based on the sizes of the tables it '
+                   'works with.'))
         parser.add_argument(
             '-w',
             '--write',
@@ -81,6 +94,14 @@ class Command(BaseCommand):
             dest='execute',
             default=False,
             help=_('Apply evolutions to the database.'))
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            dest='verify',
+            default=False,
+            help=_('Check that the database schema matches the stored '
+                   'evolution signature, and report any differences. No '
+                   'changes will be made.'))
         parser.add_argument(
             '--database',
             action='store',
@@ -115,9 +136,11 @@ class Command(BaseCommand):
 
         hint = options['hint']
         compile_sql = options['compile_sql']
+        self.estimate = options['estimate']
         database_name = options['database'] or DEFAULT_DB_ALIAS
         execute = options['execute']
         interactive = options['interactive']
+        verify = options['verify']
         write_evolution_name = options['write_evolution_name']
 
         if app_labels and self.execute:
@@ -128,10 +151,26 @@ class Command(BaseCommand):
         if write_evolution_name and not hint:
             raise CommandError(_('--write cannot be used without --hint.'))
 
+        if self.estimate and not compile_sql:
+            raise CommandError(_('--estimate cannot be used without --sql.'))
+
+        if verify and (execute or hint or compile_sql or self.purge):
+            raise CommandError(
+                _('--verify cannot be used with --execute, --hint, --sql, '
+                  'or --purge.'))
+
+        # Keep track of the name cache statistics at the start of the run,
+        # so that the lookups made during the run can be shown.
+        self.start_name_cache_stats = get_name_cache_stats()
+
         try:
             self.evolver = Evolver(database_name=database_name,
                                    hinted=hint)
 
+            if verify:
+                self._verify_schema()
+                return
+
             # Figure out what tasks we need to add to the evolver. This
             # must be done before we check any state (as that will finalize
             # the task list).
@@ -183,6 +222,28 @@ class Command(BaseCommand):
         except EvolutionException as e:
             raise CommandError(six.text_type(e))
 
+    def _verify_schema(self):
+        """Check the database schema against the stored signature.
+
+        Any differences found will be displayed, and will cause the command
+        to fail.
+
+        Raises:
+            django.core.management.base.CommandError:
+                The database schema does not match the stored signature.
+        """
+        drift = self.evolver.get_schema_drift()
+
+        if drift.is_empty():
+            if self.verbosity > 0:
+                self.stdout.write(_('The database matches the stored '
+                                    'signature.\n'))
+        else:
+            self.stderr.write('%s\n' % drift)
+
+            raise CommandError(
+                _('The database does not match the stored signature.'))
+
     def _add_tasks(self, app_labels):
         """Add tasks to the evolver, based on the command options.
 
@@ -371,26 +432,178 @@ class Command(BaseCommand):
                     _('The SQL statement that failed was: %s\n')
                     % e.last_sql_statement)
 
+            if getattr(e, 'pending_sql', None):
+                self.stderr.write(
+                    _('The following SQL has not been run, and must be run '
+                      'manually:\n'))
+
+                for statement in e.pending_sql:
+                    self.stderr.write('%s\n' % statement)
+
             raise CommandError(six.text_type(e))
 
+        if verbosity > 0:
+            for task in evolver.tasks:
+                if task.lock_timeout_retries:
+                    self.stdout.write(
+                        ngettext('Retried %(count)d statement for %(task)s '
+                                 'after a lock timeout.\n',
+                                 'Retried %(count)d statements for %(task)s '
+                                 'after lock timeouts.\n',
+                                 task.lock_timeout_retries)
+                        % {
+                            'count': task.lock_timeout_retries,
+                            'task': task,
+                        })
+
+        if verbosity > 1:
+            self._display_name_cache_stats()
+
         if verbosity > 0:
             self.stdout.write(_('The evolution was successful!\n'))
 
+    def _display_name_cache_stats(self):
+        """Display statistics on index and constraint name generation.
+
+        This shows how many names were generated during the run, and how
+        many were served from the name cache.
+        """
+        start_stats = self.start_name_cache_stats
+        stats = get_name_cache_stats()
+        lookups = ((stats['hits'] - start_stats['hits']) +
+                   (stats['misses'] - start_stats['misses']))
+
+        if lookups:
+            self.stdout.write(
+                _('Looked up %(lookups)d index and constraint names '
+                  '(%(hits)d cached, %(misses)d generated).\n')
+                % {
+                    'hits': stats['hits'] - start_stats['hits'],
+                    'lookups': lookups,
+                    'misses': stats['misses'] - start_stats['misses'],
+                })
+
     def _display_compiled_sql(self):
         """Display the compiled SQL for the evolution run.
 
         This will output the SQL that would be executed based on the options
-        passed to the command.
+        passed to the command. If ``--estimate`` was passed, each statement
+        will be preceded by its estimated cost, and the totals will be
+        shown at the end.
         """
         database_name = self.evolver.database_name
+        evolver = get_evolution_operations(database_name)
+
+        if self.estimate:
+            estimator = CostEstimator(evolver)
+            all_costs = []
+        else:
+            estimator = None
 
         for i, task in enumerate(self.evolver.tasks):
-            if task.sql:
+            if task.sql or task.non_transactional_sql:
                 if i > 0:
                     self.stdout.write('\n')
 
                 self.stdout.write('-- %s\n' % task)
-                write_sql(task.sql, database_name)
+
+                table_rewrites_saved = getattr(task, 'table_rewrites_saved',
+                                               0)
+
+                if table_rewrites_saved:
+                    self.stdout.write(
+                        ngettext('-- Combined table changes, saving %d '
+                                 'table rewrite\n',
+                                 '-- Combined table changes, saving %d '
+                                 'table rewrites\n',
+                                 table_rewrites_saved)
+                        % table_rewrites_saved)
+
+                if estimator is None:
+                    write_sql(task.sql, database_name, evolver=evolver)
+                else:
+                    all_costs += self._write_estimated_sql(
+                        task.sql, estimator, evolver)
+
+            if task.non_transactional_sql:
+                self.stdout.write(
+                    '-- %s\n' % _('Run after the transaction is committed:'))
+
+                if estimator is None:
+                    write_sql(task.non_transactional_sql, database_name,
+                              evolver=evolver)
+                else:
+                    all_costs += self._write_estimated_sql(
+                        task.non_transactional_sql, estimator, evolver)
+
+        if estimator is not None:
+            self._display_cost_totals(all_costs)
+
+    def _write_estimated_sql(self, sql, estimator, evolver):
+        """Write SQL statements, each preceded by its estimated cost.
+
+        Args:
+            sql (list):
+                The list of SQL statements to write.
+
+            estimator (django_evolution.db.estimate.CostEstimator):
+                The estimator used to estimate costs.
+
+            evolver (django_evolution.db.common.BaseEvolutionOperations):
+                The evolution operations for the database.
+
+        Returns:
+            list of django_evolution.db.estimate.StatementCost:
+            The estimated costs of the statements.
+        """
+        costs = estimator.estimate(sql)
+
+        for statement, cost in zip(sql, costs):
+            self.stdout.write('-- %s\n' % (_('Estimated cost: %s') % cost))
+            write_sql([statement], self.evolver.database_name,
+                      evolver=evolver)
+
+        return costs
+
+    def _display_cost_totals(self, costs):
+        """Display the total estimated costs for the evolution run.
+
+        Args:
+            costs (list of django_evolution.db.estimate.StatementCost):
+                The estimated costs of all statements.
+        """
+        totals = summarize_costs(costs)
+        parts = []
+
+        # The plural form of each label is chosen based on "count" when
+        # formatted.
+        for kind, label in (
+            (StatementCost.TABLE_REWRITE,
+             ngettext_lazy('%(count)d table rewrite (~%(rows)s rows)',
+                           '%(count)d table rewrites (~%(rows)s rows)',
+                           'count')),
+            (StatementCost.INDEX_BUILD,
+             ngettext_lazy('%(count)d index build (~%(rows)s rows)',
+                           '%(count)d index builds (~%(rows)s rows)',
+                           'count')),
+            (StatementCost.TABLE_SCAN,
+             ngettext_lazy('%(count)d table scan (~%(rows)s rows)',
+                           '%(count)d table scans (~%(rows)s rows)',
+                           'count')),
+            (StatementCost.METADATA,
+             ngettext_lazy('%(count)d metadata-only statement',
+                           '%(count)d metadata-only statements',
+                           'count'))):
+            num_statements, num_rows = totals[kind]
+
+            if num_statements:
+                parts.append(label % {
+                    'count': num_statements,
+                    'rows': '{0:,}'.format(num_rows),
+                })
+
+        self.stdout.write('\n-- %s\n' % (_('Estimated totals: %s')
+                                           % ', '.join(parts)))
 
     def _display_available_purges(self):
         """Display the apps that can be purged."""
@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+import weakref
+
 from django.db import models
 from django.db.models.base import ModelState
 from django.db.models.fields import FieldDoesNotExist
@@ -15,6 +17,148 @@ from django_evolution.compat.models import (get_remote_field,
 from django_evolution.signature import FieldSignature, ModelSignature
 
 
+#: Stub models built for each project signature.
+#:
+#: This maps the ID of a project signature to a tuple of a weak reference to
+#: the signature and a weak-valued dictionary of stub models, keyed by app
+#: and model name. Entries are removed when the signature is
+#: garbage-collected, and stubs are kept only while they're in use.
+_stub_models = {}
+
+
+def get_stub_model(project_sig, app_name, model_name):
+    """Return a stub model for a model in a project signature.
+
+    Stub models contain only a primary key, and are used as the targets of
+    relation fields. Densely-related models would otherwise construct the
+    same stubs many times, so stubs are shared for each project signature.
+
+    A stub will be rebuilt if the parts of the model signature it's built
+    from have changed, or if its fields have been modified.
+
+    Args:
+        project_sig (django_evolution.signature.ProjectSignature):
+            The project's schema signature.
+
+        app_name (unicode):
+            The name of the Django app that owns the model.
+
+        model_name (unicode):
+            The name of the model.
+
+    Returns:
+        MockModel:
+        The stub model.
+
+    Raises:
+        django_evolution.errors.MissingSignatureError:
+            The app or model could not be found in the signature.
+    """
+    model_sig = (
+        project_sig
+        .get_app_sig(app_name, required=True)
+        .get_model_sig(model_name, required=True)
+    )
+    key = id(project_sig)
+    entry = _stub_models.get(key)
+
+    if entry is None or entry[0]() is not project_sig:
+        # This is either a new signature, or the ID belonged to a signature
+        # that was since freed.
+        stubs = weakref.WeakValueDictionary()
+        _stub_models[key] = (
+            weakref.ref(project_sig,
+                        lambda sig_ref: _remove_stub_models(key, sig_ref)),
+            stubs)
+    else:
+        stubs = entry[1]
+
+    stub_sig_key = _get_stub_sig_key(model_sig)
+    stub = stubs.get((app_name, model_name))
+
+    if (stub is None or
+        stub._stub_sig_key != stub_sig_key or
+        not _is_same_fields(stub._stub_fields, stub._meta.local_fields)):
+        stub = MockModel(project_sig=project_sig,
+                         app_name=app_name,
+                         model_name=model_name,
+                         model_sig=model_sig,
+                         stub=True)
+        stub._stub_sig_key = stub_sig_key
+        stub._stub_fields = stub._meta.local_fields
+        stubs[(app_name, model_name)] = stub
+
+    return stub
+
+
+def _remove_stub_models(key, sig_ref):
+    """Remove the stub models for a freed project signature.
+
+    Args:
+        key (int):
+            The ID the project signature had.
+
+        sig_ref (weakref.ref):
+            The dead reference to the project signature.
+    """
+    entry = _stub_models.get(key)
+
+    if entry is not None and entry[0] is sig_ref:
+        del _stub_models[key]
+
+
+def _get_stub_sig_key(model_sig):
+    """Return a key for the parts of a model signature used in a stub.
+
+    The key contains copies of any mutable state, so that it can be compared
+    against a later key for the same signature.
+
+    Args:
+        model_sig (django_evolution.signature.ModelSignature):
+            The model signature.
+
+    Returns:
+        tuple:
+        The key for the stub.
+    """
+    return (
+        model_sig.table_name,
+        model_sig.db_tablespace,
+        model_sig.pk_column,
+        list(model_sig.index_together),
+        list(model_sig.unique_together),
+        [
+            (index_sig.name, list(index_sig.fields))
+            for index_sig in model_sig.index_sigs
+        ],
+        [
+            (field_sig.field_name, field_sig.field_type,
+             dict(field_sig.field_attrs), field_sig.related_model)
+            for field_sig in model_sig.field_sigs
+            if field_sig.get_attr_value('primary_key')
+        ],
+    )
+
+
+def _is_same_fields(fields1, fields2):
+    """Return whether two lists contain the same field instances.
+
+    Args:
+        fields1 (list of django.db.models.Field):
+            The first list of fields.
+
+        fields2 (list of django.db.models.Field):
+            The second list of fields.
+
+    Returns:
+        bool:
+        ``True`` if both lists contain the same instances, in order.
+    """
+    return (len(fields1) == len(fields2) and
+            all(field1 is field2
+                for field1, field2 in zip(fields1, fields2)))
+
+
 def create_field(project_sig, field_name, field_type, field_attrs,
                  parent_model, related_model=None):
     """Create a Django field instance for the given signature data.
@@ -56,16 +200,9 @@ def create_field(project_sig, field_name, field_type, field_attrs,
 
     if related_model:
         related_app_name, related_model_name = related_model.split('.')
-        related_model_sig = (
-            project_sig
-            .get_app_sig(related_app_name, required=True)
-            .get_model_sig(related_model_name, required=True)
-        )
-        to = MockModel(project_sig=project_sig,
-                       app_name=related_app_name,
-                       model_name=related_model_name,
-                       model_sig=related_model_sig,
-                       stub=True)
+        to = get_stub_model(project_sig=project_sig,
+                            app_name=related_app_name,
+                            model_name=related_model_name)
 
         if (issubclass(field_type, models.ForeignKey) and
             hasattr(models, 'CASCADE') and
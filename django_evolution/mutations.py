@@ -10,7 +10,7 @@ from django.utils import six
 from django.utils.functional import curry
 
 from django_evolution.compat.datastructures import OrderedDict
-from django_evolution.db import EvolutionOperationsMulti
+from django_evolution.db import get_evolution_operations
 from django_evolution.db.sql_result import SQLResult
 from django_evolution.db.state import DatabaseState
 from django_evolution.errors import (CannotSimulate, SimulationFailure,
@@ -69,11 +69,10 @@ class Simulation(object):
         """Return an evolver for the database.
 
         Returns:
-            django_evolution.db.EvolutionOperationsMulti:
+            django_evolution.db.common.BaseEvolutionOperations:
             The database evolver for this type of database.
         """
-        return EvolutionOperationsMulti(self.database,
-                                        self.database_state).get_evolver()
+        return get_evolution_operations(self.database, self.database_state)
 
     def get_app_sig(self):
         """Return the current application signature.
@@ -410,7 +409,7 @@ class BaseModelMutation(BaseMutation):
             database = get_database_for_model_name(model.app_label,
                                                    model.model_name)
 
-        return EvolutionOperationsMulti(database, database_state).get_evolver()
+        return get_evolution_operations(database, database_state)
 
     def mutate(self, mutator, model):
         """Schedule a model mutation on the mutator.
@@ -1050,22 +1049,19 @@ class RenameField(BaseModelFieldMutation):
                                  related_model=new_field_sig.related_model,
                                  parent_model=None)
 
-        new_model = MockModel(project_sig=mutator.project_sig,
-                              app_name=mutator.app_label,
-                              model_name=self.model_name,
-                              model_sig=mutator.model_sig,
-                              db_name=mutator.database)
-        evolver = mutator.evolver
-
         if issubclass(field_type, models.ManyToManyField):
+            new_model = MockModel(project_sig=mutator.project_sig,
+                                  app_name=mutator.app_label,
+                                  model_name=self.model_name,
+                                  model_sig=mutator.model_sig,
+                                  db_name=mutator.database)
             old_m2m_table = old_field._get_m2m_db_table(new_model._meta)
             new_m2m_table = new_field._get_m2m_db_table(new_model._meta)
 
-            sql = evolver.rename_table(new_model, old_m2m_table, new_m2m_table)
+            mutator.add_sql(self, mutator.evolver.rename_table(
+                new_model, old_m2m_table, new_m2m_table))
         else:
-            sql = evolver.rename_column(new_model, old_field, new_field)
-
-        mutator.add_sql(self, sql)
+            mutator.rename_column(self, old_field, new_field)
 
 
 class ChangeField(BaseModelFieldMutation):
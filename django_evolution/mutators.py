@@ -1,9 +1,10 @@
 from __future__ import unicode_literals
 
 import copy
+import hashlib
 import logging
 
-from django_evolution.db import EvolutionOperationsMulti
+from django_evolution.db import get_evolution_operations
 from django_evolution.errors import CannotSimulate
 from django_evolution.mock_models import MockModel
 from django_evolution.mutations import (AddField, BaseModelMutation,
@@ -38,13 +39,15 @@ class ModelMutator(object):
         self.database = (database or
                          get_database_for_model_name(app_label, model_name))
         self.can_simulate = True
+        self.table_rewrites_saved = 0
         self._ops = []
         self._finalized = False
+        self._mock_models = {}
+        self._mock_models_project_sig = None
 
         assert self.database
-        evolution_ops = EvolutionOperationsMulti(self.database,
-                                                 self.database_state)
-        self.evolver = evolution_ops.get_evolver()
+        self.evolver = get_evolution_operations(self.database,
+                                                self.database_state)
 
     @property
     def project_sig(self):
@@ -73,12 +76,34 @@ class ModelMutator(object):
         This is typically used when calling a mutation's mutate() function
         and passing a model instance, but can also be called whenever
         a new instance of the model is needed for any lookups.
+
+        Mock models are cached for the current model signature, so the
+        same instance will be returned until a simulation changes the
+        signature or an operation is finished.
         """
-        return MockModel(project_sig=self.project_sig,
-                         app_name=self.app_label,
-                         model_name=self.model_name,
-                         model_sig=self.model_sig,
-                         db_name=self.database)
+        project_sig = self.project_sig
+
+        if project_sig is not self._mock_models_project_sig:
+            # We've switched between simulating and generating SQL, which
+            # use different copies of the signature.
+            self._mock_models.clear()
+            self._mock_models_project_sig = project_sig
+
+        model_sig = self.model_sig
+        key = (self.app_label, self.model_name,
+               self._get_model_sig_digest(model_sig))
+
+        try:
+            model = self._mock_models[key]
+        except KeyError:
+            model = MockModel(project_sig=project_sig,
+                              app_name=self.app_label,
+                              model_name=self.model_name,
+                              model_sig=model_sig,
+                              db_name=self.database)
+            self._mock_models[key] = model
+
+        return model
 
     def add_column(self, mutation, field, initial):
         """Adds a pending Add Column operation.
@@ -110,6 +135,21 @@ class ModelMutator(object):
             'new_attrs': new_attrs,
         })
 
+    def rename_column(self, mutation, old_field, new_field):
+        """Adds a pending Rename Column operation.
+
+        This will cause to_sql() to include SQL for renaming the given
+        column.
+        """
+        assert not self._finalized
+
+        self._ops.append({
+            'type': 'rename_column',
+            'mutation': mutation,
+            'old_field': old_field,
+            'new_field': new_field,
+        })
+
     def delete_column(self, mutation, field):
         """Adds a pending Delete Column operation.
 
@@ -206,19 +246,37 @@ class ModelMutator(object):
         except CannotSimulate:
             self.can_simulate = False
 
-    def to_sql(self):
+    def to_sql(self, later_ops=None):
         """Returns SQL for the operations added to this mutator.
 
         The SQL will represent all the operations made by the mutator,
-        as determined by the database operations backend.
+        as determined by the database operations backend. The operations
+        may first be reordered by the backend in order to alter the table
+        fewer times.
 
         Once called, no new operations can be added to the mutator.
+
+        Args:
+            later_ops (list of dict, optional):
+                Operations for the same model that will be run after this
+                mutator's. These are used to decide whether new columns
+                can be filled in after the evolution's transaction. If
+                ``None``, they're unknown, and all columns will be filled in
+                within the transaction.
+
+        Returns:
+            list:
+            The list of SQL statements.
         """
         assert not self._finalized
 
         self._finalized = True
 
-        return self.evolver.generate_table_ops_sql(self, self._ops)
+        ops, self.table_rewrites_saved = \
+            self.evolver.schedule_table_ops(self, self._ops)
+        self.evolver.mark_deferrable_backfills(ops, later_ops)
+
+        return self.evolver.generate_table_ops_sql(self, ops)
 
     def finish_op(self, op):
         """Finishes handling an operation.
@@ -230,15 +288,25 @@ class ModelMutator(object):
         in order to update the signatures for the changes made by the
         mutation.
         """
-        mutation = op['mutation']
+        # Generating SQL for the operation may have modified the mock
+        # model's fields in place, so it can't be used for later operations.
+        self._mock_models.clear()
 
-        try:
-            mutation.run_simulation(app_label=self.app_label,
-                                    project_sig=self.project_sig,
-                                    database_state=self.database_state,
-                                    database=self.database)
-        except CannotSimulate:
-            self.can_simulate = False
+        self.run_simulation(op['mutation'])
+
+    def _get_model_sig_digest(self, model_sig):
+        """Return a digest of a model signature.
+
+        Args:
+            model_sig (django_evolution.signature.ModelSignature):
+                The model signature.
+
+        Returns:
+            unicode:
+            The digest of the signature.
+        """
+        return hashlib.sha1(
+            repr(model_sig.serialize()).encode('utf-8')).hexdigest()
 
 
 class SQLMutator(object):
@@ -246,6 +314,16 @@ class SQLMutator(object):
         self.mutation = mutation
         self.sql = sql
 
+    def iter_sql(self):
+        """Generate the SQL statements for the mutation.
+
+        Yields:
+            object:
+            Each SQL statement.
+        """
+        for statement in self.sql:
+            yield statement
+
     def to_sql(self):
         return self.sql
 
@@ -264,7 +342,9 @@ class AppMutator(object):
 
     After all operations are added, the caller is expected to call to_sql()
     to get the SQL statements needed to apply those operations. Once called,
-    the mutator is finalized, and new operations cannot be added.
+    the mutator is finalized, and new operations cannot be added. At that
+    point, ``table_rewrites_saved`` will contain the number of times tables
+    no longer need to be altered, due to operations being reordered.
     """
 
     @classmethod
@@ -293,6 +373,7 @@ class AppMutator(object):
         self.database_state = database_state
         self.database = database
         self.can_simulate = True
+        self.table_rewrites_saved = 0
         self._last_model_mutator = None
         self._mutators = []
         self._finalized = False
@@ -341,28 +422,83 @@ class AppMutator(object):
 
         self._mutators.append(SQLMutator(mutation, sql))
 
-    def to_sql(self):
-        """Returns SQL for the operations added to this mutator.
+    def iter_sql(self):
+        """Generate SQL for the operations added to this mutator.
 
         The SQL will represent all the operations made by the mutator.
-        Once called, no new operations can be added.
+        SQL is generated for one model (or custom SQL mutation) at a time,
+        as the statements are consumed, so the full list of statements for
+        the app never needs to be held in memory.
+
+        Once called, no new operations can be added. ``table_rewrites_saved``
+        will be complete once all statements have been generated.
+
+        Yields:
+            object:
+            Each SQL statement.
         """
         assert not self._finalized
 
         # Finalize one last time.
         self._finalize_model_mutator()
+        self._finalized = True
 
         self.project_sig = self._orig_project_sig
         self.database_state = self._orig_database_state
 
-        sql = []
+        later_ops = self._get_later_model_ops()
 
-        for mutator in self._mutators:
-            sql.extend(mutator.to_sql())
+        for mutator, mutator_later_ops in zip(self._mutators, later_ops):
+            if isinstance(mutator, ModelMutator):
+                for statement in mutator.to_sql(later_ops=mutator_later_ops):
+                    yield statement
 
-        self._finalized = True
+                self.table_rewrites_saved += mutator.table_rewrites_saved
+            else:
+                for statement in mutator.iter_sql():
+                    yield statement
+
+    def to_sql(self):
+        """Returns SQL for the operations added to this mutator.
+
+        The SQL will represent all the operations made by the mutator.
+        Once called, no new operations can be added.
+        """
+        return list(self.iter_sql())
+
+    def _get_later_model_ops(self):
+        """Return the operations run on each mutator's model after it.
+
+        Custom SQL may touch any table, so no operations can be determined
+        for mutators that come before a custom SQL mutation.
+
+        Returns:
+            list:
+            A list with an entry for each mutator. Each is a list of
+            operations on the mutator's model run by later mutators, or
+            ``None`` if they can't be determined.
+        """
+        result = []
+        model_ops = {}
+        has_custom_sql = False
+
+        for mutator in reversed(self._mutators):
+            if isinstance(mutator, ModelMutator):
+                if has_custom_sql:
+                    result.append(None)
+                else:
+                    result.append(
+                        list(model_ops.get(mutator.model_name, [])))
+
+                model_ops.setdefault(mutator.model_name, []).extend(
+                    mutator._ops)
+            else:
+                has_custom_sql = True
+                result.append(None)
+
+        result.reverse()
 
-        return sql
+        return result
 
     def _finalize_model_mutator(self):
         """Finalizes the current ModelMutator, if one exists.
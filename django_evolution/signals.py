@@ -24,3 +24,44 @@ applying_evolution = Signal(providing_args=['app_label', 'task'])
 #:     task (django_evolution.evolve.EvolveAppTask):
 #:         The task that evolved the app.
 applied_evolution = Signal(providing_args=['app_label', 'task'])
+
+#: Emitted while rows are being copied between tables in chunks.
+#:
+#: This is sent after each chunk of rows is copied, for database backends
+#: that support chunked copies.
+#:
+#: Args:
+#:     table_name (unicode):
+#:         The name of the table the rows are being copied into.
+#:
+#:     rows_copied (int):
+#:         The number of rows copied so far.
+#:
+#:     total_rows (int):
+#:         The total number of rows to copy.
+copying_rows = Signal(providing_args=['table_name', 'rows_copied',
+                                      'total_rows'])
+
+#: Emitted while a column's values are being filled in, in batches.
+#:
+#: This is sent after each batch of rows is updated, when
+#: ``settings.DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE`` is set.
+#:
+#: Args:
+#:     table_name (unicode):
+#:         The name of the table being updated.
+#:
+#:     column_name (unicode):
+#:         The name of the column being filled in.
+#:
+#:     rows_updated (int):
+#:         The number of rows updated so far.
+#:
+#:     last_pk (int):
+#:         The last primary key value covered so far.
+#:
+#:     max_pk (int):
+#:         The largest primary key value to cover.
+backfilling_rows = Signal(providing_args=['table_name', 'column_name',
+                                          'rows_updated', 'last_pk',
+                                          'max_pk'])
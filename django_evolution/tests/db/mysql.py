@@ -1191,3 +1191,31 @@ evolver = {
         'DROP TABLE `tests_testmodel`;'
     ),
 }
+
+
+mysql_online_ddl = {
+    'AddUniqueColumn': (
+        'ALTER TABLE `tests_testmodel`'
+        ' ADD COLUMN `added_field` integer NULL UNIQUE,'
+        ' ALGORITHM=INPLACE, LOCK=NONE;'
+    ),
+
+    'SetNull': (
+        'ALTER TABLE `tests_testmodel`'
+        ' MODIFY COLUMN `int_field` integer DEFAULT NULL,'
+        ' ALGORITHM=INPLACE, LOCK=NONE;'
+    ),
+
+    'RenameColumn': (
+        'ALTER TABLE `tests_testmodel`'
+        ' CHANGE COLUMN `int_field` `renamed_field` integer NOT NULL,'
+        ' ALGORITHM=INPLACE, LOCK=NONE;'
+    ),
+
+    'ChangeMaxLength': '\n'.join([
+        'UPDATE `tests_testmodel` SET `char_field`=LEFT(`char_field`,30);',
+
+        'ALTER TABLE `tests_testmodel`'
+        ' MODIFY COLUMN `char_field` varchar(30);',
+    ]),
+}
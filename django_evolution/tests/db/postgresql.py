@@ -1417,3 +1417,62 @@ evolver = {
         'DROP TABLE "tests_testmodel";'
     ),
 }
+
+
+postgres_concurrent_indexes = {
+    'AddIndexedColumn': '\n'.join([
+        'ALTER TABLE "tests_testmodel" ADD COLUMN "added_field" integer NULL;',
+
+        'CREATE INDEX CONCURRENTLY "%s" ON "tests_testmodel" ("added_field");'
+        % generate_index_name('tests_testmodel', 'added_field'),
+    ]),
+
+    'DropColumnIndex': (
+        'DROP INDEX CONCURRENTLY IF EXISTS "%s";'
+        % generate_index_name('tests_testmodel', 'indexed_field')
+    ),
+
+    'SetIndexTogether': (
+        'CREATE INDEX CONCURRENTLY "%s"'
+        ' ON "tests_testmodel" ("int_field", "char_field");'
+        % generate_index_name('tests_testmodel',
+                              ['int_field', 'char_field'],
+                              index_together=True)
+    ),
+}
+
+
+postgres_fast_column_defaults = {
+    'AddNonNullColumnWithConstantCallable': '\n'.join([
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field" integer NOT NULL DEFAULT 42;',
+
+        'ALTER TABLE "tests_testmodel"'
+        ' ALTER COLUMN "added_field" DROP DEFAULT;',
+    ]),
+}
+
+
+postgres_not_valid_constraints = {
+    'AddForeignKey': '\n'.join([
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field_id" integer NULL;',
+
+        'CREATE INDEX "%s" ON "tests_testmodel" ("added_field_id");'
+        % generate_index_name('tests_testmodel', 'added_field_id',
+                              'added_field'),
+
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD CONSTRAINT "%s" FOREIGN KEY ("added_field_id")'
+        ' REFERENCES "tests_postgresanchor" ("id")'
+        ' DEFERRABLE INITIALLY DEFERRED NOT VALID;'
+        % generate_constraint_name('added_field_id', 'id',
+                                   'tests_testmodel',
+                                   'tests_postgresanchor'),
+
+        'ALTER TABLE "tests_testmodel" VALIDATE CONSTRAINT "%s";'
+        % generate_constraint_name('added_field_id', 'id',
+                                   'tests_testmodel',
+                                   'tests_postgresanchor'),
+    ]),
+}
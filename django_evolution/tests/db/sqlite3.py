@@ -11,6 +11,7 @@ connection = test_connections['sqlite3']
 generate_index_name = make_generate_index_name(connection)
 generate_unique_constraint_name = \
     make_generate_unique_constraint_name(connection)
+sqlite_version_info = connection.Database.sqlite_version_info
 
 
 try:
@@ -92,32 +93,10 @@ add_field = {
     ]),
 
     'AddNullColumnWithInitialColumnModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "int_field" integer NULL,'
-        ' "added_field" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("id", "char_field", "int_field")'
-        ' SELECT "id", "char_field", "int_field"'
-        ' FROM "tests_testmodel";',
-
-        'UPDATE "TEMP_TABLE" SET "added_field" = 1;',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "int_field" integer NOT NULL,'
-        ' "added_field" integer NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("id", "char_field", "int_field", "added_field")'
-        ' SELECT "id", "char_field", "int_field", "added_field"'
-        ' FROM "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel" ADD COLUMN "added_field" integer NULL;',
 
-        'DROP TABLE "TEMP_TABLE";',
+        'UPDATE "tests_testmodel" SET "added_field" = 1'
+        ' WHERE "added_field" IS NULL;',
     ]),
 
     'AddStringColumnModel': '\n'.join([
@@ -321,85 +300,18 @@ add_field = {
         'DROP TABLE "TEMP_TABLE";',
     ]),
 
-    'NonDefaultColumnModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "int_field" integer NULL,'
-        ' "non-default_column" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("id", "char_field", "int_field")'
-        ' SELECT "id", "char_field", "int_field"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "int_field" integer NOT NULL,'
-        ' "non-default_column" integer NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("id", "char_field", "int_field", "non-default_column")'
-        ' SELECT "id", "char_field", "int_field", "non-default_column"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-    ]),
-
-    'AddColumnCustomTableModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "value" integer NULL,'
-        ' "alt_value" varchar(20) NULL,'
-        ' "added_field" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("id", "value", "alt_value")'
-        ' SELECT "id", "value", "alt_value"'
-        ' FROM "custom_table_name";',
-
-        'DROP TABLE "custom_table_name";',
-
-        'CREATE TABLE "custom_table_name"'
-        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "value" integer NOT NULL,'
-        ' "alt_value" varchar(20) NOT NULL,'
-        ' "added_field" integer NULL);',
-
-        'INSERT INTO "custom_table_name"'
-        ' ("id", "value", "alt_value", "added_field")'
-        ' SELECT "id", "value", "alt_value", "added_field"'
-        ' FROM "TEMP_TABLE";',
+    'NonDefaultColumnModel': (
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "non-default_column" integer NULL;'
+    ),
 
-        'DROP TABLE "TEMP_TABLE";',
-    ]),
+    'AddColumnCustomTableModel': (
+        'ALTER TABLE "custom_table_name"'
+        ' ADD COLUMN "added_field" integer NULL;'
+    ),
 
     'AddIndexedColumnModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "int_field" integer NULL,'
-        ' "add_field" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("id", "char_field", "int_field")'
-        ' SELECT "id", "char_field", "int_field"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "int_field" integer NOT NULL,'
-        ' "add_field" integer NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("id", "char_field", "int_field", "add_field")'
-        ' SELECT "id", "char_field", "int_field", "add_field"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel" ADD COLUMN "add_field" integer NULL;',
 
         'CREATE INDEX "%s" ON "tests_testmodel" ("add_field");'
         % generate_index_name('tests_testmodel', 'add_field'),
@@ -460,31 +372,9 @@ add_field = {
     ]),
 
     'AddForeignKeyModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "int_field" integer NULL,'
-        ' "added_field_id" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("id", "char_field", "int_field")'
-        ' SELECT "id", "char_field", "int_field"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "int_field" integer NOT NULL,'
-        ' "added_field_id" integer NULL REFERENCES "tests_addanchor1" ("id")'
-        ' DEFERRABLE INITIALLY DEFERRED);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("id", "char_field", "int_field", "added_field_id")'
-        ' SELECT "id", "char_field", "int_field", "added_field_id"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field_id" integer NULL'
+        ' REFERENCES "tests_addanchor1" ("id") DEFERRABLE INITIALLY DEFERRED;',
 
         'CREATE INDEX "%s" ON "tests_testmodel" ("added_field_id");'
         % generate_index_name('tests_testmodel', 'added_field_id',
@@ -952,6 +842,22 @@ delete_field = {
     ]),
 }
 
+if sqlite_version_info >= (3, 35, 0):
+    delete_field.update({
+        'DefaultNamedColumnModel': (
+            'ALTER TABLE "tests_testmodel" DROP COLUMN "int_field";'
+        ),
+
+        'NonDefaultNamedColumnModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' DROP COLUMN "non-default_db_column";'
+        ),
+
+        'DeleteColumnCustomTableModel': (
+            'ALTER TABLE "custom_table_name" DROP COLUMN "value";'
+        ),
+    })
+
 change_field = {
     'SetNotNullChangeModelWithConstant': '\n'.join([
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
@@ -1366,101 +1272,7 @@ change_field = {
     ]),
 
     'MultiAttrChangeModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NULL,'
-        ' "custom_db_column" integer NULL,'
-        ' "int_field1" integer NULL,'
-        ' "int_field2" integer NULL,'
-        ' "int_field3" integer NULL UNIQUE,'
-        ' "int_field4" integer NULL,'
-        ' "char_field" varchar(20) NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column" integer NOT NULL,'
-        ' "int_field1" integer NOT NULL,'
-        ' "int_field2" integer NOT NULL,'
-        ' "int_field3" integer NOT NULL UNIQUE,'
-        ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NULL,'
-        ' "custom_db_column2" integer NULL,'
-        ' "int_field1" integer NULL,'
-        ' "int_field2" integer NULL,'
-        ' "int_field3" integer NULL UNIQUE,'
-        ' "int_field4" integer NULL,'
-        ' "char_field" varchar(20) NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column2", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column2" integer NOT NULL,'
-        ' "int_field1" integer NOT NULL,'
-        ' "int_field2" integer NOT NULL,'
-        ' "int_field3" integer NOT NULL UNIQUE,'
-        ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'CREATE INDEX "%s" ON "tests_testmodel" ("int_field1");'
-        % generate_index_name('tests_testmodel', 'int_field1'),
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column2", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column2", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "alt_pk" integer NULL,'
@@ -1477,7 +1289,7 @@ change_field = {
         ' ("my_id", "alt_pk", "custom_db_column2", "int_field1", "int_field2",'
         ' "int_field3", "int_field4", "char_field", "char_field1",'
         ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column2", "int_field1",'
+        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
         ' "int_field2", "int_field3", "int_field4", "char_field",'
         ' "char_field1", "char_field2"'
         ' FROM "tests_testmodel";',
@@ -1496,6 +1308,9 @@ change_field = {
         ' "char_field1" varchar(25) NULL,'
         ' "char_field2" varchar(30) NULL);',
 
+        'CREATE INDEX "%s" ON "tests_testmodel" ("int_field1");'
+        % generate_index_name('tests_testmodel', 'int_field1'),
+
         'INSERT INTO "tests_testmodel"'
         ' ("my_id", "alt_pk", "custom_db_column2", "int_field1", "int_field2",'
         ' "int_field3", "int_field4", "char_field", "char_field1",'
@@ -1509,7 +1324,7 @@ change_field = {
     ]),
 
     'MultiAttrSingleFieldChangeModel': '\n'.join([
-        # Change char_field2.max_length to 35.
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "alt_pk" integer NULL,'
@@ -1543,7 +1358,10 @@ change_field = {
         ' "int_field4" integer NOT NULL,'
         ' "char_field" varchar(20) NOT NULL,'
         ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(35) NOT NULL);',
+        ' "char_field2" varchar(35) NULL);',
+
+        'CREATE INDEX "%s" ON "tests_testmodel" ("int_field1");'
+        % generate_index_name('tests_testmodel', 'int_field1'),
 
         'INSERT INTO "tests_testmodel"'
         ' ("my_id", "alt_pk", "custom_db_column", "int_field1", "int_field2",'
@@ -1555,22 +1373,24 @@ change_field = {
         ' FROM "TEMP_TABLE";',
 
         'DROP TABLE "TEMP_TABLE";',
+    ]),
 
-        # Change char_field2.null to True.
+    'RedundantAttrsChangeModel': '\n'.join([
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "alt_pk" integer NULL,'
-        ' "custom_db_column" integer NULL,'
+        ' "custom_db_column3" integer NULL,'
         ' "int_field1" integer NULL,'
         ' "int_field2" integer NULL,'
         ' "int_field3" integer NULL UNIQUE,'
         ' "int_field4" integer NULL,'
-        ' "char_field" varchar(20) NULL,'
+        ' "char_field" varchar(35) NULL,'
         ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(35) NULL);',
+        ' "char_field2" varchar(30) NULL);',
 
         'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1", "int_field2",'
+        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
         ' "int_field3", "int_field4", "char_field", "char_field1",'
         ' "char_field2")'
         ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
@@ -1583,170 +1403,38 @@ change_field = {
         'CREATE TABLE "tests_testmodel"'
         '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
         ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column" integer NOT NULL,'
+        ' "custom_db_column3" integer NOT NULL,'
         ' "int_field1" integer NOT NULL,'
         ' "int_field2" integer NOT NULL,'
         ' "int_field3" integer NOT NULL UNIQUE,'
         ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(20) NOT NULL,'
+        ' "char_field" varchar(35) NOT NULL,'
         ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(35) NULL);',
+        ' "char_field2" varchar(30) NULL);',
+
+        'CREATE INDEX "%s" ON "tests_testmodel" ("int_field1");'
+        % generate_index_name('tests_testmodel', 'int_field1'),
 
         'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1", "int_field2",'
+        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
         ' "int_field3", "int_field4", "char_field", "char_field1",'
         ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
+        ' SELECT "my_id", "alt_pk", "custom_db_column3", "int_field1",'
         ' "int_field2", "int_field3", "int_field4", "char_field",'
         ' "char_field1", "char_field2"'
         ' FROM "TEMP_TABLE";',
 
         'DROP TABLE "TEMP_TABLE";',
     ]),
+}
 
-    'RedundantAttrsChangeModel': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NULL,'
-        ' "custom_db_column" integer NULL,'
-        ' "int_field1" integer NULL,'
-        ' "int_field2" integer NULL,'
-        ' "int_field3" integer NULL UNIQUE,'
-        ' "int_field4" integer NULL,'
-        ' "char_field" varchar(20) NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column" integer NOT NULL,'
-        ' "int_field1" integer NOT NULL,'
-        ' "int_field2" integer NOT NULL,'
-        ' "int_field3" integer NOT NULL UNIQUE,'
-        ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NULL,'
-        ' "custom_db_column3" integer NULL,'
-        ' "int_field1" integer NULL,'
-        ' "int_field2" integer NULL,'
-        ' "int_field3" integer NULL UNIQUE,'
-        ' "int_field4" integer NULL,'
-        ' "char_field" varchar(20) NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column3" integer NOT NULL,'
-        ' "int_field1" integer NOT NULL,'
-        ' "int_field2" integer NOT NULL,'
-        ' "int_field3" integer NOT NULL UNIQUE,'
-        ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'CREATE INDEX "%s" ON "tests_testmodel" ("int_field1");'
-        % generate_index_name('tests_testmodel', 'int_field1'),
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column3", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NULL,'
-        ' "custom_db_column3" integer NULL,'
-        ' "int_field1" integer NULL,'
-        ' "int_field2" integer NULL,'
-        ' "int_field3" integer NULL UNIQUE,'
-        ' "int_field4" integer NULL,'
-        ' "char_field" varchar(35) NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE"'
-        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column3", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "alt_pk" integer NOT NULL,'
-        ' "custom_db_column3" integer NOT NULL,'
-        ' "int_field1" integer NOT NULL,'
-        ' "int_field2" integer NOT NULL,'
-        ' "int_field3" integer NOT NULL UNIQUE,'
-        ' "int_field4" integer NOT NULL,'
-        ' "char_field" varchar(35) NOT NULL,'
-        ' "char_field1" varchar(25) NULL,'
-        ' "char_field2" varchar(30) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "alt_pk", "custom_db_column3", "int_field1", "int_field2",'
-        ' "int_field3", "int_field4", "char_field", "char_field1",'
-        ' "char_field2")'
-        ' SELECT "my_id", "alt_pk", "custom_db_column3", "int_field1",'
-        ' "int_field2", "int_field3", "int_field4", "char_field",'
-        ' "char_field1", "char_field2"'
-        ' FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-    ]),
-}
+if sqlite_version_info >= (3, 25, 0):
+    change_field.update({
+        'DBColumnChangeModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "custom_db_column" TO "customised_db_column";'
+        ),
+    })
 
 delete_model = {
     'BasicModel': (
@@ -2150,6 +1838,46 @@ rename_field = {
     ),
 }
 
+if sqlite_version_info >= (3, 25, 0):
+    rename_field.update({
+        'RenameColumnModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "int_field" TO "renamed_field";'
+        ),
+
+        'RenameColumnWithTableNameModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "int_field" TO "renamed_field";'
+        ),
+
+        'RenamePrimaryKeyColumnModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "id" TO "my_pk_id";'
+        ),
+
+        'RenameNonDefaultColumnNameModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "custom_db_col_name" TO "renamed_field";'
+        ),
+
+        'RenameNonDefaultColumnNameToNonDefaultNameModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "custom_db_col_name"'
+            ' TO "non-default_column_name";'
+        ),
+
+        'RenameNonDefaultColumnNameToNonDefaultNameAndTableModel': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "custom_db_col_name"'
+            ' TO "non-default_column_name2";'
+        ),
+
+        'RenameColumnCustomTableModel': (
+            'ALTER TABLE "custom_rename_table_name"'
+            ' RENAME COLUMN "value" TO "renamed_field";'
+        ),
+    })
+
 sql_mutation = {
     'AddFirstTwoFields': '\n'.join([
         'ALTER TABLE "tests_testmodel"'
@@ -2214,6 +1942,13 @@ generics = {
     ])
 }
 
+if sqlite_version_info >= (3, 35, 0):
+    generics.update({
+        'DeleteColumnModel': (
+            'ALTER TABLE "tests_testmodel" DROP COLUMN "char_field";'
+        ),
+    })
+
 inheritance = {
     'AddToChildModel': '\n'.join([
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
@@ -2482,53 +2217,19 @@ else:
 
 preprocessing = {
     'add_change_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "added_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'UPDATE "TEMP_TABLE" SET "added_field" = \'bar\';',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "added_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "added_field")'
-        ' SELECT "my_id", "char_field", "added_field" FROM "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field" varchar(50) NULL;',
 
-        'DROP TABLE "TEMP_TABLE";',
+        'UPDATE "tests_testmodel" SET "added_field" = \'bar\''
+        ' WHERE "added_field" IS NULL;',
     ]),
 
     'add_change_rename_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'UPDATE "TEMP_TABLE" SET "renamed_field" = \'bar\';',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "renamed_field")'
-        ' SELECT "my_id", "char_field", "renamed_field" FROM "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "renamed_field" varchar(50) NULL;',
 
-        'DROP TABLE "TEMP_TABLE";',
+        'UPDATE "tests_testmodel" SET "renamed_field" = \'bar\''
+        ' WHERE "renamed_field" IS NULL;',
     ]),
 
     'add_delete_add_field': '\n'.join([
@@ -2582,99 +2283,31 @@ preprocessing = {
     ]),
 
     'add_rename_change_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'UPDATE "TEMP_TABLE" SET "renamed_field" = \'bar\';',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "renamed_field")'
-        ' SELECT "my_id", "char_field", "renamed_field" FROM "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "renamed_field" varchar(50) NULL;',
 
-        'DROP TABLE "TEMP_TABLE";',
+        'UPDATE "tests_testmodel" SET "renamed_field" = \'bar\''
+        ' WHERE "renamed_field" IS NULL;',
     ]),
 
     'add_rename_change_rename_change_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL, "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'UPDATE "TEMP_TABLE" SET "renamed_field" = \'foo\';',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "renamed_field")'
-        ' SELECT "my_id", "char_field", "renamed_field" FROM "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "renamed_field" varchar(50) NULL;',
 
-        'DROP TABLE "TEMP_TABLE";',
+        'UPDATE "tests_testmodel" SET "renamed_field" = \'foo\''
+        ' WHERE "renamed_field" IS NULL;',
     ]),
 
-    'add_rename_field_with_db_column': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "added_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "added_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "added_field")'
-        ' SELECT "my_id", "char_field", "added_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-    ]),
+    'add_rename_field_with_db_column': (
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field" varchar(50) NULL;'
+    ),
 
     'add_field_rename_model': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "added_field_id" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "added_field_id" integer NULL REFERENCES "tests_reffedpreprocmodel"'
-        ' ("id") DEFERRABLE INITIALLY DEFERRED);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "added_field_id")'
-        ' SELECT "my_id", "char_field", "added_field_id" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "added_field_id" integer NULL'
+        ' REFERENCES "tests_reffedpreprocmodel" ("id")'
+        ' DEFERRABLE INITIALLY DEFERRED;',
 
         'CREATE INDEX "%s" ON "tests_testmodel" ("added_field_id");'
         % generate_index_name('tests_testmodel', 'added_field_id',
@@ -2682,27 +2315,10 @@ preprocessing = {
     ]),
 
     'add_rename_field_rename_model': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL,'
-        ' "renamed_field_id" integer NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NOT NULL,'
-        ' "renamed_field_id" integer NULL REFERENCES'
-        ' "tests_reffedpreprocmodel" ("id") DEFERRABLE INITIALLY DEFERRED);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "char_field", "renamed_field_id")'
-        ' SELECT "my_id", "char_field", "renamed_field_id" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "renamed_field_id" integer NULL'
+        ' REFERENCES "tests_reffedpreprocmodel" ("id")'
+        ' DEFERRABLE INITIALLY DEFERRED;',
 
         'CREATE INDEX "%s" ON "tests_testmodel" ("renamed_field_id");'
         % generate_index_name('tests_testmodel', 'renamed_field_id',
@@ -2755,24 +2371,7 @@ preprocessing = {
     ]),
 
     'change_rename_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(20) NULL);',
-
-        'INSERT INTO "tests_testmodel" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "renamed_field" varchar(20) NULL);',
@@ -2793,42 +2392,7 @@ preprocessing = {
     ]),
 
     'change_rename_change_rename_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(30) NOT NULL);',
-
-        'INSERT INTO "tests_testmodel" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(30) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "char_field" varchar(30) NULL);',
-
-        'INSERT INTO "tests_testmodel" ("my_id", "char_field")'
-        ' SELECT "my_id", "char_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "renamed_field" varchar(30) NULL);',
@@ -2885,71 +2449,18 @@ preprocessing = {
 
         'DROP TABLE "TEMP_TABLE";',
 
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(20) NULL,'
-        ' "char_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "renamed_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(20) NOT NULL,'
-        ' "char_field" varchar(50) NULL);',
-
-        'INSERT INTO "tests_testmodel"'
-        ' ("my_id", "renamed_field", "char_field")'
-        ' SELECT "my_id", "renamed_field", "char_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
+        'ALTER TABLE "tests_testmodel"'
+        ' ADD COLUMN "char_field" varchar(50) NULL;',
     ]),
 
     'rename_change_rename_change_field': '\n'.join([
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(20) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(20) NOT NULL);',
-
-        'INSERT INTO "tests_testmodel" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "renamed_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
+        # All changes are made in a single rebuild of the table.
         'CREATE TEMPORARY TABLE "TEMP_TABLE"'
         '("my_id" integer NULL UNIQUE PRIMARY KEY,'
         ' "renamed_field" varchar(50) NULL);',
 
         'INSERT INTO "TEMP_TABLE" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "renamed_field" FROM "tests_testmodel";',
-
-        'DROP TABLE "tests_testmodel";',
-
-        'CREATE TABLE "tests_testmodel"'
-        '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(50) NOT NULL);',
-
-        'INSERT INTO "tests_testmodel" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "renamed_field" FROM "TEMP_TABLE";',
-
-        'DROP TABLE "TEMP_TABLE";',
-
-        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
-        '("my_id" integer NULL UNIQUE PRIMARY KEY,'
-        ' "renamed_field" varchar(50) NULL);',
-
-        'INSERT INTO "TEMP_TABLE" ("my_id", "renamed_field")'
-        ' SELECT "my_id", "renamed_field" FROM "tests_testmodel";',
+        ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
 
         'DROP TABLE "tests_testmodel";',
 
@@ -2990,6 +2501,52 @@ preprocessing = {
     'noop': '',
 }
 
+if sqlite_version_info >= (3, 25, 0):
+    preprocessing.update({
+        'change_rename_field': '\n'.join([
+            'CREATE TEMPORARY TABLE "TEMP_TABLE"'
+            '("my_id" integer NULL UNIQUE PRIMARY KEY,'
+            ' "char_field" varchar(20) NULL);',
+
+            'INSERT INTO "TEMP_TABLE" ("my_id", "char_field")'
+            ' SELECT "my_id", "char_field" FROM "tests_testmodel";',
+
+            'DROP TABLE "tests_testmodel";',
+
+            'CREATE TABLE "tests_testmodel"'
+            '("my_id" integer NOT NULL UNIQUE PRIMARY KEY,'
+            ' "char_field" varchar(20) NULL);',
+
+            'INSERT INTO "tests_testmodel" ("my_id", "char_field")'
+            ' SELECT "my_id", "char_field" FROM "TEMP_TABLE";',
+
+            'DROP TABLE "TEMP_TABLE";',
+
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "char_field" TO "renamed_field";',
+        ]),
+
+        'rename_add_field': '\n'.join([
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "char_field" TO "renamed_field";',
+
+            'ALTER TABLE "tests_testmodel"'
+            ' ADD COLUMN "char_field" varchar(50) NULL;',
+        ]),
+
+        'rename_rename_field': (
+            'ALTER TABLE "tests_testmodel"'
+            ' RENAME COLUMN "char_field" TO "renamed_field";'
+        ),
+    })
+
+if sqlite_version_info >= (3, 35, 0):
+    preprocessing.update({
+        'delete_char_field': (
+            'ALTER TABLE "tests_testmodel" DROP COLUMN "char_field";'
+        ),
+    })
+
 
 evolver = {
     'evolve_app_task': '\n'.join([
@@ -3016,3 +2573,112 @@ evolver = {
         'DROP TABLE "tests_testmodel";'
     ),
 }
+
+sqlite_native_alter_table = {
+    'AddNullColumn': (
+        'ALTER TABLE "tests_testmodel" ADD COLUMN "added_field" integer NULL;'
+    ),
+
+    'AddNullColumnWithInitial': '\n'.join([
+        'ALTER TABLE "tests_testmodel" ADD COLUMN "added_field" integer NULL;',
+
+        'UPDATE "tests_testmodel" SET "added_field" = 42'
+        ' WHERE "added_field" IS NULL;',
+    ]),
+
+    'RenameColumn': (
+        'ALTER TABLE "tests_testmodel"'
+        ' RENAME COLUMN "int_field" TO "renamed_field";'
+    ),
+
+    'DeleteColumn': (
+        'ALTER TABLE "tests_testmodel" DROP COLUMN "int_field";'
+    ),
+
+    'DeleteIndexedColumn': '\n'.join([
+        'CREATE TEMPORARY TABLE "TEMP_TABLE"'
+        '("id" integer NULL UNIQUE PRIMARY KEY,'
+        ' "char_field" varchar(20) NULL,'
+        ' "int_field" integer NULL);',
+
+        'INSERT INTO "TEMP_TABLE" ("id", "char_field", "int_field")'
+        ' SELECT "id", "char_field", "int_field" FROM "tests_testmodel";',
+
+        'DROP TABLE "tests_testmodel";',
+
+        'CREATE TABLE "tests_testmodel"'
+        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
+        ' "char_field" varchar(20) NOT NULL,'
+        ' "int_field" integer NOT NULL);',
+
+        'INSERT INTO "tests_testmodel" ("id", "char_field", "int_field")'
+        ' SELECT "id", "char_field", "int_field" FROM "TEMP_TABLE";',
+
+        'DROP TABLE "TEMP_TABLE";',
+    ]),
+}
+
+sqlite_single_copy_rebuild = {
+    'ChangeNullWithInitial': '\n'.join([
+        'CREATE TABLE "new__tests_testmodel"'
+        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
+        ' "char_field" varchar(20) NOT NULL,'
+        ' "int_field" integer NOT NULL,'
+        ' "indexed_field" integer NOT NULL);',
+
+        'INSERT INTO "new__tests_testmodel"'
+        ' ("id", "char_field", "int_field", "indexed_field")'
+        ' SELECT "id", "char_field", COALESCE("int_field", 42),'
+        ' "indexed_field" FROM "tests_testmodel";',
+
+        'DROP TABLE "tests_testmodel";',
+
+        'ALTER TABLE "new__tests_testmodel" RENAME TO "tests_testmodel";',
+    ]),
+
+    'RenameColumn': '\n'.join([
+        'CREATE TABLE "new__tests_testmodel"'
+        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
+        ' "char_field" varchar(20) NOT NULL,'
+        ' "renamed_field" integer NULL,'
+        ' "indexed_field" integer NOT NULL);',
+
+        'INSERT INTO "new__tests_testmodel"'
+        ' ("id", "char_field", "renamed_field", "indexed_field")'
+        ' SELECT "id", "char_field", "int_field", "indexed_field"'
+        ' FROM "tests_testmodel";',
+
+        'DROP TABLE "tests_testmodel";',
+
+        'ALTER TABLE "new__tests_testmodel" RENAME TO "tests_testmodel";',
+
+        'CREATE INDEX "%s" ON "tests_testmodel" ("indexed_field");'
+        % generate_index_name('tests_testmodel', 'indexed_field'),
+    ]),
+
+    'ChangeNullWithInterleavedMeta': '\n'.join([
+        'CREATE TABLE "new__tests_testmodel"'
+        '("id" integer NOT NULL UNIQUE PRIMARY KEY,'
+        ' "char_field" varchar(20) NULL,'
+        ' "int_field" integer NOT NULL,'
+        ' "indexed_field" integer NOT NULL);',
+
+        'INSERT INTO "new__tests_testmodel"'
+        ' ("id", "char_field", "int_field", "indexed_field")'
+        ' SELECT "id", "char_field", COALESCE("int_field", 42),'
+        ' "indexed_field" FROM "tests_testmodel";',
+
+        'DROP TABLE "tests_testmodel";',
+
+        'ALTER TABLE "new__tests_testmodel" RENAME TO "tests_testmodel";',
+
+        'CREATE INDEX "%s" ON "tests_testmodel" ("indexed_field");'
+        % generate_index_name('tests_testmodel', 'indexed_field'),
+
+        'CREATE INDEX "%s"'
+        ' ON "tests_testmodel" ("indexed_field", "int_field");'
+        % generate_index_name('tests_testmodel',
+                              ['indexed_field', 'int_field'],
+                              index_together=True),
+    ]),
+}
@@ -0,0 +1,112 @@
+"""Unit tests for django_evolution.compat.db."""
+
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from django_evolution.compat.db import (clear_name_cache,
+                                        create_constraint_name,
+                                        create_index_name,
+                                        create_index_together_name,
+                                        get_name_cache_stats)
+from django_evolution.tests.base_test_case import TestCase
+
+
+class CompatDBNameCacheTestCase(TestCase):
+    """Unit tests for index and constraint name caching."""
+
+    def setUp(self):
+        super(CompatDBNameCacheTestCase, self).setUp()
+
+        clear_name_cache()
+
+    def tearDown(self):
+        super(CompatDBNameCacheTestCase, self).tearDown()
+
+        clear_name_cache()
+
+    def test_create_index_name(self):
+        """Testing create_index_name caches names"""
+        name = create_index_name(connection, 'tests_testmodel',
+                                 field_names=['value'],
+                                 col_names=['value'])
+
+        self.assertEqual(
+            create_index_name(connection, 'tests_testmodel',
+                              field_names=['value'],
+                              col_names=['value']),
+            name)
+        self.assertNotEqual(
+            create_index_name(connection, 'tests_testmodel',
+                              field_names=['value'],
+                              col_names=['value'],
+                              unique=True),
+            name)
+        self.assertEqual(
+            get_name_cache_stats(),
+            {
+                'hits': 1,
+                'misses': 2,
+                'size': 2,
+            })
+
+    def test_create_index_together_name(self):
+        """Testing create_index_together_name caches names"""
+        name = create_index_together_name(connection, 'tests_testmodel',
+                                          ['field1', 'field2'])
+
+        self.assertEqual(
+            create_index_together_name(connection, 'tests_testmodel',
+                                       ['field1', 'field2']),
+            name)
+        self.assertEqual(get_name_cache_stats()['hits'], 1)
+
+    def test_create_constraint_name(self):
+        """Testing create_constraint_name caches names"""
+        name = create_constraint_name(connection, 'target_id', 'id',
+                                      'tests_source', 'tests_target')
+
+        self.assertEqual(
+            create_constraint_name(connection, 'target_id', 'id',
+                                   'tests_source', 'tests_target'),
+            name)
+        self.assertEqual(get_name_cache_stats()['hits'], 1)
+
+    @override_settings(DJANGO_EVOLUTION_NAME_CACHE_SIZE=2)
+    def test_cache_size(self):
+        """Testing name cache with DJANGO_EVOLUTION_NAME_CACHE_SIZE evicts
+        least-recently-used names
+        """
+        create_index_name(connection, 'tests_table1', col_names=['value'])
+        create_index_name(connection, 'tests_table2', col_names=['value'])
+        create_index_name(connection, 'tests_table1', col_names=['value'])
+        create_index_name(connection, 'tests_table3', col_names=['value'])
+
+        self.assertEqual(get_name_cache_stats()['size'], 2)
+
+        # tests_table2 was the least-recently-used, so it was evicted.
+        create_index_name(connection, 'tests_table1', col_names=['value'])
+        create_index_name(connection, 'tests_table2', col_names=['value'])
+
+        self.assertEqual(
+            get_name_cache_stats(),
+            {
+                'hits': 2,
+                'misses': 4,
+                'size': 2,
+            })
+
+    @override_settings(DJANGO_EVOLUTION_NAME_CACHE_SIZE=0)
+    def test_cache_disabled(self):
+        """Testing name cache with DJANGO_EVOLUTION_NAME_CACHE_SIZE=0"""
+        create_index_name(connection, 'tests_table1', col_names=['value'])
+        create_index_name(connection, 'tests_table1', col_names=['value'])
+
+        self.assertEqual(
+            get_name_cache_stats(),
+            {
+                'hits': 0,
+                'misses': 0,
+                'size': 0,
+            })
@@ -1,8 +1,16 @@
 from __future__ import unicode_literals
 
-from django.test.testcases import TestCase
+import os
+import shutil
+import tempfile
 
-from django_evolution.db.state import DatabaseState, IndexState
+from django.db import connections
+from django.test.testcases import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from django_evolution.db import EvolutionOperationsMulti
+from django_evolution.db.state import (ColumnState, DatabaseState,
+                                       ForeignKeyState, IndexState)
 from django_evolution.errors import DatabaseStateError
 
 
@@ -42,6 +50,8 @@ class DatabaseStateTests(TestCase):
         database_state.add_table('my_test_table')
 
         self.assertEqual(database_state._tables['my_test_table'], {
+            'columns': {},
+            'foreign_keys': {},
             'indexes': {},
         })
 
@@ -264,6 +274,104 @@ class DatabaseStateTests(TestCase):
                            unique=False),
             ])
 
+    def test_add_column(self):
+        """Testing DatabaseState.add_column"""
+        database_state = DatabaseState(db_name='default', scan=False)
+        database_state.add_table('my_test_table')
+        database_state.add_column(table_name='my_test_table',
+                                  column_name='col1',
+                                  data_type='varchar(20)',
+                                  null=True,
+                                  max_length=20)
+
+        self.assertEqual(
+            database_state.get_column(table_name='my_test_table',
+                                      column_name='col1'),
+            ColumnState(name='col1',
+                        data_type='varchar(20)',
+                        null=True,
+                        max_length=20))
+
+    def test_add_column_with_untracked_table(self):
+        """Testing DatabaseState.add_column with untracked table"""
+        database_state = DatabaseState(db_name='default', scan=False)
+
+        expected_message = (
+            'Unable to add column "col1" to table "my_test_table". The '
+            'table is not being tracked in the database state.'
+        )
+
+        with self.assertRaisesMessage(DatabaseStateError, expected_message):
+            database_state.add_column(table_name='my_test_table',
+                                      column_name='col1',
+                                      data_type='integer',
+                                      null=False)
+
+    def test_iter_columns(self):
+        """Testing DatabaseState.iter_columns"""
+        database_state = DatabaseState(db_name='default', scan=False)
+        database_state.add_table('my_test_table')
+        database_state.add_column(table_name='my_test_table',
+                                  column_name='col2',
+                                  data_type='integer',
+                                  null=False)
+        database_state.add_column(table_name='my_test_table',
+                                  column_name='col1',
+                                  data_type='integer',
+                                  null=True)
+
+        self.assertEqual(
+            list(database_state.iter_columns('my_test_table')),
+            [
+                ColumnState(name='col2', data_type='integer', null=False),
+                ColumnState(name='col1', data_type='integer', null=True),
+            ])
+
+    def test_find_foreign_key(self):
+        """Testing DatabaseState.find_foreign_key"""
+        database_state = DatabaseState(db_name='default', scan=False)
+        database_state.add_table('my_test_table')
+        database_state.add_foreign_key(table_name='my_test_table',
+                                       name='my_fk',
+                                       column='other_id',
+                                       to_table='other_table',
+                                       to_column='id')
+
+        self.assertEqual(
+            database_state.find_foreign_key(table_name='my_test_table',
+                                            column='other_id'),
+            ForeignKeyState(name='my_fk',
+                            column='other_id',
+                            to_table='other_table',
+                            to_column='id'))
+        self.assertIsNone(
+            database_state.find_foreign_key(table_name='my_test_table',
+                                            column='col1'))
+
+    def test_find_foreign_key_not_validated(self):
+        """Testing DatabaseState.find_foreign_key with a constraint that
+        hasn't been validated
+        """
+        database_state = DatabaseState(db_name='default', scan=False)
+        database_state.add_table('my_test_table')
+        database_state.add_foreign_key(table_name='my_test_table',
+                                       name='my_fk',
+                                       column='other_id',
+                                       to_table='other_table',
+                                       to_column='id',
+                                       validated=False)
+
+        foreign_key_state = database_state.find_foreign_key(
+            table_name='my_test_table',
+            column='other_id')
+        self.assertFalse(foreign_key_state.validated)
+        self.assertNotEqual(
+            foreign_key_state,
+            ForeignKeyState(name='my_fk',
+                            column='other_id',
+                            to_table='other_table',
+                            to_column='id'))
+
     def test_rescan_indexes(self):
         """Testing DatabaseState.rescan_indexes"""
         database_state = DatabaseState(db_name='default')
@@ -282,3 +390,106 @@ class DatabaseStateTests(TestCase):
         ]
 
         self.assertIn((['version_id'], False), indexes)
+
+        # Check the Evolution model's columns.
+        self.assertEqual(
+            [
+                column_state.name
+                for column_state in database_state.iter_columns(
+                    'django_evolution')
+            ],
+            ['id', 'version_id', 'app_label', 'label'])
+
+        column_state = database_state.get_column('django_evolution',
+                                                 'app_label')
+        self.assertFalse(column_state.null)
+        self.assertEqual(column_state.max_length, 200)
+
+    def test_rescan_indexes_with_cache(self):
+        """Testing DatabaseState.rescan_indexes with state cache"""
+        cache_dir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+        introspection = connections['default'].introspection
+
+        def _get_table_list(*args, **kwargs):
+            self.fail('The database was introspected instead of using the '
+                      'cache.')
+
+        try:
+            with override_settings(DJANGO_EVOLUTION_STATE_CACHE_DIR=cache_dir):
+                # Simulated tables must not be written to the cache.
+                database_state = DatabaseState(db_name='default', scan=False)
+                database_state.add_table('my_test_table')
+                database_state.rescan_indexes()
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+                introspection.get_table_list = _get_table_list
+
+                try:
+                    cached_state = DatabaseState(db_name='default')
+                    self.assertFalse(cached_state.has_table('my_test_table'))
+
+                    # As with a scan, tracked tables not in the database are
+                    # kept when loading from the cache.
+                    cached_state.add_table('my_test_table')
+                    cached_state.rescan_indexes()
+                finally:
+                    del introspection.get_table_list
+
+                self.assertTrue(cached_state.has_table('my_test_table'))
+                self.assertEqual(cached_state._tables, database_state._tables)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_rescan_indexes_with_cache_and_schema_change(self):
+        """Testing DatabaseState.rescan_indexes with state cache and schema
+        change
+        """
+        cache_dir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+        cursor = connections['default'].cursor()
+
+        try:
+            with override_settings(DJANGO_EVOLUTION_STATE_CACHE_DIR=cache_dir):
+                database_state = DatabaseState(db_name='default')
+                self.assertFalse(database_state.has_table('my_test_table'))
+
+                cursor.execute('CREATE TABLE my_test_table (col1 integer);')
+                cursor.execute('CREATE INDEX my_index'
+                               ' ON my_test_table (col1);')
+
+                database_state = DatabaseState(db_name='default')
+                self.assertTrue(database_state.has_table('my_test_table'))
+                self.assertIsNotNone(database_state.find_index(
+                    table_name='my_test_table',
+                    columns=['col1']))
+        finally:
+            cursor.execute('DROP TABLE my_test_table;')
+            cursor.close()
+            shutil.rmtree(cache_dir)
+
+
+class DatabaseStateThreadedTests(TransactionTestCase):
+    """Testing django_evolution.db.state.DatabaseState with worker threads.
+
+    Worker threads use their own database connections, so these tests can't
+    run inside a transaction.
+    """
+
+    def test_rescan_indexes_with_workers(self):
+        """Testing DatabaseState.rescan_indexes with workers"""
+        serial_state = DatabaseState(db_name='default')
+
+        evolver_cls = type(
+            EvolutionOperationsMulti('default').get_evolver())
+        old_supports_parallel = evolver_cls.supports_parallel_introspection
+        evolver_cls.supports_parallel_introspection = True
+
+        try:
+            parallel_state = DatabaseState(db_name='default', scan=False)
+            parallel_state.rescan_indexes(workers=3)
+        finally:
+            evolver_cls.supports_parallel_introspection = \
+                old_supports_parallel
+
+        self.assertEqual(parallel_state._tables, serial_state._tables)
+        self.assertEqual(list(parallel_state.iter_tables()),
+                         list(serial_state.iter_tables()))
@@ -0,0 +1,154 @@
+from __future__ import unicode_literals
+
+from django.db import models
+from django.test.testcases import TestCase
+
+from django_evolution.db.state import DatabaseState
+from django_evolution.drift import SchemaDrift
+from django_evolution.models import Evolution, Version
+from django_evolution.signature import (AppSignature, FieldSignature,
+                                        ProjectSignature)
+
+
+class SchemaDriftTests(TestCase):
+    """Testing django_evolution.drift.SchemaDrift."""
+
+    def setUp(self):
+        super(SchemaDriftTests, self).setUp()
+
+        # Other tests register models that never get tables, so only
+        # Django Evolution's own models are checked.
+        app_sig = AppSignature(app_id='django_evolution')
+        app_sig.add_model(Evolution)
+        app_sig.add_model(Version)
+
+        self.project_sig = ProjectSignature()
+        self.project_sig.add_app_sig(app_sig)
+
+        self.database_state = DatabaseState(db_name='default')
+        self.model_sig = app_sig.get_model_sig('Evolution')
+
+    def test_is_empty(self):
+        """Testing SchemaDrift.is_empty with matching database"""
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertTrue(drift.is_empty())
+        self.assertEqual(str(drift), '')
+
+    def test_with_missing_column(self):
+        """Testing SchemaDrift with column missing from database"""
+        self.model_sig.add_field_sig(FieldSignature(
+            field_name='extra',
+            field_type=models.IntegerField))
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertFalse(drift.is_empty())
+        self.assertEqual(
+            str(drift),
+            'In model django_evolution.Evolution:\n'
+            '    Column "extra" does not exist')
+
+    def test_with_extra_column(self):
+        """Testing SchemaDrift with column missing from signature"""
+        self.model_sig.remove_field_sig('label')
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Column "label" is not in the signature',
+                    ],
+                },
+            })
+
+    def test_with_changed_column(self):
+        """Testing SchemaDrift with changed column attributes"""
+        field_sig = self.model_sig.get_field_sig('label')
+        field_sig.field_attrs['max_length'] = 50
+        field_sig.field_attrs['null'] = True
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Column "label" does not allow NULL values',
+                        'Column "label" has a max_length of 100 instead '
+                        'of 50',
+                    ],
+                },
+            })
+
+    def test_with_changed_column_type(self):
+        """Testing SchemaDrift with changed column type"""
+        field_sig = self.model_sig.get_field_sig('label')
+        field_sig.field_type = models.IntegerField
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        column_state = self.database_state.get_column('django_evolution',
+                                                      'label')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Column "label" has a type of "%s" instead of '
+                        '"integer"'
+                        % column_state.data_type,
+                    ],
+                },
+            })
+
+    def test_with_missing_index(self):
+        """Testing SchemaDrift with index missing from database"""
+        self.database_state.clear_indexes('django_evolution')
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Index on "version_id" does not exist',
+                    ],
+                },
+            })
+
+    def test_with_missing_table(self):
+        """Testing SchemaDrift with table missing from database"""
+        self.model_sig.table_name = 'missing_table'
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=self.database_state,
+                            database_name='default')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Table "missing_table" does not exist',
+                    ],
+                },
+            })
@@ -0,0 +1,635 @@
+from __future__ import unicode_literals
+
+from django.db import IntegrityError, connections, models, transaction
+from django.test.testcases import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.utils import six
+
+from django_evolution.db import (EvolutionOperationsMulti,
+                                 get_evolution_operations,
+                                 get_evolution_operations_class)
+from django_evolution.db.common import BatchedUpdateSQL
+from django_evolution.db.estimate import (CostEstimator, StatementCost,
+                                          summarize_costs)
+from django_evolution.db.state import DatabaseState
+from django_evolution.signals import backfilling_rows
+from django_evolution.utils import execute_sql, write_sql
+
+
+class BackfillTestModel(models.Model):
+    value = models.CharField(max_length=20, null=True)
+
+    class Meta:
+        db_table = 'backfill_test'
+
+
+class ColumnCacheTargetModel(models.Model):
+    value = models.CharField(max_length=20)
+
+
+class ColumnCacheModel(models.Model):
+    name = models.CharField(max_length=20)
+    target = models.ForeignKey(ColumnCacheTargetModel,
+                               on_delete=models.CASCADE)
+
+
+class CustomCharField(models.CharField):
+    pass
+
+
+class EvolutionOperationsTests(TestCase):
+    """Testing evolution operations lookup."""
+
+    def test_get_evolution_operations_class(self):
+        """Testing get_evolution_operations_class"""
+        cls = get_evolution_operations_class('default')
+        engine = connections['default'].settings_dict['ENGINE']
+
+        self.assertEqual(cls.__module__,
+                         'django_evolution.db.%s' % engine.split('.')[-1])
+        self.assertIs(get_evolution_operations_class('default'), cls)
+
+    def test_get_evolution_operations(self):
+        """Testing get_evolution_operations"""
+        database_state = DatabaseState(db_name='default', scan=False)
+        evolver = get_evolution_operations('default', database_state)
+
+        self.assertIsInstance(evolver,
+                              get_evolution_operations_class('default'))
+        self.assertIs(evolver.connection, connections['default'])
+        self.assertIs(evolver.database_state, database_state)
+
+    def test_get_evolution_operations_without_state(self):
+        """Testing get_evolution_operations without a database state"""
+        evolver = get_evolution_operations('db_multi')
+
+        self.assertIs(evolver.connection, connections['db_multi'])
+        self.assertEqual(evolver.database_state.db_name, 'db_multi')
+        self.assertEqual(evolver.database_state._tables, {})
+
+    def test_evolution_operations_multi(self):
+        """Testing EvolutionOperationsMulti.get_evolver"""
+        evolver = EvolutionOperationsMulti('default').get_evolver()
+
+        self.assertIsInstance(evolver,
+                              get_evolution_operations_class('default'))
+
+    def test_get_field_db_type(self):
+        """Testing BaseEvolutionOperations.get_field_db_type caches types"""
+        evolver = get_evolution_operations('default')
+        field = ColumnCacheModel._meta.get_field('name')
+        db_type = field.db_type(connection=evolver.connection)
+
+        self.assertEqual(evolver.get_field_db_type(field), db_type)
+        self.assertEqual(
+            evolver.get_column_cache()[
+                ('db_type',) + evolver.get_field_db_type_key(field)],
+            db_type)
+
+        # The cache is shared by all operations for the connection.
+        self.assertIs(get_evolution_operations('default').get_column_cache(),
+                      evolver.get_column_cache())
+        self.assertIsNot(get_evolution_operations('db_multi')
+                         .get_column_cache(),
+                         evolver.get_column_cache())
+
+    def test_get_field_db_type_key(self):
+        """Testing BaseEvolutionOperations.get_field_db_type_key"""
+        evolver = get_evolution_operations('default')
+        name_field = ColumnCacheModel._meta.get_field('name')
+        target_field = ColumnCacheModel._meta.get_field('target')
+        value_field = ColumnCacheTargetModel._meta.get_field('value')
+
+        self.assertEqual(evolver.get_field_db_type_key(name_field),
+                         (models.CharField, 'name', 20, None, None))
+        self.assertEqual(
+            evolver.get_field_db_type_key(target_field),
+            (models.ForeignKey,
+             evolver.get_field_db_type_key(
+                 ColumnCacheTargetModel._meta.pk)))
+        self.assertNotEqual(evolver.get_field_db_type_key(name_field),
+                            evolver.get_field_db_type_key(value_field))
+
+    def test_get_field_db_type_key_with_custom_field(self):
+        """Testing BaseEvolutionOperations.get_field_db_type_key with a
+        custom field type
+        """
+        evolver = get_evolution_operations('default')
+        field = CustomCharField(max_length=20)
+        field.set_attributes_from_name('name')
+
+        self.assertIsNone(evolver.get_field_db_type_key(field))
+        self.assertEqual(evolver.get_field_db_type(field),
+                         field.db_type(connection=evolver.connection))
+
+
+class BatchedUpdateSQLTests(TransactionTestCase):
+    """Testing batched backfills of column values."""
+
+    def setUp(self):
+        super(BatchedUpdateSQLTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+        qn = self.evolver.connection.ops.quote_name
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('CREATE TABLE %s (%s integer NOT NULL PRIMARY KEY,'
+                           ' %s varchar(20) NULL);'
+                           % (qn('backfill_test'), qn('id'), qn('value')))
+
+            for i in (1, 2, 3, 4, 6, 7, 9):
+                cursor.execute('INSERT INTO %s VALUES (%%s, %%s);'
+                               % qn('backfill_test'),
+                               (i, 'value%s' % i if i % 3 else None))
+        finally:
+            cursor.close()
+
+    def tearDown(self):
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('DROP TABLE %s;'
+                           % self.evolver.connection.ops.quote_name(
+                               'backfill_test'))
+        finally:
+            cursor.close()
+
+        super(BatchedUpdateSQLTests, self).tearDown()
+
+    def _make_statement(self, **kwargs):
+        options = {
+            'batch_size': 3,
+            'column': 'value',
+            'null_only': True,
+            'params': ('default',),
+            'pk_column': 'id',
+            'table_name': 'backfill_test',
+            'value_sql': '%s',
+        }
+        options.update(kwargs)
+
+        return BatchedUpdateSQL(evolver=self.evolver, **options)
+
+    def _execute(self, statement):
+        qn = self.evolver.connection.ops.quote_name
+        progress = []
+
+        def _on_backfilling_rows(sender, table_name, column_name,
+                                 rows_updated, last_pk, max_pk, **kwargs):
+            progress.append((table_name, column_name, rows_updated, last_pk,
+                             max_pk))
+
+        backfilling_rows.connect(_on_backfilling_rows)
+
+        try:
+            cursor = self.evolver.connection.cursor()
+
+            try:
+                execute_sql(cursor, [statement], 'default')
+
+                cursor.execute('SELECT %s, %s FROM %s ORDER BY %s;'
+                               % (qn('id'), qn('value'), qn('backfill_test'),
+                                  qn('id')))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            backfilling_rows.disconnect(_on_backfilling_rows)
+
+        return [tuple(row) for row in rows], progress
+
+    def test_execute(self):
+        """Testing BatchedUpdateSQL.execute"""
+        rows, progress = self._execute(self._make_statement(batch_size=2))
+
+        self.assertEqual(
+            rows,
+            [
+                (1, 'value1'),
+                (2, 'value2'),
+                (3, 'default'),
+                (4, 'value4'),
+                (6, 'default'),
+                (7, 'value7'),
+                (9, 'default'),
+            ])
+
+        # Only the primary keys of rows that need updating are batched.
+        self.assertEqual(
+            progress,
+            [
+                ('backfill_test', 'value', 2, 6, 9),
+                ('backfill_test', 'value', 3, 9, 9),
+            ])
+
+    def test_execute_with_sparse_keys(self):
+        """Testing BatchedUpdateSQL.execute with large gaps between primary
+        keys
+        """
+        qn = self.evolver.connection.ops.quote_name
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('INSERT INTO %s VALUES (%%s, %%s);'
+                           % qn('backfill_test'),
+                           (10 ** 12, None))
+        finally:
+            cursor.close()
+
+        rows, progress = self._execute(self._make_statement(null_only=False))
+
+        self.assertEqual(
+            rows,
+            [
+                (1, 'default'),
+                (2, 'default'),
+                (3, 'default'),
+                (4, 'default'),
+                (6, 'default'),
+                (7, 'default'),
+                (9, 'default'),
+                (10 ** 12, 'default'),
+            ])
+        self.assertEqual(
+            progress,
+            [
+                ('backfill_test', 'value', 3, 3, 10 ** 12),
+                ('backfill_test', 'value', 6, 7, 10 ** 12),
+                ('backfill_test', 'value', 8, 10 ** 12, 10 ** 12),
+            ])
+
+    def test_to_sql(self):
+        """Testing BatchedUpdateSQL.to_sql"""
+        qn = self.evolver.connection.ops.quote_name
+        statement = self._make_statement()
+
+        self.assertEqual(
+            statement.to_sql(),
+            ('UPDATE %s SET %s = %%s WHERE %s IS NULL;'
+             % (qn('backfill_test'), qn('value'), qn('value')),
+             ('default',)))
+        self.assertEqual(
+            write_sql([statement], 'default'),
+            [
+                "UPDATE %s SET %s = 'default' WHERE %s IS NULL;"
+                % (qn('backfill_test'), qn('value'), qn('value')),
+            ])
+
+    @override_settings(DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE=100)
+    def test_get_backfill_sql_with_batch_size(self):
+        """Testing BaseEvolutionOperations.get_backfill_sql with
+        DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE
+        """
+        field = BackfillTestModel._meta.get_field('value')
+        sql = self.evolver.get_backfill_sql(BackfillTestModel, field, '%s',
+                                            params=('default',),
+                                            allow_non_atomic=True)
+
+        self.assertEqual(len(sql), 1)
+        self.assertIsInstance(sql[0], BatchedUpdateSQL)
+        self.assertEqual(sql[0].batch_size, 100)
+        self.assertTrue(sql[0].transactional)
+
+    @override_settings(DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE=100,
+                       DJANGO_EVOLUTION_BACKFILL_NON_ATOMIC=True)
+    def test_get_backfill_sql_with_non_atomic(self):
+        """Testing BaseEvolutionOperations.get_backfill_sql with
+        DJANGO_EVOLUTION_BACKFILL_NON_ATOMIC
+        """
+        field = BackfillTestModel._meta.get_field('value')
+
+        sql = self.evolver.get_backfill_sql(BackfillTestModel, field, '%s',
+                                            params=('default',),
+                                            allow_non_atomic=True)
+        self.assertFalse(sql[0].transactional)
+
+        # Rows written after the commit must never be overwritten.
+        sql = self.evolver.get_backfill_sql(BackfillTestModel, field, '%s',
+                                            params=('default',),
+                                            null_only=False,
+                                            allow_non_atomic=True)
+        self.assertFalse(sql[0].transactional)
+        self.assertIsNotNone(sql[0].where)
+
+        sql = self.evolver.get_backfill_sql(BackfillTestModel, field, '%s',
+                                            params=('default',))
+        self.assertTrue(sql[0].transactional)
+
+
+    def test_mark_deferrable_backfills(self):
+        """Testing BaseEvolutionOperations.mark_deferrable_backfills"""
+        field = BackfillTestModel._meta.get_field('value')
+        other_field = BackfillTestModel._meta.get_field('id')
+
+        add_op = {
+            'type': 'add_column',
+            'field': field,
+        }
+        self.evolver.mark_deferrable_backfills([add_op], later_ops=[])
+        self.assertTrue(add_op['allow_non_atomic_backfill'])
+
+        # A later change to the column needs its values in the transaction.
+        change_op = {
+            'type': 'change_column',
+            'field': field,
+        }
+        self.evolver.mark_deferrable_backfills([add_op, change_op],
+                                               later_ops=[])
+        self.assertFalse(add_op['allow_non_atomic_backfill'])
+
+        self.evolver.mark_deferrable_backfills([add_op],
+                                               later_ops=[change_op])
+        self.assertFalse(add_op['allow_non_atomic_backfill'])
+
+        # Changes to other columns don't matter.
+        self.evolver.mark_deferrable_backfills(
+            [
+                add_op,
+                {
+                    'type': 'delete_column',
+                    'field': other_field,
+                },
+            ],
+            later_ops=[])
+        self.assertTrue(add_op['allow_non_atomic_backfill'])
+
+        # Custom SQL may depend on anything.
+        self.evolver.mark_deferrable_backfills(
+            [
+                add_op,
+                {
+                    'type': 'sql',
+                },
+            ],
+            later_ops=[])
+        self.assertFalse(add_op['allow_non_atomic_backfill'])
+
+        # Unknown later operations may depend on anything.
+        self.evolver.mark_deferrable_backfills([add_op], later_ops=None)
+        self.assertFalse(add_op['allow_non_atomic_backfill'])
+
+        self.evolver.mark_deferrable_backfills([add_op], later_ops=[])
+        self.assertTrue(add_op['allow_non_atomic_backfill'])
+
+        self.evolver.mark_deferrable_backfills([add_op])
+        self.assertFalse(add_op['allow_non_atomic_backfill'])
+
+
+class CostEstimatorTests(TransactionTestCase):
+    """Testing cost estimates for evolution SQL."""
+
+    def setUp(self):
+        super(CostEstimatorTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+        qn = self.evolver.connection.ops.quote_name
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('CREATE TABLE %s (%s integer NOT NULL PRIMARY KEY,'
+                           ' %s varchar(20) NULL);'
+                           % (qn('estimate_test'), qn('id'), qn('value')))
+
+            for i in range(5):
+                cursor.execute('INSERT INTO %s VALUES (%%s, %%s);'
+                               % qn('estimate_test'),
+                               (i, 'value%s' % i))
+        finally:
+            cursor.close()
+
+    def tearDown(self):
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('DROP TABLE %s;'
+                           % self.evolver.connection.ops.quote_name(
+                               'estimate_test'))
+        finally:
+            cursor.close()
+
+        super(CostEstimatorTests, self).tearDown()
+
+    def test_get_statement_cost(self):
+        """Testing BaseEvolutionOperations.get_statement_cost"""
+        qn = self.evolver.connection.ops.quote_name
+        table = qn('estimate_test')
+
+        self._check_cost('CREATE INDEX %s ON %s (%s);'
+                         % (qn('estimate_idx'), table, qn('value')),
+                         StatementCost.INDEX_BUILD, ['estimate_test'])
+        self._check_cost('ALTER TABLE %s ADD CONSTRAINT %s UNIQUE (%s);'
+                         % (table, qn('estimate_uniq'), qn('value')),
+                         StatementCost.INDEX_BUILD, ['estimate_test'])
+        self._check_cost('UPDATE %s SET %s = NULL;' % (table, qn('value')),
+                         StatementCost.TABLE_REWRITE, ['estimate_test'])
+        self._check_cost('INSERT INTO %s (%s) SELECT %s FROM %s;'
+                         % (qn('TEMP_TABLE'), qn('id'), qn('id'), table),
+                         StatementCost.TABLE_REWRITE,
+                         ['estimate_test', 'TEMP_TABLE'])
+        self._check_cost('DROP TABLE %s;' % table,
+                         StatementCost.METADATA, [])
+
+    def test_estimate(self):
+        """Testing CostEstimator.estimate"""
+        qn = self.evolver.connection.ops.quote_name
+        table = qn('estimate_test')
+
+        costs = CostEstimator(self.evolver).estimate([
+            'CREATE TABLE %s (%s integer);' % (qn('TEMP_TABLE'), qn('id')),
+            ('UPDATE %s SET %s = %%s;' % (table, qn('value')), ['x']),
+            'INSERT INTO %s (%s) SELECT %s FROM %s;'
+            % (table, qn('id'), qn('id'), qn('TEMP_TABLE')),
+            'CREATE INDEX %s ON %s (%s);'
+            % (qn('estimate_idx'), qn('TEMP_TABLE'), qn('id')),
+        ])
+
+        self.assertEqual(
+            [
+                (cost.kind, cost.table_name, cost.row_count)
+                for cost in costs
+            ],
+            [
+                (StatementCost.METADATA, None, None),
+                (StatementCost.TABLE_REWRITE, 'estimate_test', 5),
+                (StatementCost.TABLE_REWRITE, 'estimate_test', 5),
+                (StatementCost.INDEX_BUILD, None, None),
+            ])
+        self.assertEqual(six.text_type(costs[0]), 'metadata only')
+        self.assertEqual(six.text_type(costs[1]),
+                         'table rewrite of estimate_test (~5 rows)')
+        self.assertEqual(six.text_type(costs[3]),
+                         'index build of TEMP_TABLE (unknown rows)')
+
+        self.assertEqual(
+            summarize_costs(costs),
+            {
+                StatementCost.METADATA: (1, 0),
+                StatementCost.TABLE_SCAN: (0, 0),
+                StatementCost.INDEX_BUILD: (1, 0),
+                StatementCost.TABLE_REWRITE: (2, 10),
+            })
+
+    def _check_cost(self, sql, kind, table_names):
+        cost = self.evolver.get_statement_cost(sql)
+
+        self.assertEqual(cost.sql, sql)
+        self.assertEqual(cost.kind, kind)
+        self.assertEqual(cost.table_names, table_names)
+
+
+class ExecuteSQLTests(TransactionTestCase):
+    """Testing execute_sql."""
+
+    def setUp(self):
+        super(ExecuteSQLTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+        qn = self.evolver.connection.ops.quote_name
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('CREATE TABLE %s (%s integer NOT NULL PRIMARY KEY);'
+                           % (qn('execute_test'), qn('id')))
+        finally:
+            cursor.close()
+
+    def tearDown(self):
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('DROP TABLE %s;'
+                           % self.evolver.connection.ops.quote_name(
+                               'execute_test'))
+        finally:
+            cursor.close()
+
+        super(ExecuteSQLTests, self).tearDown()
+
+    def test_execute_sql_with_executemany(self):
+        """Testing execute_sql batches parameterized statements with
+        executemany
+        """
+        sql = self._make_insert_sql([1, 2, 3])
+        sql.insert(2, '-- Comment')
+
+        with transaction.atomic():
+            cursor = _RecordingCursor(self.evolver.connection.cursor())
+            execute_sql(cursor, sql, 'default', evolver=self.evolver)
+
+        self.assertEqual(cursor.calls,
+                         [('executemany', sql[0][0], 3)])
+        self.assertEqual(self._get_ids(), [1, 2, 3])
+
+    @override_settings(DJANGO_EVOLUTION_STATEMENT_BATCH_SIZE=1)
+    def test_execute_sql_without_batching(self):
+        """Testing execute_sql with DJANGO_EVOLUTION_STATEMENT_BATCH_SIZE=1
+        """
+        sql = self._make_insert_sql([1, 2])
+
+        with transaction.atomic():
+            cursor = _RecordingCursor(self.evolver.connection.cursor())
+            execute_sql(cursor, sql, 'default', evolver=self.evolver)
+
+        self.assertEqual(cursor.calls,
+                         [('execute', sql[0][0], 1),
+                          ('execute', sql[0][0], 1)])
+        self.assertEqual(self._get_ids(), [1, 2])
+
+    def test_execute_sql_with_failed_batch(self):
+        """Testing execute_sql reports the failing statement in a batch"""
+        sql = self._make_insert_sql([1, 2, 1, 3])
+
+        with self.assertRaises(IntegrityError) as ctx:
+            with transaction.atomic():
+                execute_sql(self.evolver.connection.cursor(), sql, 'default',
+                            evolver=self.evolver)
+
+        self.assertEqual(ctx.exception.last_sql_statement, sql[2])
+        self.assertEqual(self._get_ids(), [])
+
+    def test_execute_sql_with_scripts(self):
+        """Testing execute_sql batches statements into scripts when
+        supported
+        """
+        qn = self.evolver.connection.ops.quote_name
+        self.evolver.supports_statement_scripts = True
+        statement = BatchedUpdateSQL(evolver=self.evolver,
+                                     table_name='execute_test',
+                                     pk_column='id',
+                                     column='id',
+                                     value_sql='id',
+                                     params=(),
+                                     null_only=False,
+                                     batch_size=10)
+        sql = [
+            'SELECT 1;',
+            'SELECT 2',
+            statement,
+            'SELECT 3;',
+        ]
+
+        with transaction.atomic():
+            cursor = _RecordingCursor(self.evolver.connection.cursor(),
+                                      passthrough=False)
+            execute_sql(cursor, sql, 'default', evolver=self.evolver)
+
+        self.assertEqual(
+            cursor.calls,
+            [
+                ('execute', 'SELECT 1;\nSELECT 2;', 1),
+                ('execute',
+                 'SELECT MIN(%s), MAX(%s) FROM %s;'
+                 % (qn('id'), qn('id'), qn('execute_test')),
+                 1),
+                ('execute', 'SELECT 3;', 1),
+            ])
+
+    def _make_insert_sql(self, ids):
+        qn = self.evolver.connection.ops.quote_name
+
+        return [
+            ('INSERT INTO %s (%s) VALUES (%%s);'
+             % (qn('execute_test'), qn('id')),
+             (i,))
+            for i in ids
+        ]
+
+    def _get_ids(self):
+        qn = self.evolver.connection.ops.quote_name
+        cursor = self.evolver.connection.cursor()
+
+        try:
+            cursor.execute('SELECT %s FROM %s ORDER BY %s;'
+                           % (qn('id'), qn('execute_test'), qn('id')))
+
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+class _RecordingCursor(object):
+    """A cursor wrapper recording the statements executed."""
+
+    def __init__(self, cursor, passthrough=True):
+        self.cursor = cursor
+        self.passthrough = passthrough
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append(('execute', sql, 1))
+
+        if self.passthrough:
+            return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        self.calls.append(('executemany', sql, len(param_list)))
+
+        if self.passthrough:
+            return self.cursor.executemany(sql, param_list)
+
+    def fetchone(self):
+        return (None, None)
@@ -2,11 +2,18 @@
 
 from __future__ import unicode_literals
 
+import json
+import os
+import shutil
+import tempfile
+
 from django.db import connections, models
 from django.dispatch import receiver
+from django.test.utils import override_settings
 
 from django_evolution.compat.apps import get_app, get_apps
 from django_evolution.errors import (EvolutionBaselineMissingError,
+                                     EvolutionExecutionError,
                                      EvolutionTaskAlreadyQueuedError,
                                      QueueEvolverTaskError)
 from django_evolution.evolve import (BaseEvolutionTask, EvolveAppTask,
@@ -18,6 +25,7 @@ from django_evolution.signature import AppSignature, ModelSignature
 from django_evolution.tests import models as evo_test
 from django_evolution.tests.base_test_case import EvolutionTestCase
 from django_evolution.tests.utils import ensure_test_db
+from django_evolution.utils import execute_sql, split_non_transactional_sql
 
 
 class DummyTask(BaseEvolutionTask):
@@ -34,6 +42,84 @@ class DummyTask(BaseEvolutionTask):
         return 'Dummy Task'
 
 
+class RecordTransactionSQL(object):
+    """A statement recording whether it was executed in a transaction."""
+
+    def __init__(self, transactional):
+        self.transactional = transactional
+        self.in_atomic_block = None
+
+    def to_sql(self):
+        return '-- Record transaction'
+
+    def execute(self, cursor):
+        self.in_atomic_block = connections['default'].in_atomic_block
+
+
+class FailingSQL(object):
+    """A non-transactional statement that fails when executed."""
+
+    transactional = False
+
+    def to_sql(self):
+        return '-- Fail'
+
+    def execute(self, cursor):
+        raise Exception('Oh no')
+
+
+class NonTransactionalSQLTask(BaseEvolutionTask):
+    def prepare(self, **kwargs):
+        self.evolution_required = True
+        self.sql, self.non_transactional_sql = split_non_transactional_sql([
+            RecordTransactionSQL(transactional=False),
+            RecordTransactionSQL(transactional=True),
+        ])
+
+    def execute(self, cursor):
+        execute_sql(cursor, self.sql, self.evolver.database_name)
+
+    def get_evolution_content(self):
+        return None
+
+    def __str__(self):
+        return 'Non-Transactional SQL Task'
+
+
+class DependentSQLTask(BaseEvolutionTask):
+    def __init__(self, task_id, evolver, sql):
+        super(DependentSQLTask, self).__init__(task_id, evolver)
+
+        self._sql = sql
+
+    def prepare(self, **kwargs):
+        self.evolution_required = True
+        self.sql, self.non_transactional_sql = \
+            split_non_transactional_sql(self._sql)
+
+    def execute(self, cursor):
+        execute_sql(cursor, self.sql, self.evolver.database_name)
+
+    def get_evolution_content(self):
+        return None
+
+    def __str__(self):
+        return 'Dependent SQL Task'
+
+
+class IndexSQL(object):
+    """A non-transactional statement operating on an index."""
+
+    transactional = False
+
+    def __init__(self, index_name):
+        self.sql = 'CREATE INDEX "%s" ON "tests_table" ("value");' % index_name
+        self.object_names = [index_name]
+
+    def to_sql(self):
+        return self.sql
+
+
 class EvolverTestModel(models.Model):
     value = models.CharField(max_length=100)
 
@@ -496,6 +582,88 @@ class EvolverTests(BaseEvolverTestCase):
             200)
         self.assertIsNotNone(model_sig.get_field_sig('new_field'))
 
+    def test_evolve_with_non_transactional_sql(self):
+        """Testing Evolver.evolve runs non-transactional SQL after the
+        transaction
+        """
+        evolver = Evolver()
+        task = NonTransactionalSQLTask('non-transactional', evolver)
+        evolver.queue_task(task)
+        evolver.evolve()
+
+        self.assertTrue(evolver.evolved)
+        self.assertEqual(len(task.sql), 1)
+        self.assertEqual(len(task.non_transactional_sql), 1)
+        self.assertTrue(task.sql[0].in_atomic_block)
+        self.assertFalse(task.non_transactional_sql[0].in_atomic_block)
+
+    def test_evolve_with_non_transactional_sql_failure(self):
+        """Testing Evolver.evolve with non-transactional SQL failing lists
+        the SQL that was not run
+        """
+        record_sql1 = RecordTransactionSQL(transactional=False)
+        record_sql2 = RecordTransactionSQL(transactional=False)
+        record_sql3 = RecordTransactionSQL(transactional=False)
+
+        evolver = Evolver()
+        evolver.queue_task(DependentSQLTask('task1', evolver, [
+            record_sql1,
+            FailingSQL(),
+            record_sql2,
+        ]))
+        evolver.queue_task(DependentSQLTask('task2', evolver, [
+            record_sql3,
+        ]))
+
+        with self.assertRaises(EvolutionExecutionError) as cm:
+            evolver.evolve()
+
+        self.assertEqual(
+            cm.exception.pending_sql,
+            [
+                '-- Fail',
+                '-- Record transaction',
+                '-- Record transaction',
+            ])
+        self.assertTrue(evolver.evolved)
+        self.assertFalse(record_sql1.in_atomic_block)
+        self.assertIsNone(record_sql2.in_atomic_block)
+        self.assertIsNone(record_sql3.in_atomic_block)
+
+    def test_prepare_with_dependent_non_transactional_sql(self):
+        """Testing Evolver task preparation keeps non-transactional SQL in
+        the transaction when later SQL depends on it
+        """
+        index1_sql = IndexSQL('tests_index1')
+        index2_sql = IndexSQL('tests_index2')
+        index3_sql = IndexSQL('tests_index3')
+
+        evolver = Evolver()
+        task1 = DependentSQLTask('task1', evolver, [
+            index1_sql,
+            index2_sql,
+            'DROP INDEX "tests_index2";',
+        ])
+        task2 = DependentSQLTask('task2', evolver, [
+            index3_sql,
+            'ALTER TABLE "tests_table" ADD CONSTRAINT "tests_fk"'
+            ' FOREIGN KEY ("value") REFERENCES "tests_index1";',
+        ])
+        evolver.queue_task(task1)
+        evolver.queue_task(task2)
+
+        self.assertEqual(list(evolver.tasks), [task1, task2])
+        self.assertEqual(
+            task1.sql,
+            [
+                index2_sql.sql,
+                'DROP INDEX "tests_index2";',
+                index1_sql.sql,
+            ])
+        self.assertEqual(task1.non_transactional_sql, [])
+        self.assertEqual(task2.sql, [task2._sql[1]])
+        self.assertEqual(task2.non_transactional_sql, [index3_sql])
+
     def test_evolve_with_hinted(self):
         """Testing Evolver.evolve with hinting"""
         model_sig = ModelSignature.from_model(EvolverTestModel)
@@ -592,6 +760,150 @@ class EvolveAppTaskTests(BaseEvolverTestCase):
                          self.get_sql_mapping('evolve_app_task'))
         self.assertEqual(len(task.new_evolutions), 0)
 
+    def test_prepare_with_sql_cache(self):
+        """Testing EvolveAppTask.prepare with SQL cache"""
+        cache_dir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+        evolutions = [
+            {
+                'label': 'my_evolution1',
+                'mutations': [
+                    ChangeField('TestModel', 'value', max_length=100),
+                ],
+            },
+        ]
+
+        try:
+            with override_settings(DJANGO_EVOLUTION_SQL_CACHE_DIR=cache_dir):
+                evolver = Evolver()
+                task = EvolveAppTask(evolver=evolver,
+                                     app=evo_test,
+                                     evolutions=evolutions)
+                task.prepare(hinted=False)
+
+                self.assertEqual('\n'.join(task.sql),
+                                 self.get_sql_mapping('evolve_app_task'))
+
+                filenames = os.listdir(cache_dir)
+                self.assertEqual(len(filenames), 1)
+
+                # Poison the cached SQL. If the cache is used, this will be
+                # returned on the next preparation.
+                cache_path = os.path.join(cache_dir, filenames[0])
+
+                with open(cache_path, 'r') as fp:
+                    data = json.load(fp)
+
+                data['sql'] = ['-- Cached SQL', ['SELECT %s;', [1]]]
+
+                with open(cache_path, 'w') as fp:
+                    json.dump(data, fp)
+
+                cached_evolver = Evolver()
+                cached_task = EvolveAppTask(evolver=cached_evolver,
+                                            app=evo_test,
+                                            evolutions=evolutions)
+                cached_task.prepare(hinted=False)
+
+                self.assertTrue(cached_task.evolution_required)
+                self.assertTrue(cached_task.can_simulate)
+                self.assertEqual(cached_task.sql,
+                                 ['-- Cached SQL', ('SELECT %s;', [1])])
+                self.assertEqual(len(cached_task.new_evolutions), 1)
+                self.assertEqual(cached_evolver.project_sig,
+                                 evolver.project_sig)
+                self.assertNotEqual(cached_evolver.project_sig,
+                                    Version.objects.current_version()
+                                    .signature)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_prepare_with_sql_cache_and_database_state(self):
+        """Testing EvolveAppTask.prepare with SQL cache applies database state
+        changes
+        """
+        cache_dir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+        evolutions = [
+            {
+                'label': 'my_evolution1',
+                'mutations': [
+                    ChangeField('TestModel', 'value', db_index=True),
+                ],
+            },
+        ]
+
+        try:
+            with override_settings(DJANGO_EVOLUTION_SQL_CACHE_DIR=cache_dir):
+                with ensure_test_db(model_entries=[('TestModel',
+                                                    EvolverTestModel)]):
+                    evolver = Evolver()
+                    table_name = (
+                        evolver.project_sig
+                        .get_app_sig('tests')
+                        .get_model_sig('TestModel')
+                        .table_name
+                    )
+                    old_indexes = list(
+                        evolver.database_state.iter_indexes(table_name))
+
+                    task = EvolveAppTask(evolver=evolver,
+                                         app=evo_test,
+                                         evolutions=evolutions)
+                    task.prepare(hinted=False)
+
+                    new_indexes = list(
+                        evolver.database_state.iter_indexes(table_name))
+                    self.assertNotEqual(new_indexes, old_indexes)
+
+                    cached_evolver = Evolver()
+                    cached_task = EvolveAppTask(evolver=cached_evolver,
+                                                app=evo_test,
+                                                evolutions=evolutions)
+                    cached_task.prepare(hinted=False)
+
+                    self.assertEqual(cached_task.sql, task.sql)
+                    self.assertEqual(
+                        list(cached_evolver.database_state.iter_indexes(
+                            table_name)),
+                        new_indexes)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_prepare_with_sql_cache_and_changed_mutations(self):
+        """Testing EvolveAppTask.prepare with SQL cache and changed mutations
+        """
+        cache_dir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+
+        try:
+            with override_settings(DJANGO_EVOLUTION_SQL_CACHE_DIR=cache_dir):
+                for max_length in (100, 200):
+                    evolver = Evolver()
+                    task = EvolveAppTask(
+                        evolver=evolver,
+                        app=evo_test,
+                        evolutions=[
+                            {
+                                'label': 'my_evolution1',
+                                'mutations': [
+                                    ChangeField('TestModel', 'value',
+                                                max_length=max_length),
+                                ],
+                            },
+                        ])
+                    task.prepare(hinted=False)
+
+                self.assertEqual(len(os.listdir(cache_dir)), 2)
+                self.assertNotEqual('\n'.join(task.sql),
+                                    self.get_sql_mapping('evolve_app_task'))
+                self.assertEqual(
+                    (evolver.project_sig
+                     .get_app_sig('tests')
+                     .get_model_sig('TestModel')
+                     .get_field_sig('value')
+                     .field_attrs['max_length']),
+                    200)
+        finally:
+            shutil.rmtree(cache_dir)
+
     def test_execute(self):
         """Testing EvolveAppTask.execute"""
         saw = set()
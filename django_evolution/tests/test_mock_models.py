@@ -0,0 +1,98 @@
+"""Unit tests for django_evolution.mock_models."""
+
+from __future__ import unicode_literals
+
+import gc
+
+from django.db import models
+
+from django_evolution.compat.models import get_remote_field
+from django_evolution.mock_models import (MockModel, _stub_models,
+                                          create_field, get_stub_model)
+from django_evolution.signature import (AppSignature, FieldSignature,
+                                        ModelSignature, ProjectSignature)
+from django_evolution.tests.base_test_case import TestCase
+
+
+class MockModelsTests(TestCase):
+    """Unit tests for django_evolution.mock_models."""
+
+    def setUp(self):
+        super(MockModelsTests, self).setUp()
+
+        model_sig = ModelSignature(model_name='Target',
+                                   table_name='tests_target')
+        model_sig.add_field_sig(FieldSignature(
+            field_name='id',
+            field_type=models.AutoField,
+            field_attrs={
+                'primary_key': True,
+            }))
+
+        app_sig = AppSignature(app_id='tests')
+        app_sig.add_model_sig(model_sig)
+
+        self.project_sig = ProjectSignature()
+        self.project_sig.add_app_sig(app_sig)
+        self.model_sig = model_sig
+
+    def test_get_stub_model(self):
+        """Testing get_stub_model reuses stub models"""
+        stub = get_stub_model(self.project_sig, 'tests', 'Target')
+
+        self.assertIsInstance(stub, MockModel)
+        self.assertEqual(stub._meta.db_table, 'tests_target')
+        self.assertIs(get_stub_model(self.project_sig, 'tests', 'Target'),
+                      stub)
+        self.assertIsNot(get_stub_model(self.project_sig.clone(),
+                                        'tests', 'Target'),
+                         stub)
+
+    def test_get_stub_model_after_signature_change(self):
+        """Testing get_stub_model after the model signature changes"""
+        stub = get_stub_model(self.project_sig, 'tests', 'Target')
+        self.model_sig.table_name = 'tests_new_target'
+
+        new_stub = get_stub_model(self.project_sig, 'tests', 'Target')
+        self.assertIsNot(new_stub, stub)
+        self.assertEqual(new_stub._meta.db_table, 'tests_new_target')
+
+    def test_get_stub_model_after_fields_change(self):
+        """Testing get_stub_model after the stub's fields are modified"""
+        stub = get_stub_model(self.project_sig, 'tests', 'Target')
+        stub._meta._fields.clear()
+
+        self.assertIsNot(get_stub_model(self.project_sig, 'tests', 'Target'),
+                         stub)
+
+    def test_get_stub_model_frees_signature(self):
+        """Testing get_stub_model doesn't keep project signatures alive"""
+        key = id(self.project_sig)
+        stub = get_stub_model(self.project_sig, 'tests', 'Target')
+        self.assertIn(key, _stub_models)
+
+        del stub
+        self.project_sig = None
+        self.model_sig = None
+        gc.collect()
+
+        self.assertNotIn(key, _stub_models)
+
+    def test_create_field_with_related_model(self):
+        """Testing create_field shares stub models for related fields"""
+        field1 = create_field(project_sig=self.project_sig,
+                              field_name='target1',
+                              field_type=models.ForeignKey,
+                              field_attrs={},
+                              parent_model=None,
+                              related_model='tests.Target')
+        field2 = create_field(project_sig=self.project_sig,
+                              field_name='target2',
+                              field_type=models.ForeignKey,
+                              field_attrs={},
+                              parent_model=None,
+                              related_model='tests.Target')
+
+        self.assertIsNot(field1, field2)
+        self.assertIs(get_remote_field(field1).model,
+                      get_remote_field(field2).model)
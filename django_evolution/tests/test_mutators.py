@@ -0,0 +1,95 @@
+"""Unit tests for django_evolution.mutators."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+
+from django_evolution.mutations import AddField, ChangeField, SQLMutation
+from django_evolution.mutators import AppMutator, ModelMutator
+from django_evolution.tests.base_test_case import EvolutionTestCase
+
+
+class MutatorBaseModel(models.Model):
+    char_field = models.CharField(max_length=20)
+    int_field = models.IntegerField()
+
+
+class ModelMutatorTests(EvolutionTestCase):
+    """Unit tests for django_evolution.mutators.ModelMutator."""
+
+    default_base_model = MutatorBaseModel
+
+    def setUp(self):
+        super(ModelMutatorTests, self).setUp()
+
+        self.set_base_model(self.default_base_model)
+
+        app_mutator = AppMutator(app_label='tests',
+                                 project_sig=self.start_sig.clone(),
+                                 database_state=self.database_state.clone())
+        self.model_mutator = ModelMutator(
+            app_mutator=app_mutator,
+            model_name='TestModel',
+            app_label='tests',
+            project_sig=app_mutator.project_sig,
+            database_state=app_mutator.database_state,
+            database='default')
+
+    def test_create_model(self):
+        """Testing ModelMutator.create_model reuses mock models"""
+        model = self.model_mutator.create_model()
+
+        self.assertEqual(model._meta.db_table, 'tests_testmodel')
+        self.assertIs(self.model_mutator.create_model(), model)
+
+    def test_create_model_after_simulation(self):
+        """Testing ModelMutator.create_model after a simulation changes the
+        model signature
+        """
+        model = self.model_mutator.create_model()
+        self.model_mutator.run_simulation(
+            ChangeField('TestModel', 'char_field', max_length=50))
+
+        new_model = self.model_mutator.create_model()
+        self.assertIsNot(new_model, model)
+        self.assertEqual(new_model._meta.get_field('char_field').max_length,
+                         50)
+        self.assertIs(self.model_mutator.create_model(), new_model)
+
+    def test_create_model_after_finish_op(self):
+        """Testing ModelMutator.create_model after finishing an operation"""
+        model = self.model_mutator.create_model()
+
+        # This simulation won't change the signature, but the model may
+        # have been modified while generating SQL for the operation.
+        self.model_mutator.finish_op({
+            'mutation': SQLMutation('noop', [],
+                                    update_func=lambda simulation: None),
+        })
+
+        self.assertIsNot(self.model_mutator.create_model(), model)
+
+
+class AppMutatorTests(EvolutionTestCase):
+    """Unit tests for django_evolution.mutators.AppMutator."""
+
+    default_base_model = MutatorBaseModel
+
+    def test_get_later_model_ops(self):
+        """Testing AppMutator._get_later_model_ops"""
+        self.set_base_model(self.default_base_model)
+
+        app_mutator = AppMutator(app_label='tests',
+                                 project_sig=self.start_sig.clone(),
+                                 database_state=self.database_state.clone())
+        app_mutator.run_mutations([
+            AddField('TestModel', 'added_field', models.IntegerField,
+                     initial=1, null=True),
+            SQLMutation('noop', [], update_func=lambda simulation: None),
+            ChangeField('TestModel', 'char_field', max_length=50),
+        ])
+        app_mutator._finalize_model_mutator()
+
+        # Nothing is known about operations before custom SQL.
+        self.assertEqual(app_mutator._get_later_model_ops(),
+                         [None, None, []])
@@ -0,0 +1,269 @@
+from __future__ import unicode_literals
+
+from unittest import SkipTest
+
+from django.db import connection, models
+from django.test.utils import override_settings
+
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.mysql import InstantAlterTableSQL
+from django_evolution.db.sql_result import AlterTableSQLResult
+from django_evolution.errors import EvolutionNotImplementedError
+from django_evolution.mutations import AddField, ChangeField, RenameField
+from django_evolution.tests.base_test_case import EvolutionTestCase
+
+
+class MySQLBaseModel(models.Model):
+    char_field = models.CharField(max_length=20)
+    int_field = models.IntegerField()
+
+
+@override_settings(DJANGO_EVOLUTION_MYSQL_ONLINE_DDL=True)
+class MySQLOnlineDDLTests(EvolutionTestCase):
+    """Testing online DDL hints on MySQL."""
+    sql_mapping_key = 'mysql_online_ddl'
+    default_base_model = MySQLBaseModel
+
+    def setUp(self):
+        if connection.vendor != 'mysql':
+            raise SkipTest('This test requires MySQL')
+
+        super(MySQLOnlineDDLTests, self).setUp()
+
+    def test_add_unique_column(self):
+        """Testing AddField with unique=True uses ALGORITHM=INPLACE"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            added_field = models.IntegerField(unique=True, null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         unique=True, null=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            [
+                "AddField('TestModel', 'added_field', models.IntegerField,"
+                " null=True, unique=True)",
+            ],
+            'AddUniqueColumn')
+
+    def test_set_null(self):
+        """Testing ChangeField with null=True uses ALGORITHM=INPLACE"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField(null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeField('TestModel', 'int_field', initial=None,
+                            null=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    In field 'int_field':\n"
+             "        Property 'null' has changed"),
+            [
+                "ChangeField('TestModel', 'int_field', initial=None,"
+                " null=True)",
+            ],
+            'SetNull')
+
+    def test_rename_column(self):
+        """Testing RenameField uses ALGORITHM=INPLACE"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            renamed_field = models.IntegerField()
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                RenameField('TestModel', 'int_field', 'renamed_field'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'renamed_field' has been added\n"
+             "    Field 'int_field' has been deleted"),
+            [
+                "AddField('TestModel', 'renamed_field', models.IntegerField,"
+                " initial=<<USER VALUE REQUIRED>>)",
+
+                "DeleteField('TestModel', 'int_field')",
+            ],
+            'RenameColumn')
+
+    def test_change_max_length(self):
+        """Testing ChangeField with max_length doesn't hint an algorithm"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=30)
+            int_field = models.IntegerField()
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeField('TestModel', 'char_field', initial=None,
+                            max_length=30),
+            ],
+            ("In model tests.TestModel:\n"
+             "    In field 'char_field':\n"
+             "        Property 'max_length' has changed"),
+            [
+                "ChangeField('TestModel', 'char_field', initial=None,"
+                " max_length=30)",
+            ],
+            'ChangeMaxLength')
+
+    @override_settings(DJANGO_EVOLUTION_MYSQL_ONLINE_DDL_STRICT=True)
+    def test_strict_with_table_copy(self):
+        """Testing strict online DDL with an operation requiring a table
+        copy
+        """
+        evolver = get_evolution_operations('default')
+        sql_result = AlterTableSQLResult(
+            evolver,
+            self.default_base_model,
+            alter_table=[
+                {
+                    'op': 'MODIFY COLUMN',
+                    'column': 'char_field',
+                    'db_type': 'varchar(30)',
+                    'algorithm': 'COPY',
+                },
+            ])
+
+        with self.assertRaises(EvolutionNotImplementedError):
+            sql_result.to_sql()
+
+    @override_settings(DJANGO_EVOLUTION_MYSQL_ONLINE_DDL_STRICT=True)
+    def test_strict_with_unknown_operation(self):
+        """Testing strict online DDL with an operation of unknown cost"""
+        evolver = get_evolution_operations('default')
+        sql_result = AlterTableSQLResult(
+            evolver,
+            self.default_base_model,
+            alter_table=[
+                {
+                    'op': 'DROP COLUMN',
+                    'column': 'int_field',
+                },
+                {
+                    'sql': 'ADD FULLTEXT INDEX (char_field)',
+                },
+            ])
+
+        with self.assertRaises(EvolutionNotImplementedError):
+            sql_result.to_sql()
+
+    def test_combined_operations(self):
+        """Testing online DDL uses the weakest algorithm of all operations
+        in a statement
+        """
+        evolver = get_evolution_operations('default')
+        sql_result = AlterTableSQLResult(
+            evolver,
+            self.default_base_model,
+            alter_table=[
+                {
+                    'op': 'MODIFY COLUMN',
+                    'column': 'int_field',
+                    'db_type': 'integer',
+                    'params': ['DEFAULT NULL'],
+                    'algorithm': 'INPLACE',
+                },
+                {
+                    'op': 'ADD COLUMN',
+                    'column': 'added_field',
+                    'db_type': 'integer',
+                    'params': ['NULL'],
+                },
+            ])
+
+        self.assertEqual(
+            sql_result.to_sql(),
+            [
+                'ALTER TABLE `tests_testmodel`'
+                ' MODIFY COLUMN `int_field` integer DEFAULT NULL,'
+                ' ADD COLUMN `added_field` integer NULL,'
+                ' ALGORITHM=INPLACE, LOCK=NONE;',
+            ])
+
+
+    def test_instant_falls_back_to_inplace(self):
+        """Testing ALGORITHM=INSTANT statements fall back to
+        ALGORITHM=INPLACE when the table can't be altered instantly
+        """
+        class UnsupportedCursor(object):
+            def __init__(self):
+                self.executed = []
+
+            def execute(self, sql, params=()):
+                self.executed.append(sql)
+
+                if 'ALGORITHM=INSTANT' in sql:
+                    raise Exception(1846, 'ALGORITHM=INSTANT is not '
+                                          'supported.')
+
+        evolver = get_evolution_operations('default')
+        sql_result = AlterTableSQLResult(
+            evolver,
+            self.default_base_model,
+            alter_table=[
+                {
+                    'op': 'ADD COLUMN',
+                    'column': 'added_field',
+                    'db_type': 'integer',
+                    'params': ['NULL'],
+                    'algorithm': 'INSTANT',
+                },
+            ])
+
+        statements = sql_result.to_sql()
+        self.assertEqual(len(statements), 1)
+
+        statement = statements[0]
+        self.assertIsInstance(statement, InstantAlterTableSQL)
+        self.assertEqual(
+            statement.to_sql(),
+            'ALTER TABLE `tests_testmodel`'
+            ' ADD COLUMN `added_field` integer NULL,'
+            ' ALGORITHM=INSTANT;')
+
+        cursor = UnsupportedCursor()
+        statement.execute(cursor)
+
+        self.assertEqual(
+            cursor.executed,
+            [
+                'ALTER TABLE `tests_testmodel`'
+                ' ADD COLUMN `added_field` integer NULL,'
+                ' ALGORITHM=INSTANT;',
+                'ALTER TABLE `tests_testmodel`'
+                ' ADD COLUMN `added_field` integer NULL,'
+                ' ALGORITHM=INPLACE, LOCK=NONE;',
+            ])
+
+
+class MySQLColumnTypeTests(EvolutionTestCase):
+    """Testing column type normalization on MySQL."""
+
+    def setUp(self):
+        if connection.vendor != 'mysql':
+            raise SkipTest('This test requires MySQL')
+
+        super(MySQLColumnTypeTests, self).setUp()
+
+    def test_normalize_column_type(self):
+        """Testing EvolutionOperations.normalize_column_type"""
+        evolver = get_evolution_operations('default')
+
+        for db_type, data_type in (('integer AUTO_INCREMENT', 'int'),
+                                   ('integer UNSIGNED', 'int'),
+                                   ('bool', 'tinyint'),
+                                   ('varchar(100)', 'varchar'),
+                                   ('datetime(6)', 'datetime'),
+                                   ('numeric(10, 2)', 'decimal'),
+                                   ('double precision', 'double')):
+            self.assertEqual(evolver.normalize_column_type(db_type),
+                             evolver.normalize_column_type(data_type))
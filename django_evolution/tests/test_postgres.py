@@ -0,0 +1,497 @@
+from __future__ import unicode_literals
+
+from unittest import SkipTest
+
+from django.db import connection, models
+from django.test.testcases import TransactionTestCase
+from django.test.utils import override_settings
+
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.postgresql import (ConcurrentIndexSQL,
+                                            ValidateConstraintSQL)
+from django_evolution.db.state import DatabaseState
+from django_evolution.drift import SchemaDrift
+from django_evolution.models import Evolution, Version
+from django_evolution.mutations import AddField, ChangeField, ChangeMeta
+from django_evolution.signature import AppSignature, ProjectSignature
+from django_evolution.tests.base_test_case import EvolutionTestCase
+from django_evolution.utils import split_non_transactional_sql
+
+
+class PostgresAnchor(models.Model):
+    value = models.IntegerField()
+
+
+class PostgresBaseModel(models.Model):
+    char_field = models.CharField(max_length=20)
+    int_field = models.IntegerField()
+    indexed_field = models.IntegerField(db_index=True)
+
+
+@override_settings(DJANGO_EVOLUTION_POSTGRES_CONCURRENT_INDEXES=True)
+class PostgresConcurrentIndexesTests(EvolutionTestCase):
+    """Testing concurrent index builds on Postgres."""
+    sql_mapping_key = 'postgres_concurrent_indexes'
+    default_base_model = PostgresBaseModel
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            raise SkipTest('This test requires Postgres')
+
+        super(PostgresConcurrentIndexesTests, self).setUp()
+
+    def test_add_indexed_column(self):
+        """Testing AddField with db_index=True creates the index
+        concurrently
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.IntegerField(db_index=True, null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         null=True, db_index=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            [
+                "AddField('TestModel', 'added_field', models.IntegerField,"
+                " db_index=True, null=True)",
+            ],
+            'AddIndexedColumn')
+
+    def test_drop_column_index(self):
+        """Testing ChangeField with db_index=False drops the index
+        concurrently
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField()
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeField('TestModel', 'indexed_field', db_index=False),
+            ],
+            ("In model tests.TestModel:\n"
+             "    In field 'indexed_field':\n"
+             "        Property 'db_index' has changed"),
+            [
+                "ChangeField('TestModel', 'indexed_field', initial=None,"
+                " db_index=False)",
+            ],
+            'DropColumnIndex')
+
+    def test_set_index_together(self):
+        """Testing ChangeMeta(index_together) creates the index concurrently
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+
+            class Meta:
+                index_together = [('int_field', 'char_field')]
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeMeta('TestModel', 'index_together',
+                           [('int_field', 'char_field')]),
+            ],
+            None,
+            None,
+            'SetIndexTogether')
+
+    def test_sql_is_non_transactional(self):
+        """Testing concurrent index statements are split from transactional
+        SQL
+        """
+        evolver = get_evolution_operations('default')
+        sql = evolver._make_concurrent_index_sql([
+            'ALTER TABLE "tests_testmodel" ADD COLUMN "foo" integer NULL;',
+            'CREATE INDEX "foo_idx" ON "tests_testmodel" ("foo");',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(sql)
+
+        self.assertEqual(transactional_sql, [sql[0]])
+        self.assertEqual(len(non_transactional_sql), 1)
+        self.assertIsInstance(non_transactional_sql[0], ConcurrentIndexSQL)
+        self.assertEqual(
+            non_transactional_sql[0].to_sql(),
+            'CREATE INDEX CONCURRENTLY "foo_idx" ON "tests_testmodel"'
+            ' ("foo");')
+
+    def test_sql_with_dependent_statements(self):
+        """Testing concurrent index statements are kept in the transaction
+        when later SQL depends on them
+        """
+        evolver = get_evolution_operations('default')
+
+        # The index is dropped and re-created concurrently with the same
+        # name. Both run after the transaction, in order.
+        sql = evolver._make_concurrent_index_sql([
+            'DROP INDEX "foo_idx";',
+            'CREATE INDEX "foo_idx" ON "tests_testmodel" ("foo", "bar");',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(sql)
+
+        self.assertEqual(transactional_sql, [])
+        self.assertEqual(non_transactional_sql, sql)
+
+        # The index is dropped and a constraint re-creates the name in the
+        # transaction.
+        sql = evolver._make_concurrent_index_sql([
+            'DROP INDEX "foo_idx";',
+            'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_idx"'
+            ' UNIQUE ("foo");',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(sql)
+
+        self.assertEqual(
+            transactional_sql,
+            [
+                'DROP INDEX "foo_idx";',
+                'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_idx"'
+                ' UNIQUE ("foo");',
+            ])
+        self.assertEqual(non_transactional_sql, [])
+
+        # The column the index is on is later deleted.
+        sql = evolver._make_concurrent_index_sql([
+            'CREATE INDEX "foo_idx" ON "tests_testmodel" ("foo");',
+            'ALTER TABLE "tests_testmodel" DROP COLUMN "foo" CASCADE;',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(sql)
+
+        self.assertEqual(
+            transactional_sql,
+            [
+                'CREATE INDEX "foo_idx" ON "tests_testmodel" ("foo");',
+                'ALTER TABLE "tests_testmodel" DROP COLUMN "foo" CASCADE;',
+            ])
+        self.assertEqual(non_transactional_sql, [])
+
+        # A later foreign key needs the unique index.
+        sql = evolver._make_concurrent_index_sql([
+            'CREATE UNIQUE INDEX "value_uniq" ON "tests_postgresanchor"'
+            ' ("value");',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(
+                sql,
+                later_sql=[
+                    'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_fk"'
+                    ' FOREIGN KEY ("foo") REFERENCES'
+                    ' "tests_postgresanchor" ("value");',
+                ])
+
+        self.assertEqual(
+            transactional_sql,
+            [
+                'CREATE UNIQUE INDEX "value_uniq" ON "tests_postgresanchor"'
+                ' ("value");',
+            ])
+        self.assertEqual(non_transactional_sql, [])
+
+
+class PostgresFastColumnDefaultsTests(EvolutionTestCase):
+    """Testing adding columns with constant defaults on Postgres 11+."""
+    sql_mapping_key = 'postgres_fast_column_defaults'
+    default_base_model = PostgresBaseModel
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            raise SkipTest('This test requires Postgres')
+
+        if connection.pg_version < 110000:
+            raise SkipTest('This test requires Postgres 11 or higher')
+
+        super(PostgresFastColumnDefaultsTests, self).setUp()
+
+    def test_add_non_null_column_with_constant_callable(self):
+        """Testing AddField with non-NULL column and callable initial
+        returning a constant uses DEFAULT
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.IntegerField()
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         initial=lambda: '42'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            None,
+            'AddNonNullColumnWithConstantCallable')
+
+    def test_can_add_column_with_default_sql(self):
+        """Testing EvolutionOperations.can_add_column_with_default_sql"""
+        evolver = get_evolution_operations('default')
+        field = models.IntegerField()
+
+        self.assertTrue(evolver.can_add_column_with_default_sql(
+            PostgresBaseModel, field, '42'))
+        self.assertTrue(evolver.can_add_column_with_default_sql(
+            PostgresBaseModel, field, "'it''s'"))
+        self.assertFalse(evolver.can_add_column_with_default_sql(
+            PostgresBaseModel, field, '"int_field"'))
+        self.assertFalse(evolver.can_add_column_with_default_sql(
+            PostgresBaseModel, field, "'a' || \"char_field\""))
+
+
+@override_settings(DJANGO_EVOLUTION_POSTGRES_NOT_VALID_CONSTRAINTS=True)
+class PostgresNotValidConstraintsTests(EvolutionTestCase):
+    """Testing NOT VALID constraints on Postgres."""
+    sql_mapping_key = 'postgres_not_valid_constraints'
+    default_base_model = PostgresBaseModel
+    default_extra_models = [
+        ('PostgresAnchor', PostgresAnchor),
+    ]
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            raise SkipTest('This test requires Postgres')
+
+        super(PostgresNotValidConstraintsTests, self).setUp()
+
+    def test_add_foreign_key(self):
+        """Testing AddField with ForeignKey adds the constraint as
+        NOT VALID
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.ForeignKey(PostgresAnchor,
+                                            null=True,
+                                            on_delete=models.CASCADE)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.ForeignKey,
+                         null=True, related_model='tests.PostgresAnchor'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            [
+                "AddField('TestModel', 'added_field', models.ForeignKey,"
+                " null=True, related_model='tests.PostgresAnchor')",
+            ],
+            'AddForeignKey')
+
+    def test_sql_is_non_transactional(self):
+        """Testing constraint validation statements are split from
+        transactional SQL
+        """
+        evolver = get_evolution_operations('default')
+        sql = evolver._make_not_valid_constraint_sql([
+            'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_fk"'
+            ' FOREIGN KEY ("foo_id") REFERENCES "tests_postgresanchor"'
+            ' ("id") DEFERRABLE INITIALLY DEFERRED;',
+
+            'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_check"'
+            ' CHECK ("foo" >= 0);',
+
+            'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_uniq"'
+            ' UNIQUE ("foo");',
+        ])
+
+        transactional_sql, non_transactional_sql = \
+            split_non_transactional_sql(sql)
+
+        self.assertEqual(
+            transactional_sql,
+            [
+                'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_fk"'
+                ' FOREIGN KEY ("foo_id") REFERENCES "tests_postgresanchor"'
+                ' ("id") DEFERRABLE INITIALLY DEFERRED NOT VALID;',
+
+                'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_check"'
+                ' CHECK ("foo" >= 0) NOT VALID;',
+
+                'ALTER TABLE "tests_testmodel" ADD CONSTRAINT "foo_uniq"'
+                ' UNIQUE ("foo");',
+            ])
+        self.assertEqual(len(non_transactional_sql), 2)
+        self.assertIsInstance(non_transactional_sql[0],
+                              ValidateConstraintSQL)
+        self.assertEqual(
+            [statement.to_sql() for statement in non_transactional_sql],
+            [
+                'ALTER TABLE "tests_testmodel"'
+                ' VALIDATE CONSTRAINT "foo_fk";',
+
+                'ALTER TABLE "tests_testmodel"'
+                ' VALIDATE CONSTRAINT "foo_check";',
+            ])
+
+
+class PostgresSchemaDriftTests(TransactionTestCase):
+    """Testing schema drift detection on Postgres."""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            raise SkipTest('This test requires Postgres')
+
+        app_sig = AppSignature(app_id='django_evolution')
+        app_sig.add_model(Evolution)
+        app_sig.add_model(Version)
+
+        self.project_sig = ProjectSignature()
+        self.project_sig.add_app_sig(app_sig)
+
+    def test_with_not_valid_foreign_key(self):
+        """Testing SchemaDrift with a NOT VALID foreign key"""
+        database_state = DatabaseState(db_name='default')
+        table_name = Evolution._meta.db_table
+        foreign_key_state = database_state.find_foreign_key(table_name,
+                                                            'version_id')
+        self.assertTrue(foreign_key_state.validated)
+
+        database_state.add_foreign_key(
+            table_name=table_name,
+            name=foreign_key_state.name,
+            column=foreign_key_state.column,
+            to_table=foreign_key_state.to_table,
+            to_column=foreign_key_state.to_column,
+            validated=False)
+
+        drift = SchemaDrift(project_sig=self.project_sig,
+                            database_state=database_state,
+                            database_name='default')
+
+        self.assertEqual(
+            drift.problems,
+            {
+                'django_evolution': {
+                    'Evolution': [
+                        'Foreign key on "version_id" has not been validated',
+                    ],
+                },
+            })
+
+
+    def test_normalize_column_type(self):
+        """Testing EvolutionOperations.normalize_column_type"""
+        evolver = get_evolution_operations('default')
+
+        for db_type, data_type in (('serial', 'integer'),
+                                   ('bigserial', 'bigint'),
+                                   ('varchar(100)', 'character varying'),
+                                   ('char(32)', 'character'),
+                                   ('numeric(10, 2)', 'numeric'),
+                                   ('time', 'time without time zone'),
+                                   ('timestamp with time zone',
+                                    'timestamp with time zone'),
+                                   ('integer CHECK ("value" >= 0)',
+                                    'integer')):
+            self.assertEqual(evolver.normalize_column_type(db_type),
+                             evolver.normalize_column_type(data_type))
+
+
+class ConcurrentIndexSQLTests(TransactionTestCase):
+    """Unit tests for django_evolution.db.postgresql.ConcurrentIndexSQL."""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            raise SkipTest('This test requires Postgres')
+
+        self.evolver = get_evolution_operations('default')
+
+        cursor = connection.cursor()
+        cursor.execute('CREATE TABLE "tests_concurrent" ("value" integer);')
+        cursor.close()
+
+    def tearDown(self):
+        cursor = connection.cursor()
+        cursor.execute('DROP TABLE IF EXISTS "tests_concurrent";')
+        cursor.close()
+
+    def _get_index_valid(self, index_name):
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute(
+                'SELECT ix.indisvalid'
+                '  FROM pg_catalog.pg_index ix'
+                '  JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid'
+                ' WHERE i.relname = %s;',
+                [index_name])
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    def test_execute_create(self):
+        """Testing ConcurrentIndexSQL.execute creating an index"""
+        statement = self.evolver._make_concurrent_index_statement(
+            'CREATE INDEX "concurrent_idx" ON "tests_concurrent" ("value");')
+
+        cursor = connection.cursor()
+
+        try:
+            statement.execute(cursor)
+        finally:
+            cursor.close()
+
+        self.assertTrue(self._get_index_valid('concurrent_idx'))
+
+    def test_execute_create_failure_drops_invalid_index(self):
+        """Testing ConcurrentIndexSQL.execute drops the invalid index after
+        a failed build
+        """
+        cursor = connection.cursor()
+        cursor.execute('INSERT INTO "tests_concurrent" VALUES (1), (1);')
+
+        statement = self.evolver._make_concurrent_index_statement(
+            'CREATE UNIQUE INDEX "concurrent_idx"'
+            ' ON "tests_concurrent" ("value");')
+
+        try:
+            with self.assertRaises(Exception):
+                statement.execute(cursor)
+        finally:
+            cursor.close()
+
+        self.assertIsNone(self._get_index_valid('concurrent_idx'))
+
+    def test_execute_drop(self):
+        """Testing ConcurrentIndexSQL.execute dropping an index"""
+        cursor = connection.cursor()
+        cursor.execute('CREATE INDEX "concurrent_idx"'
+                       ' ON "tests_concurrent" ("value");')
+
+        statement = self.evolver._make_concurrent_index_statement(
+            'DROP INDEX "concurrent_idx";')
+
+        try:
+            statement.execute(cursor)
+        finally:
+            cursor.close()
+
+        self.assertIsNone(self._get_index_valid('concurrent_idx'))
@@ -1,11 +1,16 @@
 from __future__ import unicode_literals
 
-from django.db import models
+import os
+import shutil
+import tempfile
+
+from django.db import connection, models
 
 from django_evolution.errors import CannotSimulate
 from django_evolution.mutations import SQLMutation
 from django_evolution.signature import FieldSignature, ProjectSignature
 from django_evolution.tests.base_test_case import EvolutionTestCase
+from django_evolution.utils import EvolutionFileSQL, execute_sql, write_sql
 
 
 class SQLBaseModel(models.Model):
@@ -98,3 +103,68 @@ class OrderingTests(EvolutionTestCase):
              "    Field 'added_field2' has been added\n"
              "    Field 'added_field3' has been added"),
             sql_name='SQLMutationOutput')
+
+    def test_add_fields_from_file(self):
+        """Testing SQLMutation and adding fields with SQL from a file"""
+        def update_fields(simulation):
+            model_sig = simulation.get_model_sig('TestModel')
+
+            for field_name in ('added_field1', 'added_field2',
+                               'added_field3'):
+                model_sig.add_field_sig(FieldSignature(
+                    field_name=field_name,
+                    field_type=models.IntegerField,
+                    field_attrs={
+                        'null': True,
+                    }))
+
+        sql_file = self._write_sql_file(
+            self.get_sql_mapping('SQLMutationOutput'))
+
+        self.perform_evolution_tests(
+            AddFieldsModel,
+            [
+                SQLMutation('all-fields', [EvolutionFileSQL(sql_file)],
+                            update_fields),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field1' has been added\n"
+             "    Field 'added_field2' has been added\n"
+             "    Field 'added_field3' has been added"))
+
+    def test_evolution_file_sql_write_sql(self):
+        """Testing write_sql with EvolutionFileSQL"""
+        sql_file = self._write_sql_file('-- Comment\n'
+                                        'SELECT 1;\n'
+                                        'SELECT 2;\n')
+        statement = EvolutionFileSQL(sql_file)
+
+        self.assertEqual(write_sql([statement], 'default'),
+                         ['-- Comment', 'SELECT 1;', 'SELECT 2;'])
+        self.assertEqual(statement.to_sql(),
+                         '-- Comment\nSELECT 1;\nSELECT 2;')
+
+    def test_evolution_file_sql_error(self):
+        """Testing execute_sql with EvolutionFileSQL and a failing statement
+        """
+        sql_file = self._write_sql_file('SELECT 1;\n'
+                                        'SELECT * FROM missing_table;\n'
+                                        'SELECT 2;\n')
+
+        with self.assertRaises(Exception) as ctx:
+            execute_sql(connection.cursor(), [EvolutionFileSQL(sql_file)],
+                        'default')
+
+        self.assertEqual(ctx.exception.last_sql_statement,
+                         'SELECT * FROM missing_table;')
+
+    def _write_sql_file(self, content):
+        tempdir = tempfile.mkdtemp(prefix='django-evolution-tests.')
+        self.addCleanup(shutil.rmtree, tempdir)
+
+        sql_file = os.path.join(tempdir, 'evolution.sql')
+
+        with open(sql_file, 'w') as fp:
+            fp.write(content)
+
+        return sql_file
@@ -0,0 +1,740 @@
+from __future__ import unicode_literals
+
+from unittest import SkipTest
+
+from django.conf import settings
+from django.db import OperationalError, connection, models, transaction
+from django.test.testcases import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from django_evolution.db import get_evolution_operations
+from django_evolution.db.estimate import StatementCost
+from django_evolution.db.sqlite3 import ChunkedCopySQL
+from django_evolution.mutations import (AddField, ChangeField, ChangeMeta,
+                                       DeleteField, RenameField)
+from django_evolution.mutators import AppMutator
+from django_evolution.signals import copying_rows
+from django_evolution.tests.base_test_case import EvolutionTestCase
+from django_evolution.utils import execute_sql, write_sql
+
+
+class SQLiteBaseModel(models.Model):
+    char_field = models.CharField(max_length=20)
+    int_field = models.IntegerField()
+    indexed_field = models.IntegerField(db_index=True)
+
+
+class SQLiteNullBaseModel(models.Model):
+    char_field = models.CharField(max_length=20)
+    int_field = models.IntegerField(null=True)
+    indexed_field = models.IntegerField(db_index=True)
+
+
+@override_settings(DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE=True)
+class SQLiteNativeAlterTableTests(EvolutionTestCase):
+    """Testing native ALTER TABLE statements on SQLite."""
+    sql_mapping_key = 'sqlite_native_alter_table'
+    default_base_model = SQLiteBaseModel
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteNativeAlterTableTests, self).setUp()
+
+    def test_use_native_alter_table_default(self):
+        """Testing EvolutionOperations.use_native_alter_table defaults to
+        True
+        """
+        evolver = get_evolution_operations('default')
+
+        with self.settings():
+            del settings.DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE
+
+            self.assertTrue(evolver.use_native_alter_table)
+
+        with self.settings(DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE=False):
+            self.assertFalse(evolver.use_native_alter_table)
+
+    def test_add_null_column(self):
+        """Testing AddField with NULL column uses ALTER TABLE ... ADD COLUMN
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.IntegerField(null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         null=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            [
+                "AddField('TestModel', 'added_field', models.IntegerField,"
+                " null=True)",
+            ],
+            'AddNullColumn')
+
+    def test_add_null_column_with_initial(self):
+        """Testing AddField with NULL column and initial value uses
+        ALTER TABLE ... ADD COLUMN
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.IntegerField(null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         initial=42, null=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            None,
+            'AddNullColumnWithInitial')
+
+    @override_settings(DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE=2)
+    def test_add_null_column_with_initial_batched(self):
+        """Testing AddField with NULL column and initial value with
+        DJANGO_EVOLUTION_BACKFILL_BATCH_SIZE
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+            added_field = models.IntegerField(null=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                AddField('TestModel', 'added_field', models.IntegerField,
+                         initial=42, null=True),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'added_field' has been added"),
+            None,
+            'AddNullColumnWithInitial')
+
+    def test_rename_column(self):
+        """Testing RenameField uses ALTER TABLE ... RENAME COLUMN"""
+        if connection.Database.sqlite_version_info < (3, 25, 0):
+            raise SkipTest('This test requires SQLite 3.25 or higher')
+
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            renamed_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                RenameField('TestModel', 'int_field', 'renamed_field'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'renamed_field' has been added\n"
+             "    Field 'int_field' has been deleted"),
+            None,
+            'RenameColumn')
+
+    def test_delete_column(self):
+        """Testing DeleteField uses ALTER TABLE ... DROP COLUMN"""
+        if connection.Database.sqlite_version_info < (3, 35, 0):
+            raise SkipTest('This test requires SQLite 3.35 or higher')
+
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            indexed_field = models.IntegerField(db_index=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                DeleteField('TestModel', 'int_field'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'int_field' has been deleted"),
+            [
+                "DeleteField('TestModel', 'int_field')",
+            ],
+            'DeleteColumn')
+
+    def test_delete_indexed_column(self):
+        """Testing DeleteField with indexed column rebuilds the table"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                DeleteField('TestModel', 'indexed_field'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'indexed_field' has been deleted"),
+            [
+                "DeleteField('TestModel', 'indexed_field')",
+            ],
+            'DeleteIndexedColumn')
+
+
+@override_settings(DJANGO_EVOLUTION_SQLITE_SINGLE_COPY_REBUILD=True,
+                   DJANGO_EVOLUTION_SQLITE_NATIVE_ALTER_TABLE=False)
+class SQLiteSingleCopyRebuildTests(EvolutionTestCase):
+    """Testing single-copy table rebuilds on SQLite.
+
+    Native ALTER TABLE statements are turned off, so that operations SQLite
+    could perform natively are also covered by the rebuilds.
+    """
+    sql_mapping_key = 'sqlite_single_copy_rebuild'
+    default_base_model = SQLiteNullBaseModel
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteSingleCopyRebuildTests, self).setUp()
+
+    def test_change_null_with_initial(self):
+        """Testing ChangeField with setting null=False and initial value
+        rebuilds the table with one copy
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeField('TestModel', 'int_field', initial=42,
+                            null=False),
+            ],
+            ("In model tests.TestModel:\n"
+             "    In field 'int_field':\n"
+             "        Property 'null' has changed"),
+            None,
+            'ChangeNullWithInitial')
+
+    def test_rename_column(self):
+        """Testing RenameField rebuilds the table with one copy"""
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20)
+            renamed_field = models.IntegerField(null=True)
+            indexed_field = models.IntegerField(db_index=True)
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                RenameField('TestModel', 'int_field', 'renamed_field'),
+            ],
+            ("In model tests.TestModel:\n"
+             "    Field 'renamed_field' has been added\n"
+             "    Field 'int_field' has been deleted"),
+            None,
+            'RenameColumn')
+
+    def test_change_null_with_interleaved_meta(self):
+        """Testing ChangeFields separated by ChangeMeta rebuilds the table
+        with one copy
+        """
+        class DestModel(models.Model):
+            char_field = models.CharField(max_length=20, null=True)
+            int_field = models.IntegerField()
+            indexed_field = models.IntegerField(db_index=True)
+
+            class Meta:
+                index_together = [('indexed_field', 'int_field')]
+
+        self.perform_evolution_tests(
+            DestModel,
+            [
+                ChangeField('TestModel', 'int_field', initial=42,
+                            null=False),
+                ChangeMeta('TestModel', 'index_together',
+                           [('indexed_field', 'int_field')]),
+                ChangeField('TestModel', 'char_field', initial=None,
+                            null=True),
+            ],
+            None,
+            None,
+            'ChangeNullWithInterleavedMeta')
+
+    def test_change_null_with_interleaved_meta_table_rewrites_saved(self):
+        """Testing ChangeFields separated by ChangeMeta records the table
+        rewrites saved
+        """
+        self.assertEqual(self._get_table_rewrites_saved(), 1)
+
+    @override_settings(DJANGO_EVOLUTION_CONSOLIDATE_TABLE_OPS=False)
+    def test_change_null_with_interleaved_meta_without_consolidation(self):
+        """Testing ChangeFields separated by ChangeMeta with
+        DJANGO_EVOLUTION_CONSOLIDATE_TABLE_OPS=False
+        """
+        self.assertEqual(self._get_table_rewrites_saved(), 0)
+
+    def _get_table_rewrites_saved(self):
+        """Return the table rewrites saved for interleaved mutations.
+
+        Returns:
+            int:
+            The number of table rewrites saved.
+        """
+        self.set_base_model(self.default_base_model)
+
+        app_mutator = AppMutator(app_label='tests',
+                                 project_sig=self.start_sig.clone(),
+                                 database_state=self.database_state.clone())
+        app_mutator.run_mutations([
+            ChangeField('TestModel', 'int_field', initial=42, null=False),
+            ChangeMeta('TestModel', 'index_together',
+                       [('indexed_field', 'int_field')]),
+            ChangeField('TestModel', 'char_field', initial=None, null=True),
+        ])
+        app_mutator.to_sql()
+
+        return app_mutator.table_rewrites_saved
+
+
+class SQLiteChunkedCopyTests(TestCase):
+    """Testing chunked row copies on SQLite."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteChunkedCopyTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute('CREATE TABLE "copy_src"'
+                           ' ("id" integer NOT NULL PRIMARY KEY,'
+                           ' "value" varchar(20) NULL);')
+            cursor.execute('CREATE TABLE "copy_dest"'
+                           ' ("id" integer NOT NULL PRIMARY KEY,'
+                           ' "value" varchar(20) NOT NULL);')
+
+            for i in (1, 2, 3, 4, 6, 7, 9):
+                cursor.execute('INSERT INTO "copy_src" VALUES (%s, %s);',
+                               (i, 'value%s' % i if i % 3 else None))
+        finally:
+            cursor.close()
+
+    def test_execute(self):
+        """Testing ChunkedCopySQL.execute"""
+        progress = []
+
+        def _on_copying_rows(sender, table_name, rows_copied, total_rows,
+                             **kwargs):
+            progress.append((table_name, rows_copied, total_rows))
+
+        statement = ChunkedCopySQL(evolver=self.evolver,
+                                   dest_table_name='copy_dest',
+                                   source_table_name='copy_src',
+                                   columns='"id", "value"',
+                                   values='"id", COALESCE("value", %s)',
+                                   params=('default',),
+                                   chunk_size=3)
+
+        copying_rows.connect(_on_copying_rows)
+
+        try:
+            cursor = connection.cursor()
+
+            try:
+                execute_sql(cursor, [statement], 'default')
+
+                cursor.execute('SELECT "id", "value" FROM "copy_dest"'
+                               ' ORDER BY "id";')
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            copying_rows.disconnect(_on_copying_rows)
+
+        self.assertEqual(
+            rows,
+            [
+                (1, 'value1'),
+                (2, 'value2'),
+                (3, 'default'),
+                (4, 'value4'),
+                (6, 'default'),
+                (7, 'value7'),
+                (9, 'default'),
+            ])
+        self.assertEqual(
+            progress,
+            [
+                ('copy_dest', 3, 7),
+                ('copy_dest', 6, 7),
+                ('copy_dest', 7, 7),
+            ])
+
+    def test_execute_with_sparse_rowids(self):
+        """Testing ChunkedCopySQL.execute with sparse rowids"""
+        progress = []
+
+        def _on_copying_rows(sender, table_name, rows_copied, total_rows,
+                             **kwargs):
+            progress.append((table_name, rows_copied, total_rows))
+
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute('INSERT INTO "copy_src" VALUES (%s, %s);',
+                           (2 ** 40, 'value'))
+        finally:
+            cursor.close()
+
+        statement = ChunkedCopySQL(evolver=self.evolver,
+                                   dest_table_name='copy_dest',
+                                   source_table_name='copy_src',
+                                   columns='"id", "value"',
+                                   values='"id", COALESCE("value", \'\')',
+                                   params=(),
+                                   chunk_size=4)
+
+        copying_rows.connect(_on_copying_rows)
+
+        try:
+            cursor = connection.cursor()
+
+            try:
+                execute_sql(cursor, [statement], 'default')
+
+                cursor.execute('SELECT COUNT(*) FROM "copy_dest";')
+                row_count = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+        finally:
+            copying_rows.disconnect(_on_copying_rows)
+
+        self.assertEqual(row_count, 8)
+        self.assertEqual(
+            progress,
+            [
+                ('copy_dest', 4, 8),
+                ('copy_dest', 8, 8),
+            ])
+
+    def test_to_sql(self):
+        """Testing ChunkedCopySQL.to_sql"""
+        statement = ChunkedCopySQL(evolver=self.evolver,
+                                   dest_table_name='copy_dest',
+                                   source_table_name='copy_src',
+                                   columns='"id", "value"',
+                                   values='"id", "value"',
+                                   params=(),
+                                   chunk_size=100)
+
+        self.assertEqual(
+            statement.to_sql(),
+            'INSERT INTO "copy_dest" ("id", "value")'
+            ' SELECT "id", "value" FROM "copy_src";')
+        self.assertEqual(
+            write_sql([statement], 'default'),
+            [
+                'INSERT INTO "copy_dest" ("id", "value")'
+                ' SELECT "id", "value" FROM "copy_src";',
+            ])
+
+    @override_settings(DJANGO_EVOLUTION_SQLITE_COPY_CHUNK_SIZE=2)
+    def test_get_copy_rows_sql_with_chunk_size(self):
+        """Testing EvolutionOperations.get_copy_rows_sql with
+        DJANGO_EVOLUTION_SQLITE_COPY_CHUNK_SIZE
+        """
+        sql = self.evolver.get_copy_rows_sql(dest_table_name='copy_dest',
+                                             source_table_name='copy_src',
+                                             columns='"id", "value"',
+                                             values='"id", "value"')
+
+        self.assertEqual(len(sql), 1)
+        self.assertIsInstance(sql[0], ChunkedCopySQL)
+        self.assertEqual(sql[0].chunk_size, 2)
+
+
+class SQLiteBulkEvolutionTests(TransactionTestCase):
+    """Testing bulk evolution pragmas on SQLite."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteBulkEvolutionTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+    @override_settings(DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS={
+        'cache_size': -12345,
+        'temp_store': 'MEMORY',
+        'synchronous': 'OFF',
+    })
+    def test_bulk_evolution(self):
+        """Testing EvolutionOperations.bulk_evolution with
+        DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS
+        """
+        old_values = self._get_pragmas()
+
+        with self.evolver.bulk_evolution():
+            self.assertEqual(
+                self._get_pragmas(),
+                {
+                    'cache_size': -12345,
+                    'temp_store': 2,
+                    'synchronous': 0,
+                })
+
+        self.assertEqual(self._get_pragmas(), old_values)
+
+    @override_settings(DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS={
+        'cache_size': -12345,
+        'temp_store': 'MEMORY',
+        'synchronous': 'OFF',
+    })
+    def test_bulk_evolution_in_transaction(self):
+        """Testing EvolutionOperations.bulk_evolution with
+        DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS in a transaction
+        """
+        with transaction.atomic():
+            old_values = self._get_pragmas()
+
+            with self.evolver.bulk_evolution():
+                new_values = self._get_pragmas()
+
+            self.assertEqual(self._get_pragmas(), old_values)
+
+        self.assertEqual(new_values['cache_size'], -12345)
+        self.assertEqual(new_values['temp_store'], old_values['temp_store'])
+        self.assertEqual(new_values['synchronous'],
+                         old_values['synchronous'])
+
+    def test_bulk_evolution_without_setting(self):
+        """Testing EvolutionOperations.bulk_evolution without
+        DJANGO_EVOLUTION_SQLITE_BULK_PRAGMAS
+        """
+        old_values = self._get_pragmas()
+
+        with self.evolver.bulk_evolution():
+            self.assertEqual(self._get_pragmas(), old_values)
+
+    def _get_pragmas(self):
+        cursor = connection.cursor()
+        values = {}
+
+        try:
+            for name in ('cache_size', 'temp_store', 'synchronous'):
+                cursor.execute('PRAGMA %s;' % name)
+                values[name] = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+        return values
+
+
+class SQLiteLockTimeoutTests(TransactionTestCase):
+    """Testing lock timeouts and retries on SQLite."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteLockTimeoutTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+    @override_settings(DJANGO_EVOLUTION_SQLITE_BUSY_TIMEOUT=1234)
+    def test_lock_timeout(self):
+        """Testing EvolutionOperations.lock_timeout with
+        DJANGO_EVOLUTION_SQLITE_BUSY_TIMEOUT
+        """
+        old_timeout = self._get_busy_timeout()
+
+        with self.evolver.lock_timeout():
+            self.assertEqual(self._get_busy_timeout(), 1234)
+
+        self.assertEqual(self._get_busy_timeout(), old_timeout)
+
+    @override_settings(DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES=2,
+                       DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY=0)
+    def test_execute_sql_retries(self):
+        """Testing execute_sql retries statements after lock timeouts"""
+        statement = _LockedStatementSQL(num_failures=2)
+
+        with transaction.atomic():
+            num_retries = execute_sql(connection.cursor(), [statement],
+                                      'default', evolver=self.evolver)
+
+        self.assertEqual(num_retries, 2)
+        self.assertEqual(statement.num_attempts, 3)
+
+    @override_settings(DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES=2,
+                       DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY=0)
+    def test_execute_sql_retries_plain_statements(self):
+        """Testing execute_sql retries plain statements after lock timeouts
+        outside of a transaction
+        """
+        cursor = _LockedCursor(connection.cursor(), num_failures=2)
+
+        num_retries = execute_sql(cursor, ['SELECT 1;'], 'default',
+                                  evolver=self.evolver)
+
+        self.assertEqual(num_retries, 2)
+        self.assertEqual(cursor.num_attempts, 3)
+
+    @override_settings(DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES=2,
+                       DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY=0)
+    def test_execute_sql_no_retry_statement_objects(self):
+        """Testing execute_sql doesn't retry statement objects outside of a
+        transaction
+        """
+        statement = _LockedStatementSQL(num_failures=1)
+
+        with self.assertRaises(OperationalError):
+            execute_sql(connection.cursor(), [statement], 'default',
+                        evolver=self.evolver)
+
+        self.assertEqual(statement.num_attempts, 1)
+
+    @override_settings(DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES=2,
+                       DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY=0)
+    def test_execute_sql_retries_exhausted(self):
+        """Testing execute_sql raises after exhausting lock timeout retries
+        """
+        statement = _LockedStatementSQL(num_failures=3)
+
+        with self.assertRaises(OperationalError) as ctx:
+            with transaction.atomic():
+                execute_sql(connection.cursor(), [statement], 'default',
+                            evolver=self.evolver)
+
+        self.assertEqual(statement.num_attempts, 3)
+        self.assertEqual(ctx.exception.last_sql_statement,
+                         statement.to_sql())
+
+    @override_settings(DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES=2,
+                       DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY=0)
+    def test_execute_sql_no_retry_other_errors(self):
+        """Testing execute_sql doesn't retry statements failing for reasons
+        other than lock timeouts
+        """
+        statement = _LockedStatementSQL(num_failures=1,
+                                        error='no such table: foo')
+
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                execute_sql(connection.cursor(), [statement], 'default',
+                            evolver=self.evolver)
+
+        self.assertEqual(statement.num_attempts, 1)
+
+    def test_execute_sql_without_retries(self):
+        """Testing execute_sql without DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES
+        """
+        statement = _LockedStatementSQL(num_failures=1)
+
+        with self.assertRaises(OperationalError):
+            execute_sql(connection.cursor(), [statement], 'default',
+                        evolver=self.evolver)
+
+        self.assertEqual(statement.num_attempts, 1)
+
+    def _get_busy_timeout(self):
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute('PRAGMA busy_timeout;')
+
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+
+class SQLiteCostEstimateTests(TransactionTestCase):
+    """Testing cost estimates on SQLite."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            raise SkipTest('This test requires SQLite')
+
+        super(SQLiteCostEstimateTests, self).setUp()
+
+        self.evolver = get_evolution_operations('default')
+
+    def test_get_table_row_count_with_stats(self):
+        """Testing EvolutionOperations.get_table_row_count with sqlite_stat1
+        """
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute('CREATE TABLE estimate_stats (id integer);')
+            cursor.execute('CREATE INDEX estimate_stats_id'
+                           '  ON estimate_stats (id);')
+            cursor.execute('INSERT INTO estimate_stats VALUES (1), (2), (3);')
+            cursor.execute('ANALYZE;')
+
+            # Make the statistics stale, to show they're being used.
+            cursor.execute('INSERT INTO estimate_stats VALUES (4);')
+
+            self.assertEqual(
+                self.evolver.get_table_row_count('estimate_stats'),
+                3)
+        finally:
+            cursor.execute('DROP TABLE estimate_stats;')
+            cursor.close()
+
+    def test_get_alter_table_cost_kind(self):
+        """Testing EvolutionOperations.get_statement_cost with ALTER TABLE"""
+        cost = self.evolver.get_statement_cost(
+            'ALTER TABLE "foo" ADD COLUMN "bar" integer NULL;')
+        self.assertEqual(cost.kind, StatementCost.METADATA)
+
+        cost = self.evolver.get_statement_cost(
+            'ALTER TABLE "foo" DROP COLUMN "bar";')
+        self.assertEqual(cost.kind, StatementCost.TABLE_REWRITE)
+        self.assertEqual(cost.table_names, ['foo'])
+
+
+class _LockedCursor(object):
+    """A cursor that fails to execute a number of times before succeeding."""
+
+    def __init__(self, cursor, num_failures):
+        self.cursor = cursor
+        self.num_failures = num_failures
+        self.num_attempts = 0
+
+    def execute(self, sql, params=None):
+        self.num_attempts += 1
+
+        if self.num_attempts <= self.num_failures:
+            raise OperationalError('database is locked')
+
+        return self.cursor.execute(sql, params)
+
+
+class _LockedStatementSQL(object):
+    """A statement that fails a number of times before succeeding."""
+
+    def __init__(self, num_failures, error='database is locked'):
+        self.num_failures = num_failures
+        self.error = error
+        self.num_attempts = 0
+
+    def to_sql(self):
+        return ['SELECT 1;']
+
+    def execute(self, cursor):
+        self.num_attempts += 1
+
+        if self.num_attempts <= self.num_failures:
+            raise OperationalError(self.error)
+
+        cursor.execute('SELECT 1;')
@@ -1,63 +1,507 @@
 from __future__ import print_function, unicode_literals
 
 import os
+import re
+import time
 
-from django.db import router
+from django.conf import settings
+from django.db import connections, router, transaction
 from django.utils import six
 
 from django_evolution.compat.models import get_model
-from django_evolution.db import EvolutionOperationsMulti
+from django_evolution.db import get_evolution_operations
 
 
-def write_sql(sql, database):
-    "Output a list of SQL statements, unrolling parameters as required"
-    evolver = EvolutionOperationsMulti(database).get_evolver()
-    qp = evolver.quote_sql_param
+_sql_identifier_re = re.compile(r'[\w$]+', re.U)
+
+
+class EvolutionFileSQL(object):
+    """A statement running the SQL from an evolution file.
+
+    Each line of the file is executed as a separate statement. Lines are
+    read from the file as they're executed (or written out), so large
+    files don't need to be held in memory.
+    """
+
+    def __init__(self, filename):
+        """Initialize the statement.
+
+        Args:
+            filename (unicode):
+                The path to the SQL file.
+        """
+        self.filename = filename
+
+    def iter_sql(self):
+        """Generate the SQL statements in the file.
+
+        Yields:
+            unicode:
+            Each line of the file, without the trailing newline.
+        """
+        with open(self.filename, 'r') as fp:
+            for line in fp:
+                yield line.rstrip('\r\n')
+
+    def to_sql(self):
+        """Return the contents of the file.
+
+        Returns:
+            unicode:
+            The SQL in the file.
+        """
+        return '\n'.join(self.iter_sql()).strip()
+
+    def execute(self, cursor):
+        """Execute each statement in the file.
+
+        If a statement fails, the exception will have a
+        ``last_sql_statement`` attribute containing the statement.
+
+        Args:
+            cursor (django.db.backends.util.CursorWrapper):
+                The database cursor used to execute the statements.
+        """
+        for statement in self.iter_sql():
+            statement = statement.strip()
+
+            if statement and not statement.startswith('--'):
+                try:
+                    cursor.execute(statement)
+                except Exception as e:
+                    e.last_sql_statement = statement
+                    raise
+
+
+def write_sql(sql, database, evolver=None):
+    """Output a list of SQL statements, unrolling parameters as required.
+
+    Statements that perform their own execution (those with ``execute()``
+    and ``to_sql()`` methods) are written as the plain SQL they're
+    equivalent to. If they can generate several statements (using an
+    ``iter_sql()`` method), each will be written in turn.
+
+    Args:
+        sql (list):
+            The list of SQL statements. Each entry can be a string, a
+            tuple of ``(statement, params)``, or a statement object.
+
+        database (unicode):
+            The name of the database the SQL is for.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations,
+                 optional):
+            The evolution operations for the database. Callers writing
+            several lists of SQL can pass this to avoid looking up the
+            backend each time.
+
+    Returns:
+        list of unicode:
+        The list of SQL statements that were written.
+    """
+    out_sql = get_sql_text(sql, database, evolver)
+
+    for statement in out_sql:
+        print(statement)
+
+    return out_sql
+
+
+def get_sql_text(sql, database, evolver=None):
+    """Return a list of SQL statements as text, unrolling parameters.
+
+    This converts statements in the same way as :py:func:`write_sql`,
+    without writing them out.
+
+    Args:
+        sql (list):
+            The list of SQL statements. Each entry can be a string, a
+            tuple of ``(statement, params)``, or a statement object.
+
+        database (unicode):
+            The name of the database the SQL is for.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations,
+                 optional):
+            The evolution operations for the database.
+
+    Returns:
+        list of unicode:
+        The list of SQL statements.
+    """
     out_sql = []
 
     for statement in sql:
+        if hasattr(statement, 'iter_sql'):
+            out_sql += get_sql_text(statement.iter_sql(), database, evolver)
+            continue
+        elif hasattr(statement, 'execute'):
+            statement = statement.to_sql()
+
         if isinstance(statement, tuple):
+            if evolver is None:
+                evolver = get_evolution_operations(database)
+
+            qp = evolver.quote_sql_param
             statement = six.text_type(statement[0] % tuple(
                 qp(evolver.normalize_value(s))
                 for s in statement[1]
             ))
 
-        print(statement)
         out_sql.append(statement)
 
     return out_sql
 
 
-def execute_sql(cursor, sql, database):
-    """
-    Execute a list of SQL statements on the provided cursor, unrolling
-    parameters as required
+def execute_sql(cursor, sql, database, evolver=None):
+    """Execute a list of SQL statements on a cursor.
+
+    Parameters are unrolled as required. If a statement fails, the
+    exception will have a ``last_sql_statement`` attribute containing the
+    statement.
+
+    Statement objects (those with ``execute()`` and ``to_sql()`` methods)
+    are given the cursor and left to execute themselves.
+
+    To cut down on round trips to the database, consecutive statements are
+    executed in batches of up to
+    ``settings.DJANGO_EVOLUTION_STATEMENT_BATCH_SIZE`` statements (100 by
+    default). Parameterized statements sharing the same SQL are executed
+    with ``executemany()``, and statements without parameters are executed
+    together as a script, if the backend supports it. Batches are only used
+    in a transaction on a database that can roll back schema changes. Each
+    batch is run in a savepoint, and if it fails, its statements are run
+    one at a time to find the statement that failed. Setting the batch size
+    to 1 turns off batching.
+
+    If ``settings.DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES`` is set, a
+    statement that fails due to a lock timeout will be retried up to that
+    many times. The first retry waits
+    ``settings.DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY`` seconds (1 by
+    default), doubling for each further retry. When running in a
+    transaction on a database that can roll back schema changes, each
+    statement is run in a savepoint, so that a failed attempt can be rolled
+    back. Without a savepoint, only plain statements are retried. Statement
+    objects may run several statements (such as the lines of an evolution
+    SQL file), and some may already have been applied when one fails.
+
+    Args:
+        cursor (django.db.backends.util.CursorWrapper):
+            The database cursor used to execute the statements.
+
+        sql (list):
+            The list of SQL statements. Each entry can be a string, a
+            tuple of ``(statement, params)``, or a statement object.
+
+        database (unicode):
+            The name of the database the SQL is for.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations,
+                 optional):
+            The evolution operations for the database. Callers executing
+            several lists of SQL can pass this to avoid looking up the
+            backend each time.
+
+    Returns:
+        int:
+        The number of times statements were retried after lock timeouts.
     """
-    evolver = EvolutionOperationsMulti(database).get_evolver()
+    if evolver is None:
+        evolver = get_evolution_operations(database)
+
+    max_retries = getattr(settings, 'DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRIES',
+                          0)
+    retry_delay = getattr(settings,
+                          'DJANGO_EVOLUTION_LOCK_TIMEOUT_RETRY_DELAY', 1)
+    connection = connections[database]
+    can_use_savepoints = (connection.in_atomic_block and
+                          connection.features.can_rollback_ddl)
+
+    if can_use_savepoints:
+        batch_size = getattr(settings,
+                             'DJANGO_EVOLUTION_STATEMENT_BATCH_SIZE', 100)
+    else:
+        batch_size = 1
+
     statement = None
+    num_retries = 0
 
     try:
-        for statement in sql:
-            if isinstance(statement, tuple):
-                statement = (statement[0].strip(), statement[1])
-
-                if statement[0] and not statement[0].startswith('--'):
-                    cursor.execute(statement[0], tuple(
-                        evolver.normalize_value(s)
-                        for s in statement[1]
-                    ))
-            else:
-                statement = statement.strip()
+        for batch in _iter_statement_batches(sql, evolver, batch_size):
+            statement = batch[0]
+            use_savepoint = can_use_savepoints and (max_retries or
+                                                    len(batch) > 1)
 
-                if statement and not statement.startswith('--'):
-                    cursor.execute(statement)
+            if use_savepoint or not hasattr(statement, 'execute'):
+                batch_max_retries = max_retries
+            else:
+                batch_max_retries = 0
+
+            attempt = 0
+
+            while True:
+                try:
+                    if use_savepoint:
+                        with transaction.atomic(using=database):
+                            _execute_statement_batch(cursor, batch, evolver)
+                    else:
+                        _execute_statement_batch(cursor, batch, evolver)
+
+                    break
+                except Exception as e:
+                    if (attempt < batch_max_retries and
+                        evolver.is_lock_timeout_error(e)):
+                        time.sleep(retry_delay * (2 ** attempt))
+                        attempt += 1
+                        num_retries += 1
+                    elif (len(batch) > 1 and
+                          not evolver.is_lock_timeout_error(e)):
+                        # The batch was rolled back. Run each statement on
+                        # its own to find the one that failed.
+                        for statement in batch:
+                            _execute_statement(cursor, statement, evolver)
+
+                        break
+                    else:
+                        raise
     except Exception as e:
         # Augment the exception so that callers can get the SQL statement
-        # that failed.
-        e.last_sql_statement = statement
+        # that failed, unless a statement object has already provided the
+        # specific statement.
+        if getattr(e, 'last_sql_statement', None) is None:
+            if hasattr(statement, 'execute'):
+                statement = statement.to_sql()
+
+            e.last_sql_statement = statement
 
         raise
 
+    return num_retries
+
+
+def _iter_statement_batches(sql, evolver, batch_size):
+    """Generate batches of SQL statements that can be executed together.
+
+    Comments and empty statements are skipped. Parameterized statements
+    are batched with consecutive statements sharing the same SQL.
+    Statements without parameters are batched with consecutive statements
+    without parameters, if the backend can execute several statements at
+    once. Statement objects are never batched.
+
+    Args:
+        sql (list):
+            The list of SQL statements. Each entry can be a string, a
+            tuple of ``(statement, params)``, or a statement object.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations):
+            The evolution operations for the database.
+
+        batch_size (int):
+            The maximum number of statements in a batch.
+
+    Yields:
+        list:
+        Each batch of statements.
+    """
+    batch = []
+    batch_key = None
+
+    for statement in sql:
+        if hasattr(statement, 'execute'):
+            key = None
+        elif isinstance(statement, tuple):
+            statement = (statement[0].strip(), statement[1])
+
+            if not statement[0] or statement[0].startswith('--'):
+                continue
+
+            key = ('executemany', statement[0])
+        else:
+            statement = statement.strip()
+
+            if not statement or statement.startswith('--'):
+                continue
+
+            if evolver.supports_statement_scripts:
+                key = 'script'
+            else:
+                key = None
+
+        if batch and (key is None or key != batch_key or
+                      len(batch) >= batch_size):
+            yield batch
+            batch = []
+
+        batch.append(statement)
+        batch_key = key
+
+    if batch:
+        yield batch
+
+
+def _execute_statement_batch(cursor, batch, evolver):
+    """Execute a batch of SQL statements on a cursor.
+
+    Args:
+        cursor (django.db.backends.util.CursorWrapper):
+            The database cursor used to execute the statements.
+
+        batch (list):
+            The batch of statements, as generated by
+            :py:func:`_iter_statement_batches`.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations):
+            The evolution operations for the database.
+    """
+    statement = batch[0]
+
+    if len(batch) == 1:
+        _execute_statement(cursor, statement, evolver)
+    elif isinstance(statement, tuple):
+        cursor.executemany(statement[0], [
+            tuple(
+                evolver.normalize_value(s)
+                for s in params
+            )
+            for _sql, params in batch
+        ])
+    else:
+        cursor.execute('\n'.join(
+            statement if statement.endswith(';') else '%s;' % statement
+            for statement in batch
+        ))
+
+
+def _execute_statement(cursor, statement, evolver):
+    """Execute a single SQL statement on a cursor.
+
+    If the statement fails, the exception will have a
+    ``last_sql_statement`` attribute containing the statement.
+
+    Args:
+        cursor (django.db.backends.util.CursorWrapper):
+            The database cursor used to execute the statement.
+
+        statement (object):
+            The statement. This can be a string, a tuple of
+            ``(statement, params)``, or a statement object.
+
+        evolver (django_evolution.db.common.BaseEvolutionOperations):
+            The evolution operations for the database.
+    """
+    try:
+        if hasattr(statement, 'execute'):
+            statement.execute(cursor)
+        elif isinstance(statement, tuple):
+            statement = (statement[0].strip(), statement[1])
+
+            if statement[0] and not statement[0].startswith('--'):
+                cursor.execute(statement[0], tuple(
+                    evolver.normalize_value(s)
+                    for s in statement[1]
+                ))
+        else:
+            statement = statement.strip()
+
+            if statement and not statement.startswith('--'):
+                cursor.execute(statement)
+    except Exception as e:
+        if (getattr(e, 'last_sql_statement', None) is None and
+            not hasattr(statement, 'execute')):
+            e.last_sql_statement = statement
+
+        raise
+
+
+def split_non_transactional_sql(sql, later_sql=[]):
+    """Split SQL statements by whether they can run in a transaction.
+
+    Statement objects with a ``transactional`` attribute of ``False`` (such
+    as concurrent index builds) can't be run inside a transaction, and must
+    be executed separately once the transaction has been committed. These
+    are split out from the rest of the statements, keeping their order.
+
+    A statement can only be moved after the transaction if nothing still
+    run in the transaction after it depends on it. Statements with an
+    ``object_names`` attribute list the tables, indexes, or constraints
+    they operate on. If any of those are referenced by a later statement
+    in the transaction, the statement's transactional form (its ``sql``
+    attribute) will be kept in place instead.
+
+    Args:
+        sql (list):
+            The list of SQL statements.
+
+        later_sql (list, optional):
+            Statements that will be run in the transaction after these
+            statements (such as those for later apps being evolved).
+
+    Returns:
+        tuple:
+        A tuple of ``(transactional_sql, non_transactional_sql)``.
+    """
+    sql = list(sql)
+
+    if all(getattr(statement, 'transactional', True)
+           for statement in sql):
+        return sql, []
+
+    later_names = set()
+
+    for statement in later_sql:
+        later_names.update(_get_sql_identifiers(statement))
+
+    transactional_sql = []
+    non_transactional_sql = []
+
+    # Work backwards, so that it's known which statements will be run in
+    # the transaction after each non-transactional statement.
+    for statement in reversed(sql):
+        if not getattr(statement, 'transactional', True):
+            object_names = set(
+                name.lower()
+                for name in getattr(statement, 'object_names', [])
+            )
+
+            if object_names.isdisjoint(later_names):
+                non_transactional_sql.append(statement)
+                continue
+
+            statement = statement.sql
+
+        transactional_sql.append(statement)
+        later_names.update(_get_sql_identifiers(statement))
+
+    transactional_sql.reverse()
+    non_transactional_sql.reverse()
+
+    return transactional_sql, non_transactional_sql
+
+
+def _get_sql_identifiers(statement):
+    """Return the identifiers referenced in a SQL statement.
+
+    Args:
+        statement (object):
+            The SQL statement. This can be a string, a tuple of
+            ``(statement, params)``, or a statement object.
+
+    Returns:
+        set of unicode:
+        The lowercase words found in the statement, including any table,
+        column, index, and constraint names.
+    """
+    if hasattr(statement, 'to_sql'):
+        statement = statement.to_sql()
+
+    if isinstance(statement, tuple):
+        statement = statement[0]
+
+    return set(
+        name.lower()
+        for name in _sql_identifier_re.findall(statement)
+    )
+
 
 def get_database_for_model_name(app_name, model_name):
     """Returns the database used for a given model.
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Benchmark building mock models for a densely-related schema.
+
+This builds a project signature in memory containing a number of models,
+each with foreign keys and many-to-many relations to other random models,
+and then times building a mock model for each of them. Cold runs use a fresh
+copy of the signature, so no stub models can be shared with a previous run.
+Warm runs reuse the signature, and the stub models built for it.
+
+Usage:
+    ./tests/benchmark-mock-models.py [--models N] [--relations N]
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import django
+
+
+def build_project_sig(num_models, num_relations):
+    from django.db import models
+
+    from django_evolution.signature import (AppSignature, FieldSignature,
+                                            ModelSignature, ProjectSignature)
+
+    rand = random.Random(0)
+    app_sig = AppSignature(app_id='bench')
+
+    for i in range(num_models):
+        model_sig = ModelSignature(model_name='Model%d' % i,
+                                   table_name='bench_model%d' % i)
+        model_sig.add_field_sig(FieldSignature(
+            field_name='id',
+            field_type=models.AutoField,
+            field_attrs={
+                'primary_key': True,
+            }))
+
+        for j in range(num_relations):
+            related_model = 'bench.Model%d' % rand.randrange(num_models)
+
+            if j % 2 == 0:
+                model_sig.add_field_sig(FieldSignature(
+                    field_name='fk%d' % j,
+                    field_type=models.ForeignKey,
+                    related_model=related_model))
+            else:
+                model_sig.add_field_sig(FieldSignature(
+                    field_name='m2m%d' % j,
+                    field_type=models.ManyToManyField,
+                    related_model=related_model))
+
+        app_sig.add_model_sig(model_sig)
+
+    project_sig = ProjectSignature()
+    project_sig.add_app_sig(app_sig)
+
+    return project_sig
+
+
+def build_models(project_sig):
+    from django_evolution.mock_models import MockModel
+
+    app_sig = project_sig.get_app_sig('bench')
+
+    return [
+        MockModel(project_sig=project_sig,
+                  app_name='bench',
+                  model_name=model_sig.model_name,
+                  model_sig=model_sig)
+        for model_sig in app_sig.model_sigs
+    ]
+
+
+def run_benchmark(num_models, num_relations, repeat):
+    if hasattr(django, 'setup'):
+        # Django >= 1.7
+        django.setup()
+
+    print('Building a signature with %d models and %d relations each...'
+          % (num_models, num_relations))
+    project_sig = build_project_sig(num_models, num_relations)
+
+    cold_timings = []
+    warm_timings = []
+
+    for i in range(repeat):
+        cold_project_sig = project_sig.clone()
+
+        start = time.time()
+        cold_models = build_models(cold_project_sig)
+        cold_timings.append(time.time() - start)
+
+        # Keep the cold models alive, so that their stubs can be reused.
+        start = time.time()
+        build_models(cold_project_sig)
+        warm_timings.append(time.time() - start)
+
+        del cold_models
+
+    cold = min(cold_timings)
+    warm = min(warm_timings)
+
+    print('cold best=%.3fs' % cold)
+    print('warm best=%.3fs (%.2fx cold)' % (warm, cold / warm))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark building mock models.')
+    parser.add_argument(
+        '--models',
+        type=int,
+        default=1000,
+        help='The number of models in the signature.')
+    parser.add_argument(
+        '--relations',
+        type=int,
+        default=10,
+        help='The number of relation fields on each model.')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='The number of times to build the models.')
+    options = parser.parse_args()
+
+    run_benchmark(num_models=options.models,
+                  num_relations=options.relations,
+                  repeat=options.repeat)
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.join(os.path.dirname(__file__), '..'))
+    sys.path.insert(0, os.getcwd())
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.settings'
+
+    main()
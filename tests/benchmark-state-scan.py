@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Benchmark scanning database state serially and with worker threads.
+
+This creates a test database populated with a number of tables, and then
+times DatabaseState.rescan_indexes() with each requested number of workers.
+
+Usage:
+    ./tests/benchmark-state-scan.py <database> [--tables N] [--workers N,...]
+
+The database is one of the choices in tests/settings.py (such as
+"postgresql" or "mysql", configured in tests/test_db_settings.py).
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import time
+
+import django
+
+
+def run_benchmark(num_tables, workers_list, repeat):
+    if hasattr(django, 'setup'):
+        # Django >= 1.7
+        django.setup()
+
+    from django.db import connection
+
+    from django_evolution.db.state import DatabaseState
+
+    old_db_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        qn = connection.ops.quote_name
+        cursor = connection.cursor()
+
+        print('Creating %d tables...' % num_tables)
+
+        for i in range(num_tables):
+            table_name = 'bench_table_%d' % i
+
+            cursor.execute(
+                'CREATE TABLE %s (id integer NOT NULL PRIMARY KEY,'
+                ' name varchar(100) NOT NULL, value integer NULL);'
+                % qn(table_name))
+            cursor.execute(
+                'CREATE INDEX %s ON %s (%s);'
+                % (qn('bench_index_%d' % i), qn(table_name), qn('name')))
+
+        cursor.close()
+
+        serial_time = None
+
+        for workers in workers_list:
+            timings = []
+
+            for i in range(repeat):
+                database_state = DatabaseState('default', scan=False)
+
+                start = time.time()
+                database_state.rescan_indexes(use_cache=False,
+                                              workers=workers)
+                timings.append(time.time() - start)
+
+            best = min(timings)
+
+            if serial_time is None:
+                serial_time = best
+
+            print('workers=%-3d best=%.3fs (%.2fx serial)'
+                  % (workers, best, serial_time / best))
+    finally:
+        connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark scanning database state.')
+    parser.add_argument(
+        'database',
+        help='The database type to benchmark, from tests/settings.py.')
+    parser.add_argument(
+        '--tables',
+        type=int,
+        default=2000,
+        help='The number of tables to create.')
+    parser.add_argument(
+        '--workers',
+        default='1,2,4,8',
+        help='A comma-separated list of worker counts to benchmark. The '
+             'first is used as the baseline.')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='The number of times to scan for each worker count.')
+    options = parser.parse_args()
+
+    os.environ['DJANGO_EVOLUTION_TEST_DB'] = options.database
+
+    run_benchmark(num_tables=options.tables,
+                  workers_list=[
+                      int(workers)
+                      for workers in options.workers.split(',')
+                  ],
+                  repeat=options.repeat)
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.join(os.path.dirname(__file__), '..'))
+    sys.path.insert(0, os.getcwd())
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.settings'
+
+    main()